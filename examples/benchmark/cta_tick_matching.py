@@ -0,0 +1,109 @@
+"""
+Check tick mode backtesting with TickMatchingModel for strategies which
+send and cancel orders in on_order and on_trade callbacks.
+"""
+
+from datetime import datetime, timedelta
+
+from vnpy.trader.constant import Exchange, Status
+from vnpy.trader.matching import TickMatchingModel
+from vnpy.trader.object import OrderData, TickData, TradeData
+from vnpy.app.cta_strategy import CtaTemplate
+from vnpy.app.cta_strategy.backtesting import (
+    BacktestingEngine,
+    BacktestingMode
+)
+
+
+class CallbackOrderStrategy(CtaTemplate):
+    """
+    * send two entry orders on first tick
+    * send one more order in on_order when an order is pending
+    * cancel all orders in on_trade, so that fills of other orders
+      matched on the same tick are dropped
+    """
+
+    author = "vnpy"
+
+    def on_init(self):
+        """"""
+        self.sent = False
+        self.pending_count = 0
+        self.load_tick(1)
+
+    def on_tick(self, tick: TickData):
+        """"""
+        if self.trading and not self.sent:
+            self.sent = True
+            self.buy(tick.ask_price_1, 1)
+            self.buy(tick.ask_price_1, 1)
+
+    def on_order(self, order: OrderData):
+        """"""
+        if order.status == Status.NOTTRADED and self.pending_count < 3:
+            self.pending_count += 1
+            self.buy(order.price, 1)
+
+    def on_trade(self, trade: TradeData):
+        """"""
+        self.cancel_all()
+
+
+def generate_ticks(count: int = 100) -> list:
+    """
+    Generate ticks of 2 days, the first day is used for initializing.
+    """
+    ticks = []
+    dt = datetime(2020, 1, 2, 9, 0)
+
+    for i in range(count):
+        if i == count // 2:
+            dt += timedelta(days=1)
+
+        tick = TickData(
+            symbol="IF888",
+            exchange=Exchange.CFFEX,
+            datetime=dt + timedelta(seconds=i),
+            volume=i,
+            last_price=4000,
+            bid_price_1=3999.8,
+            ask_price_1=4000.2,
+            bid_volume_1=10,
+            ask_volume_1=10,
+            gateway_name="DB"
+        )
+        ticks.append(tick)
+
+    return ticks
+
+
+if __name__ == "__main__":
+    ticks = generate_ticks()
+
+    engine = BacktestingEngine()
+    msgs = []
+    engine.output = msgs.append
+    engine.set_parameters(
+        vt_symbol="IF888.CFFEX",
+        interval="1m",
+        start=ticks[0].datetime,
+        end=ticks[-1].datetime,
+        rate=0,
+        slippage=0,
+        size=300,
+        pricetick=0.2,
+        capital=1_000_000,
+        mode=BacktestingMode.TICK,
+        matching_model=TickMatchingModel()
+    )
+    engine.add_strategy(CallbackOrderStrategy, {})
+    engine.history_data = ticks
+    engine.run_backtesting()
+
+    # Exception in backtesting is caught and output by engine
+    if "触发异常，回测终止" in msgs:
+        print(msgs[-1].strip().splitlines()[-1])
+
+    print(f"Trade count: {len(engine.trades)}")
+    print(f"Active orders: {len(engine.active_limit_orders)}")
+    print(f"Orders left in matching model: {len(engine.matching_model.orders)}")
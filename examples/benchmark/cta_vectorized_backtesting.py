@@ -0,0 +1,170 @@
+"""
+Compare bar mode backtesting speed between normal and vectorized
+replay of CTA BacktestingEngine, with 5 years of generated 1 minute data.
+
+Results are also compared for a strategy which sends orders in on_trade,
+on_order and on_stop_order callbacks.
+"""
+
+from datetime import datetime, timedelta
+from time import perf_counter
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange, Interval, Status
+from vnpy.trader.object import BarData, OrderData, TradeData
+from vnpy.app.cta_strategy import CtaTemplate, StopOrder
+from vnpy.app.cta_strategy.base import StopOrderStatus
+from vnpy.app.cta_strategy.backtesting import BacktestingEngine
+from vnpy.app.cta_strategy.strategies.double_ma_strategy import (
+    DoubleMaStrategy,
+)
+
+
+class ReentryStrategy(CtaTemplate):
+    """
+    Send orders from trade, order and stop order callbacks:
+    * take profit with limit order and stop loss with stop order in on_trade
+    * cancel the other exit order when one is filled
+    * enter again in on_trade after position is closed
+    * enter with new order when exit order is cancelled
+    """
+
+    author = "vnpy"
+
+    def on_init(self):
+        """"""
+        self.entered = False
+        self.load_bar(10)
+
+    def on_bar(self, bar: BarData):
+        """"""
+        # Only the first entry is sent in on_bar
+        if self.trading and not self.entered:
+            self.entered = True
+            self.buy(bar.close_price - 2, 1)
+
+    def on_trade(self, trade: TradeData):
+        """"""
+        if self.pos > 0:
+            self.sell(trade.price + 4, 1)
+            self.sell(trade.price - 6, 1, stop=True)
+        elif not self.pos:
+            self.cancel_all()
+            self.buy(trade.price - 2, 1)
+
+    def on_order(self, order: OrderData):
+        """"""
+        # Send new entry order when take profit order is cancelled
+        if order.status == Status.CANCELLED and not self.pos:
+            self.buy(order.price - 5, 1)
+
+    def on_stop_order(self, stop_order: StopOrder):
+        """"""
+        # Send breakout entry order when stop loss order is cancelled
+        if stop_order.status == StopOrderStatus.CANCELLED and not self.pos:
+            self.buy(stop_order.price + 10, 1, stop=True)
+
+
+def generate_bars(years: int = 5) -> list:
+    """
+    Generate random walk 1 minute bars, 240 bars per day.
+    """
+    rng = np.random.RandomState(0)
+    days = years * 244
+    count = days * 240
+
+    close = 4000 + np.cumsum(rng.randint(-3, 4, count))
+    spread = rng.randint(0, 3, (2, count))
+
+    bars = []
+    dt = datetime(2015, 1, 5, 9, 0)
+    ix = 0
+
+    for _ in range(days):
+        for minute in range(240):
+            price = float(close[ix])
+
+            bar = BarData(
+                symbol="IF888",
+                exchange=Exchange.CFFEX,
+                datetime=dt + timedelta(minutes=minute),
+                interval=Interval.MINUTE,
+                volume=100,
+                open_price=price,
+                high_price=price + float(spread[0, ix]),
+                low_price=price - float(spread[1, ix]),
+                close_price=price,
+                gateway_name="DB"
+            )
+            bars.append(bar)
+            ix += 1
+
+        dt += timedelta(days=1)
+
+    return bars
+
+
+def run(bars: list, vectorized: bool, strategy_class: type = DoubleMaStrategy):
+    """"""
+    engine = BacktestingEngine()
+    engine.output = lambda msg: None
+    engine.set_parameters(
+        vt_symbol="IF888.CFFEX",
+        interval="1m",
+        start=bars[0].datetime,
+        end=bars[-1].datetime,
+        rate=0.3 / 10000,
+        slippage=0.2,
+        size=300,
+        pricetick=0.2,
+        capital=1_000_000,
+        vectorized=vectorized
+    )
+    engine.add_strategy(strategy_class, {})
+    engine.history_data = bars
+
+    start = perf_counter()
+    engine.run_backtesting()
+    df = engine.calculate_result()
+    statistics = engine.calculate_statistics(output=False)
+    cost = perf_counter() - start
+
+    return engine, df, statistics, cost
+
+
+def get_trades(engine: BacktestingEngine) -> list:
+    """"""
+    return [
+        (t.datetime, t.direction, t.price, t.volume)
+        for t in engine.get_all_trades()
+    ]
+
+
+if __name__ == "__main__":
+    bars = generate_bars()
+    print(f"Bar count: {len(bars)}")
+
+    normal_engine, normal_df, normal_statistics, normal_cost = run(bars, False)
+    fast_engine, fast_df, fast_statistics, fast_cost = run(bars, True)
+
+    normal_trades = get_trades(normal_engine)
+    fast_trades = get_trades(fast_engine)
+
+    print(f"Normal replay: {normal_cost:.2f}s")
+    print(f"Vectorized replay: {fast_cost:.2f}s")
+    print(f"Speedup: {normal_cost / fast_cost:.2f}x")
+    print(f"Same trades: {normal_trades == fast_trades}")
+    print(f"Same daily result: {normal_df.drop(columns='trades').equals(fast_df.drop(columns='trades'))}")
+    print(f"Same statistics: {str(normal_statistics) == str(fast_statistics)}")
+
+    # Orders sent from callbacks are crossed on the same bars in both modes
+    bars = bars[:244 * 240]
+    normal_engine = run(bars, False, ReentryStrategy)[0]
+    fast_engine = run(bars, True, ReentryStrategy)[0]
+
+    normal_trades = get_trades(normal_engine)
+    fast_trades = get_trades(fast_engine)
+
+    print(f"Reentry strategy trade count: {len(normal_trades)}, {len(fast_trades)}")
+    print(f"Reentry strategy same trades: {normal_trades == fast_trades}")
@@ -0,0 +1,97 @@
+"""
+Compare memory usage and creation/copy speed between normal data classes
+and compact (__slots__) variants in vnpy.trader.object.
+"""
+
+import tracemalloc
+from copy import copy
+from datetime import datetime
+from time import perf_counter
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import (
+    TickData,
+    BarData,
+    CompactTickData,
+    CompactBarData
+)
+
+
+COUNT = 1_000_000
+
+
+def create_ticks(tick_class: type) -> list:
+    """"""
+    dt = datetime.now()
+
+    ticks = [
+        tick_class(
+            symbol="rb2010",
+            exchange=Exchange.SHFE,
+            datetime=dt,
+            last_price=3500 + i % 10,
+            volume=i,
+            bid_price_1=3499,
+            ask_price_1=3501,
+            bid_volume_1=10,
+            ask_volume_1=10,
+            gateway_name="CTP"
+        )
+        for i in range(COUNT)
+    ]
+    return ticks
+
+
+def create_bars(bar_class: type) -> list:
+    """"""
+    dt = datetime.now()
+
+    bars = [
+        bar_class(
+            symbol="rb2010",
+            exchange=Exchange.SHFE,
+            datetime=dt,
+            interval=Interval.MINUTE,
+            volume=i,
+            open_price=3500,
+            high_price=3510,
+            low_price=3490,
+            close_price=3505,
+            gateway_name="DB"
+        )
+        for i in range(COUNT)
+    ]
+    return bars
+
+
+def run(func, data_class: type):
+    """"""
+    tracemalloc.start()
+    datas = func(data_class)
+    memory = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+    tracemalloc.stop()
+
+    del datas
+
+    start = perf_counter()
+    datas = func(data_class)
+    create_cost = perf_counter() - start
+
+    start = perf_counter()
+    for data in datas:
+        copy(data)
+    copy_cost = perf_counter() - start
+
+    print(
+        f"{data_class.__name__:<16} memory: {memory:>8.1f}MB  "
+        f"create: {create_cost:>6.2f}s  copy: {copy_cost:>6.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    print(f"Object count: {COUNT}")
+
+    run(create_ticks, TickData)
+    run(create_ticks, CompactTickData)
+    run(create_bars, BarData)
+    run(create_bars, CompactBarData)
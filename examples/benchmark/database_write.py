@@ -0,0 +1,73 @@
+"""
+Compare bar data writing throughput (rows/sec) of database drivers.
+
+Settings of other drivers (mysql/postgresql/mongodb) can be appended to
+DRIVER_SETTINGS to be included in the comparison.
+"""
+
+import os
+from datetime import datetime, timedelta
+from time import perf_counter
+
+os.environ["VNPY_TESTING"] = "1"
+
+from vnpy.trader.constant import Exchange, Interval  # noqa
+from vnpy.trader.object import BarData  # noqa
+from vnpy.trader.database.database import DB_TZ  # noqa
+from vnpy.trader.database.initialize import init  # noqa
+
+
+DRIVER_SETTINGS = [
+    {"driver": "sqlite", "database": "benchmark.db"},
+    {"driver": "numpy", "database": "benchmark_numpy"},
+]
+
+
+def generate_bars(count: int) -> list:
+    """"""
+    start = DB_TZ.localize(datetime(2010, 1, 4, 9, 0))
+
+    bars = [
+        BarData(
+            symbol="BENCHMARK",
+            exchange=Exchange.SHFE,
+            datetime=start + timedelta(minutes=i),
+            interval=Interval.MINUTE,
+            volume=100,
+            open_price=4000,
+            high_price=4001,
+            low_price=3999,
+            close_price=4000,
+            gateway_name="DB"
+        )
+        for i in range(count)
+    ]
+    return bars
+
+
+def run(settings: dict, bars: list):
+    """"""
+    database_manager = init(settings)
+    database_manager.clean("BENCHMARK")
+
+    start = perf_counter()
+    database_manager.save_bar_data(bars)
+    speed = len(bars) / (perf_counter() - start)
+    print(f"{settings['driver']} save_bar_data: {speed:.0f} rows/sec")
+
+    database_manager.clean("BENCHMARK")
+    speed = database_manager.bulk_save_bar_data(bars)
+    print(f"{settings['driver']} bulk_save_bar_data: {speed:.0f} rows/sec")
+
+    database_manager.clean("BENCHMARK")
+    speed = database_manager.bulk_save_bar_data(bars, defer_index=True)
+    print(f"{settings['driver']} bulk_save_bar_data(defer_index): {speed:.0f} rows/sec")
+
+    database_manager.clean("BENCHMARK")
+
+
+if __name__ == "__main__":
+    bars = generate_bars(500_000)
+
+    for settings in DRIVER_SETTINGS:
+        run(settings, bars)
@@ -0,0 +1,97 @@
+"""
+Compare incremental indicators with TA-Lib functions on the same
+generated price series, from the first valid value of TA-Lib.
+"""
+
+import numpy as np
+import talib
+
+from vnpy.trader.indicator import (
+    SmaIndicator,
+    EmaIndicator,
+    StdIndicator,
+    AtrIndicator,
+    RsiIndicator,
+    DonchianIndicator,
+    MacdIndicator
+)
+
+
+def generate_prices(count: int = 5000) -> tuple:
+    """
+    Generate random walk high, low and close prices.
+    """
+    rng = np.random.RandomState(0)
+
+    close = 3000 + np.cumsum(rng.normal(0, 3, count))
+    high = close + np.abs(rng.normal(0, 2, count))
+    low = close - np.abs(rng.normal(0, 2, count))
+
+    return high, low, close
+
+
+def run_indicator(indicator, high, low, close) -> np.ndarray:
+    """
+    Update indicator bar by bar and collect value after each bar.
+    """
+    values = []
+
+    for h, l, c in zip(high, low, close):
+        indicator.update(h, l, c)
+        values.append(indicator.value)
+
+    return np.array(values, dtype=float)
+
+
+def compare(name: str, result: np.ndarray, expected: np.ndarray) -> None:
+    """"""
+    # Values are valid on the same bars
+    same_valid = np.array_equal(np.isnan(result), np.isnan(expected))
+
+    # Error relative to value, or absolute error for values close to 0
+    diff = np.abs(result - expected) / np.maximum(np.abs(expected), 1)
+    max_diff = np.nanmax(diff)
+
+    print(f"{name:<16} same valid bars: {same_valid}  max diff: {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    high, low, close = generate_prices()
+
+    compare(
+        "SMA(20)",
+        run_indicator(SmaIndicator(20), high, low, close),
+        talib.SMA(close, 20)
+    )
+    compare(
+        "EMA(12)",
+        run_indicator(EmaIndicator(12), high, low, close),
+        talib.EMA(close, 12)
+    )
+    compare(
+        "STD(20)",
+        run_indicator(StdIndicator(20), high, low, close),
+        talib.STDDEV(close, 20)
+    )
+    compare(
+        "ATR(14)",
+        run_indicator(AtrIndicator(14), high, low, close),
+        talib.ATR(high, low, close, 14)
+    )
+    compare(
+        "RSI(14)",
+        run_indicator(RsiIndicator(14), high, low, close),
+        talib.RSI(close, 14)
+    )
+    compare(
+        "Donchian(20)",
+        run_indicator(DonchianIndicator(20), high, low, close),
+        np.column_stack([talib.MAX(high, 20), talib.MIN(low, 20)])
+    )
+
+    for periods in [(12, 26, 9), (5, 35, 5), (26, 12, 9)]:
+        compare(
+            f"MACD{periods}",
+            run_indicator(MacdIndicator(*periods), high, low, close),
+            np.column_stack(talib.MACD(close, *periods))
+        )
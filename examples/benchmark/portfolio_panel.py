@@ -0,0 +1,130 @@
+"""
+Compare memory usage and replay speed between dict keyed by
+(datetime, vt_symbol) and time aligned BarPanel used by portfolio
+strategy backtesting.
+"""
+
+import tracemalloc
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+from vnpy.app.portfolio_strategy.backtesting import BarPanel
+
+
+SYMBOL_COUNT = 200
+BAR_COUNT = 5000
+
+
+def generate_datas() -> dict:
+    """
+    Generate minute bar data of each contract, with 1 bar of every 10
+    missing for half of the contracts.
+    """
+    start = datetime(2020, 1, 1)
+    datas = {}
+
+    for i in range(SYMBOL_COUNT):
+        symbol = f"{600000 + i}"
+        vt_symbol = f"{symbol}.SSE"
+        data = []
+
+        for n in range(BAR_COUNT):
+            if i % 2 and not n % 10:
+                continue
+
+            bar = BarData(
+                symbol=symbol,
+                exchange=Exchange.SSE,
+                datetime=start + timedelta(minutes=n),
+                interval=Interval.MINUTE,
+                volume=100,
+                open_price=10,
+                high_price=11,
+                low_price=9,
+                close_price=10,
+                gateway_name="DB"
+            )
+            data.append(bar)
+
+        datas[vt_symbol] = data
+
+    return datas
+
+
+def build_dict(vt_symbols: list, datas: dict) -> tuple:
+    """"""
+    history_data = {}
+    dts = set()
+
+    for vt_symbol in vt_symbols:
+        for bar in datas[vt_symbol]:
+            dts.add(bar.datetime)
+            history_data[(bar.datetime, vt_symbol)] = bar
+
+    return history_data, dts
+
+
+def replay_dict(vt_symbols: list, history_data: dict, dts: set) -> int:
+    """"""
+    count = 0
+    dts = list(dts)
+    dts.sort()
+
+    for dt in dts:
+        bars = {}
+        for vt_symbol in vt_symbols:
+            bar = history_data.get((dt, vt_symbol), None)
+            if bar:
+                bars[vt_symbol] = bar
+        count += len(bars)
+
+    return count
+
+
+def replay_panel(vt_symbols: list, panel: BarPanel) -> int:
+    """"""
+    count = 0
+
+    for ix in range(len(panel)):
+        bars = {}
+        row = panel.bars[ix].tolist()
+        for vt_symbol, bar in zip(vt_symbols, row):
+            if bar:
+                bars[vt_symbol] = bar
+        count += len(bars)
+
+    return count
+
+
+def run(name: str, build_func, replay_func, vt_symbols: list, datas: dict):
+    """"""
+    tracemalloc.start()
+    start = perf_counter()
+    result = build_func(vt_symbols, datas)
+    build_cost = perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+    tracemalloc.stop()
+
+    if not isinstance(result, tuple):
+        result = (result,)
+
+    start = perf_counter()
+    count = replay_func(vt_symbols, *result)
+    replay_cost = perf_counter() - start
+
+    print(
+        f"{name:<8} memory: {memory:>8.1f}MB  build: {build_cost:>6.2f}s  "
+        f"replay: {replay_cost:>6.2f}s  bars: {count}"
+    )
+
+
+if __name__ == "__main__":
+    print(f"Contract count: {SYMBOL_COUNT}, bar count: {BAR_COUNT}")
+
+    datas = generate_datas()
+    vt_symbols = list(datas.keys())
+
+    run("dict", build_dict, replay_dict, vt_symbols, datas)
+    run("panel", BarPanel, replay_panel, vt_symbols, datas)
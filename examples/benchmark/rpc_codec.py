@@ -0,0 +1,124 @@
+"""
+Compare message size and serialization throughput of codecs used by
+vnpy.rpc for data pushed and queried through RPC service.
+"""
+
+from copy import copy
+from datetime import datetime
+from time import perf_counter
+
+import pytz
+
+from vnpy.event import Event
+from vnpy.rpc.codec import get_codec, get_codec_names
+from vnpy.trader.constant import Exchange, Direction, Offset, Status
+from vnpy.trader.object import TickData, OrderData, TradeData, PositionData
+
+
+COUNT = 100_000
+
+CHINA_TZ = pytz.timezone("Asia/Shanghai")
+
+
+def create_datas() -> dict:
+    """"""
+    dt = datetime.now().replace(tzinfo=CHINA_TZ)
+
+    tick = TickData(
+        symbol="rb2010",
+        exchange=Exchange.SHFE,
+        datetime=dt,
+        name="螺纹钢2010",
+        volume=123456,
+        open_interest=654321,
+        last_price=3500,
+        limit_up=3800,
+        limit_down=3200,
+        bid_price_1=3499,
+        ask_price_1=3501,
+        bid_volume_1=10,
+        ask_volume_1=20,
+        gateway_name="CTP"
+    )
+
+    order = OrderData(
+        symbol="rb2010",
+        exchange=Exchange.SHFE,
+        orderid="1_-123456_1",
+        direction=Direction.LONG,
+        offset=Offset.OPEN,
+        price=3500,
+        volume=10,
+        status=Status.NOTTRADED,
+        datetime=dt,
+        gateway_name="CTP"
+    )
+
+    trade = TradeData(
+        symbol="rb2010",
+        exchange=Exchange.SHFE,
+        orderid="1_-123456_1",
+        tradeid="12345",
+        direction=Direction.LONG,
+        offset=Offset.OPEN,
+        price=3500,
+        volume=10,
+        datetime=dt,
+        gateway_name="CTP"
+    )
+
+    position = PositionData(
+        symbol="rb2010",
+        exchange=Exchange.SHFE,
+        direction=Direction.LONG,
+        volume=10,
+        price=3500,
+        gateway_name="CTP"
+    )
+
+    orders = []
+    for i in range(100):
+        order_copy = copy(order)
+        order_copy.orderid = f"1_-123456_{i}"
+        orders.append(order_copy)
+
+    datas = {
+        "tick event": ["", Event("eTick.", tick)],
+        "order event": ["", Event("eOrder.", order)],
+        "trade event": ["", Event("eTrade.", trade)],
+        "position event": ["", Event("ePosition.", position)],
+        "all orders": [True, orders]
+    }
+    return datas
+
+
+def run(codec_name: str, name: str, data: object) -> None:
+    """"""
+    codec = get_codec(codec_name)
+    message = codec.encode(data)
+
+    start = perf_counter()
+    for _ in range(COUNT):
+        codec.encode(data)
+    encode_speed = COUNT / (perf_counter() - start)
+
+    start = perf_counter()
+    for _ in range(COUNT):
+        codec.decode(message)
+    decode_speed = COUNT / (perf_counter() - start)
+
+    print(
+        f"{codec_name:<8} {name:<16} size: {len(message):>6}B  "
+        f"encode: {encode_speed:>9.0f}/s  decode: {decode_speed:>9.0f}/s"
+    )
+
+
+if __name__ == "__main__":
+    print(f"Message count: {COUNT}")
+
+    for name, data in create_datas().items():
+        if name == "all orders":
+            COUNT //= 100
+
+        for codec_name in get_codec_names():
+            run(codec_name, name, data)
@@ -1,14 +1,25 @@
+import re
 import sys
 import traceback
+from collections import defaultdict
 from datetime import datetime
 from enum import Enum
+from itertools import count
 from multiprocessing.dummy import Pool
-from queue import Empty, Queue
-from typing import Any, Callable, Optional, Union, Type
+from queue import Empty, PriorityQueue
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Dict, Optional, Union, Type
 from types import TracebackType
 
 import requests
 
+from vnpy.event.engine import LatencyStats
+
+
+# Path segment with digit but not version (e.g. order id), replaced in
+# key of latency statistics
+ID_SEGMENT_PATTERN = re.compile(r"(?<=/)(?!v\d+(?:/|$))[^/]*\d[^/]*")
 
 CALLBACK_TYPE = Callable[[dict, "Request"], Any]
 ON_FAILED_TYPE = Callable[[int, "Request"], Any]
@@ -24,6 +35,15 @@ class RequestStatus(Enum):
     error = 3       # Exception raised
 
 
+class RequestPriority(Enum):
+    """
+    Requests with higher priority (smaller value) are sent first.
+    """
+
+    high = 0        # Trading requests, e.g. send/cancel order
+    low = 1         # Query requests
+
+
 class Request(object):
     """
     Request object for status check.
@@ -40,6 +60,7 @@ class Request(object):
         on_failed: ON_FAILED_TYPE = None,
         on_error: ON_ERROR_TYPE = None,
         extra: Any = None,
+        priority: RequestPriority = RequestPriority.low,
     ):
         """"""
         self.method: str = method
@@ -52,10 +73,16 @@ class Request(object):
         self.on_failed: ON_FAILED_TYPE = on_failed
         self.on_error: ON_ERROR_TYPE = on_error
         self.extra: Any = extra
+        self.priority: RequestPriority = priority
 
         self.response: requests.Response = None
         self.status: RequestStatus = RequestStatus.ready
 
+        # Time (in milliseconds) waiting in queue and waiting for response
+        self.create_time: float = perf_counter()
+        self.wait: float = 0
+        self.latency: float = 0
+
     def __str__(self):
         """"""
         if self.response is None:
@@ -89,6 +116,10 @@ class RestClient(object):
     * Reimplement on_failed function to handle Non-2xx responses.
     * Use on_failed parameter in add_request function for individual Non-2xx response handling.
     * Reimplement on_error function to handle exception msg.
+    * Requests other than GET are sent before queued GET requests by default.
+    * Requests are sent concurrently by sessions, so order of requests
+      (e.g. send order then cancel it) is not guaranteed. Start with single
+      session if server requires increasing nonce in signature.
     """
 
     def __init__(self):
@@ -96,11 +127,18 @@ class RestClient(object):
         self.url_base: str = ""
         self._active: bool = False
 
-        self._queue: Queue = Queue()
+        # Items are (priority, count, request), count keeps FIFO order
+        # of requests with same priority.
+        self._queue: PriorityQueue = PriorityQueue()
+        self._count = count()
         self._pool: Pool = None
 
         self.proxies: dict = None
 
+        self._stats_lock: Lock = Lock()
+        self._wait_stats: Dict[str, LatencyStats] = defaultdict(LatencyStats)
+        self._latency_stats: Dict[str, LatencyStats] = defaultdict(LatencyStats)
+
     def init(
         self,
         url_base: str,
@@ -119,14 +157,17 @@ class RestClient(object):
 
     def start(self, n: int = 3) -> None:
         """
-        Start rest client with session count n.
+        Start rest client with session count n. Each session runs in
+        its own worker thread and keeps connections alive.
         """
         if self._active:
             return
 
         self._active = True
         self._pool = Pool(n)
-        self._pool.apply_async(self._run)
+
+        for _ in range(n):
+            self._pool.apply_async(self._run)
 
     def stop(self) -> None:
         """
@@ -151,6 +192,7 @@ class RestClient(object):
         on_failed: ON_FAILED_TYPE = None,
         on_error: ON_ERROR_TYPE = None,
         extra: Any = None,
+        priority: RequestPriority = None,
     ) -> Request:
         """
         Add a new request.
@@ -163,8 +205,15 @@ class RestClient(object):
         :param on_failed: callback function if Non-2xx status, type, type: (code, dict, Request)
         :param on_error: callback function when catching Python exception, type: (etype, evalue, tb, Request)
         :param extra: Any extra data which can be used when handling callback
+        :param priority: RequestPriority, high for methods other than GET if not given
         :return: Request
         """
+        if not priority:
+            if method == "GET":
+                priority = RequestPriority.low
+            else:
+                priority = RequestPriority.high
+
         request = Request(
             method,
             path,
@@ -175,8 +224,9 @@ class RestClient(object):
             on_failed,
             on_error,
             extra,
+            priority,
         )
-        self._queue.put(request)
+        self._queue.put((priority.value, next(self._count), request))
         return request
 
     def _run(self) -> None:
@@ -185,7 +235,7 @@ class RestClient(object):
             session = requests.session()
             while self._active:
                 try:
-                    request = self._queue.get(timeout=1)
+                    _, _, request = self._queue.get(timeout=1)
                     try:
                         self._process_request(request, session)
                     finally:
@@ -253,14 +303,20 @@ class RestClient(object):
 
             url = self.make_full_url(request.path)
 
-            response = session.request(
-                request.method,
-                url,
-                headers=request.headers,
-                params=request.params,
-                data=request.data,
-                proxies=self.proxies,
-            )
+            # Latency is also recorded if request failed, e.g. timeout
+            send_time = perf_counter()
+            try:
+                response = session.request(
+                    request.method,
+                    url,
+                    headers=request.headers,
+                    params=request.params,
+                    data=request.data,
+                    proxies=self.proxies,
+                )
+            finally:
+                self.update_stats(request, send_time)
+
             request.response = response
             status_code = response.status_code
             if status_code // 100 == 2:  # 2xx codes are all successful
@@ -286,6 +342,50 @@ class RestClient(object):
             else:
                 self.on_error(t, v, tb, request)
 
+    def update_stats(self, request: Request, send_time: float) -> None:
+        """
+        Record queue wait time and response latency of request.
+        """
+        request.wait = (send_time - request.create_time) * 1000
+        request.latency = (perf_counter() - send_time) * 1000
+
+        key = self.get_stats_key(request)
+
+        with self._stats_lock:
+            self._wait_stats[key].update(request.wait)
+            self._latency_stats[key].update(request.latency)
+
+    def get_stats_key(self, request: Request) -> str:
+        """
+        Get key of request in latency statistics. Path segments with digit
+        (e.g. order id) are replaced with "*", so that count of keys is
+        bounded. Reimplement this function for other path formats.
+        """
+        path = ID_SEGMENT_PATTERN.sub("*", request.path)
+        return f"{request.method} {path}"
+
+    def get_latency_stats(self) -> dict:
+        """
+        Get snapshot of statistics of each request type (method and path):
+            * wait: time waiting in queue
+            * latency: time waiting for response
+        Latency is in milliseconds.
+        """
+        with self._stats_lock:
+            return {
+                "queue": self._queue.qsize(),
+                "wait": {k: v.to_dict() for k, v in self._wait_stats.items()},
+                "latency": {k: v.to_dict() for k, v in self._latency_stats.items()}
+            }
+
+    def reset_latency_stats(self) -> None:
+        """
+        Clear all statistics recorded.
+        """
+        with self._stats_lock:
+            self._wait_stats.clear()
+            self._latency_stats.clear()
+
     def make_full_url(self, path: str) -> str:
         """
         Make relative api path into full url.
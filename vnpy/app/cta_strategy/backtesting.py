@@ -1,24 +1,40 @@
-from collections import defaultdict
-from datetime import date, datetime, timedelta
-from typing import Callable
-from itertools import product
-from functools import lru_cache
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, tzinfo
+from typing import Callable, Dict, List, Optional
+from itertools import chain, product
+from functools import lru_cache, partial
+from pathlib import Path
 from time import time
+import hashlib
+import inspect
+import json
 import multiprocessing
+import os
 import random
+import shelve
+import tempfile
 import traceback
 
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pandas import DataFrame
 from deap import creator, base, tools, algorithms
 
+import vnpy
 from vnpy.trader.constant import (Direction, Offset, Exchange,
                                   Interval, Status)
 from vnpy.trader.database import database_manager
+from vnpy.trader.database.database import BAR_DTYPE, TICK_DTYPE, rows_to_array
 from vnpy.trader.object import OrderData, TradeData, BarData, TickData
-from vnpy.trader.utility import round_to
+from vnpy.trader.utility import round_to, get_folder_path, ChunkedDataStream
+from vnpy.trader.matching import TickMatchingModel
 
 from .base import (
     BacktestingMode,
@@ -33,6 +49,8 @@ from .template import CtaTemplate
 # Set seaborn style
 sns.set_style("whitegrid")
 
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
 # Set deap algo
 creator.create("FitnessMax", base.Fitness, weights=(1.0,))
 creator.create("Individual", list, fitness=creator.FitnessMax)
@@ -120,6 +138,9 @@ class BacktestingEngine:
         self.capital = 1_000_000
         self.mode = BacktestingMode.BAR
         self.inverse = False
+        self.vectorized = False
+        self.matching_model: TickMatchingModel = None
+        self.streaming = False
 
         self.strategy_class = None
         self.strategy = None
@@ -131,6 +152,8 @@ class BacktestingEngine:
         self.days = 0
         self.callback = None
         self.history_data = []
+        self.history_arrays: Dict[str, np.ndarray] = None
+        self.history_data_key: tuple = None
 
         self.stop_order_count = 0
         self.stop_orders = {}
@@ -140,6 +163,14 @@ class BacktestingEngine:
         self.limit_orders = {}
         self.active_limit_orders = {}
 
+        # Bar index of order crossing used in vectorized replay
+        self.pending_limit_orders = []
+        self.pending_stop_orders = []
+        self.limit_cross_ixs = {}
+        self.stop_cross_ixs = {}
+        self.limit_cross_ix = np.inf
+        self.stop_cross_ix = np.inf
+
         self.trade_count = 0
         self.trades = {}
 
@@ -165,12 +196,22 @@ class BacktestingEngine:
         self.limit_orders.clear()
         self.active_limit_orders.clear()
 
+        self.pending_limit_orders.clear()
+        self.pending_stop_orders.clear()
+        self.limit_cross_ixs.clear()
+        self.stop_cross_ixs.clear()
+        self.limit_cross_ix = np.inf
+        self.stop_cross_ix = np.inf
+
         self.trade_count = 0
         self.trades.clear()
 
         self.logs.clear()
         self.daily_results.clear()
 
+        if self.matching_model:
+            self.matching_model.clear()
+
     def set_parameters(
         self,
         vt_symbol: str,
@@ -183,7 +224,10 @@ class BacktestingEngine:
         capital: int = 0,
         end: datetime = None,
         mode: BacktestingMode = BacktestingMode.BAR,
-        inverse: bool = False
+        inverse: bool = False,
+        vectorized: bool = False,
+        matching_model: TickMatchingModel = None,
+        streaming: bool = False
     ):
         """"""
         self.mode = mode
@@ -202,6 +246,9 @@ class BacktestingEngine:
         self.end = end
         self.mode = mode
         self.inverse = inverse
+        self.vectorized = vectorized
+        self.matching_model = matching_model
+        self.streaming = streaming
 
     def add_strategy(self, strategy_class: type, setting: dict):
         """"""
@@ -210,8 +257,11 @@ class BacktestingEngine:
             self, strategy_class.__name__, self.vt_symbol, setting
         )
 
-    def load_data(self):
-        """"""
+    def load_data(self, full: bool = False):
+        """
+        Load history data, which is skipped in streaming mode unless full
+        is True (e.g. for optimization).
+        """
         self.output("开始加载历史数据")
 
         if not self.end:
@@ -222,6 +272,13 @@ class BacktestingEngine:
             return
 
         self.history_data.clear()       # Clear previously loaded history data
+        self.history_arrays = None
+        self.history_data_key = None
+
+        # Data is loaded chunk by chunk during replay in streaming mode
+        if self.streaming and not full:
+            self.output("流式回放模式，历史数据将在回放时分块加载")
+            return
 
         # Load 30 days of data each time and allow for progress update
         progress_delta = timedelta(days=30)
@@ -261,8 +318,15 @@ class BacktestingEngine:
             start = end + interval_delta
             end += (progress_delta + interval_delta)
 
+        self.history_data_key = self.get_history_data_key()
         self.output(f"历史数据加载完成，数据量：{len(self.history_data)}")
 
+    def get_history_data_key(self) -> tuple:
+        """
+        Get parameters which history data is loaded with.
+        """
+        return (self.vt_symbol, self.mode, self.interval, self.start, self.end)
+
     def run_backtesting(self):
         """"""
         if self.mode == BacktestingMode.BAR:
@@ -272,11 +336,20 @@ class BacktestingEngine:
 
         self.strategy.on_init()
 
+        # Replay data from stream in streaming mode, otherwise from list
+        if self.streaming and not self.history_data:
+            stream = self.get_history_stream()
+            history_data = iter(stream)
+        else:
+            stream = None
+            history_data = iter(self.history_data)
+
         # Use the first [days] of history data for initializing strategy
         day_count = 0
         ix = 0
+        data = None
 
-        for ix, data in enumerate(self.history_data):
+        for ix, data in enumerate(history_data):
             if self.datetime and data.datetime.day != self.datetime.day:
                 day_count += 1
                 if day_count >= self.days:
@@ -289,6 +362,9 @@ class BacktestingEngine:
             except Exception:
                 self.output("触发异常，回测终止")
                 self.output(traceback.format_exc())
+
+                if stream:
+                    stream.close()
                 return
 
         self.strategy.inited = True
@@ -299,16 +375,172 @@ class BacktestingEngine:
         self.output("开始回放历史数据")
 
         # Use the rest of history data for running backtesting
-        for data in self.history_data[ix:]:
+        if self.mode == BacktestingMode.BAR and self.vectorized and not stream:
+            self.run_vectorized_replay(ix)
+            return
+
+        # Data which stopped initialization is the first one to replay
+        if data:
+            history_data = chain([data], history_data)
+
+        for data in history_data:
             try:
                 func(data)
             except Exception:
                 self.output("触发异常，回测终止")
                 self.output(traceback.format_exc())
+
+                if stream:
+                    stream.close()
                 return
 
+        if stream:
+            self.output(f"历史数据流式加载完成，数据量：{stream.count}")
+
         self.output("历史数据回放结束")
 
+    def get_history_stream(self) -> ChunkedDataStream:
+        """
+        Create stream which loads history data chunk by chunk.
+        """
+        if not self.end:
+            self.end = datetime.now()
+
+        if self.mode == BacktestingMode.BAR:
+            def load_func(start: datetime, end: datetime) -> List[BarData]:
+                return database_manager.load_bar_data(
+                    self.symbol, self.exchange, self.interval, start, end
+                )
+
+            chunk_delta = timedelta(days=30)
+            interval_delta = INTERVAL_DELTA_MAP[self.interval]
+        else:
+            def load_func(start: datetime, end: datetime) -> List[TickData]:
+                return database_manager.load_tick_data(
+                    self.symbol, self.exchange, start, end
+                )
+
+            chunk_delta = timedelta(days=1)
+            interval_delta = timedelta(microseconds=1)
+
+        return ChunkedDataStream(
+            load_func, self.start, self.end, chunk_delta, interval_delta
+        )
+
+    def run_vectorized_replay(self, ix: int):
+        """
+        Replay bar data with history arrays. Index of the bar crossing each
+        order is searched with arrays, so that order crossing is only run on
+        those bars. Daily close prices are updated after replay is finished.
+        """
+        if self.history_arrays is None:
+            self.history_arrays = generate_bar_arrays(self.history_data)
+
+        end = ix
+
+        for bar in self.history_data[ix:]:
+            self.bar = bar
+            self.datetime = bar.datetime
+
+            try:
+                if self.pending_limit_orders:
+                    self.update_limit_cross_index(end)
+
+                # Orders sent in callbacks of crossing are still pending,
+                # and their cross index is searched on next bar.
+                if end >= self.limit_cross_ix:
+                    self.cross_limit_order()
+                    self.limit_cross_ix = min(
+                        [self.limit_cross_ixs.get(i, np.inf) for i in self.active_limit_orders],
+                        default=np.inf
+                    )
+
+                if self.pending_stop_orders:
+                    self.update_stop_cross_index(end)
+
+                if end >= self.stop_cross_ix:
+                    self.cross_stop_order()
+                    self.stop_cross_ix = min(
+                        [self.stop_cross_ixs.get(i, np.inf) for i in self.active_stop_orders],
+                        default=np.inf
+                    )
+
+                self.strategy.on_bar(bar)
+            except Exception:
+                self.output("触发异常，回测终止")
+                self.output(traceback.format_exc())
+                break
+
+            end += 1
+        else:
+            self.output("历史数据回放结束")
+
+        self.update_daily_closes(ix, end)
+
+    def update_limit_cross_index(self, ix: int):
+        """
+        Search cross index of pending limit orders since bar of ix.
+        """
+        # Limit orders are pushed with status "not traded" on the first bar
+        self.limit_cross_ix = min(self.limit_cross_ix, ix)
+
+        for order in self.pending_limit_orders:
+            if order.direction == Direction.LONG:
+                cross_ix = search_cross_index(
+                    self.history_arrays["low_price"], ix, order.price, True, True
+                )
+            else:
+                cross_ix = search_cross_index(
+                    self.history_arrays["high_price"], ix, order.price, False, True
+                )
+            self.limit_cross_ixs[order.vt_orderid] = cross_ix
+
+        self.pending_limit_orders.clear()
+
+    def update_stop_cross_index(self, ix: int):
+        """
+        Search cross index of pending stop orders since bar of ix.
+        """
+        for stop_order in self.pending_stop_orders:
+            if stop_order.direction == Direction.LONG:
+                cross_ix = search_cross_index(
+                    self.history_arrays["high_price"], ix, stop_order.price, False, False
+                )
+            else:
+                cross_ix = search_cross_index(
+                    self.history_arrays["low_price"], ix, stop_order.price, True, False
+                )
+            self.stop_cross_ixs[stop_order.stop_orderid] = cross_ix
+            self.stop_cross_ix = min(self.stop_cross_ix, cross_ix)
+
+        self.pending_stop_orders.clear()
+
+    def update_daily_closes(self, start: int, end: int):
+        """
+        Update close price of each day with the last bar of the day
+        in history arrays between [start, end).
+        """
+        dates = self.history_arrays["date"][start:end]
+        if not len(dates):
+            return
+
+        close_prices = self.history_arrays["close_price"][start:end]
+
+        # History data is sorted, so last bar of each day is found
+        # where date of next bar is different.
+        last_ix = np.flatnonzero(dates[1:] != dates[:-1])
+        last_ix = np.append(last_ix, len(dates) - 1)
+
+        for d, price in zip(
+            dates[last_ix].tolist(),
+            close_prices[last_ix].tolist()
+        ):
+            daily_result = self.daily_results.get(d, None)
+            if daily_result:
+                daily_result.close_price = price
+            else:
+                self.daily_results[d] = DailyResult(d, price)
+
     def calculate_result(self):
         """"""
         self.output("开始计算逐日盯市盈亏")
@@ -323,31 +555,17 @@ class BacktestingEngine:
             daily_result = self.daily_results[d]
             daily_result.add_trade(trade)
 
-        # Calculate daily result by iteration.
-        pre_close = 0
-        start_pos = 0
-
-        for daily_result in self.daily_results.values():
-            daily_result.calculate_pnl(
-                pre_close,
-                start_pos,
-                self.size,
-                self.rate,
-                self.slippage,
-                self.inverse
-            )
-
-            pre_close = daily_result.close_price
-            start_pos = daily_result.end_pos
+        # Calculate daily result with array operations.
+        results = calculate_daily_pnl(
+            list(self.daily_results.values()),
+            self.size,
+            self.rate,
+            self.slippage,
+            self.inverse
+        )
 
         # Generate dataframe
-        results = defaultdict(list)
-
-        for daily_result in self.daily_results.values():
-            for key, value in daily_result.__dict__.items():
-                results[key].append(value)
-
-        self.daily_df = DataFrame.from_dict(results).set_index("date")
+        self.daily_df = DataFrame(results).set_index("date")
 
         self.output("逐日盯市盈亏计算完成")
         return self.daily_df
@@ -549,7 +767,86 @@ class BacktestingEngine:
 
         plt.show()
 
-    def run_optimization(self, optimization_setting: OptimizationSetting, output=True):
+    def get_optimization_config(self, target_name: str) -> dict:
+        """
+        Get strategy and backtesting config used by every optimization run.
+        Streaming is not included, since all history data is loaded and
+        shared with workers for optimization.
+        """
+        if not self.end:
+            self.end = datetime.now()
+
+        config = {
+            "target_name": target_name,
+            "strategy_class": self.strategy_class,
+            "vt_symbol": self.vt_symbol,
+            "interval": self.interval,
+            "start": self.start,
+            "rate": self.rate,
+            "slippage": self.slippage,
+            "size": self.size,
+            "pricetick": self.pricetick,
+            "capital": self.capital,
+            "end": self.end,
+            "mode": self.mode,
+            "inverse": self.inverse,
+            "vectorized": self.vectorized,
+            "matching_model": self.matching_model
+        }
+        return config
+
+    def load_optimization_data(self) -> bool:
+        """
+        Load history data for optimization if not loaded yet, return
+        whether data is available.
+        """
+        # Reload if data was loaded with other parameters. Data assigned
+        # to history_data directly is used as it is.
+        if (
+            not self.history_data
+            or (
+                self.history_data_key
+                and self.history_data_key != self.get_history_data_key()
+            )
+        ):
+            # Optimization workers share all data loaded, so streaming
+            # mode is not used.
+            if self.streaming:
+                self.output("参数优化不支持流式回放，加载全部历史数据")
+
+            self.load_data(full=True)
+
+        if not self.history_data:
+            self.output("历史数据为空，无法进行优化")
+            return False
+
+        return True
+
+    def create_optimization_pool(self):
+        """
+        Load history data once, publish it to worker processes with a
+        memory-mapped file, and then create process pool.
+        """
+        if not self.load_optimization_data():
+            return None, None
+
+        path, tz = publish_history_data(self.history_data, self.mode)
+
+        # Force to use spawn method to create new process (instead of fork on Linux)
+        ctx = multiprocessing.get_context("spawn")
+        pool = ctx.Pool(
+            multiprocessing.cpu_count(),
+            initializer=init_optimization_worker,
+            initargs=(path, tz, self.symbol, self.exchange, self.interval, self.mode)
+        )
+        return pool, path
+
+    def run_optimization(
+        self,
+        optimization_setting: OptimizationSetting,
+        output=True,
+        use_cache: bool = False
+    ):
         """"""
         # Get optimization setting and target
         settings = optimization_setting.generate_setting()
@@ -563,36 +860,53 @@ class BacktestingEngine:
             self.output("优化目标未设置，请检查")
             return
 
-        # Use multiprocessing pool for running backtesting with different setting
-        # Force to use spawn method to create new process (instead of fork on Linux)
-        ctx = multiprocessing.get_context("spawn")
-        pool = ctx.Pool(multiprocessing.cpu_count())
+        config = self.get_optimization_config(target_name)
 
-        results = []
-        for setting in settings:
-            result = (pool.apply_async(optimize, (
-                target_name,
-                self.strategy_class,
-                setting,
-                self.vt_symbol,
-                self.interval,
-                self.start,
-                self.rate,
-                self.slippage,
-                self.size,
-                self.pricetick,
-                self.capital,
-                self.end,
-                self.mode,
-                self.inverse
-            )))
-            results.append(result)
-
-        pool.close()
-        pool.join()
+        # Skip settings already evaluated and saved in result cache
+        store = None
+        if use_cache:
+            if not self.load_optimization_data():
+                return
+
+            checksum = get_history_checksum(self.history_data, self.mode)
+            store = OptimizationResultStore(config, checksum)
+            cached_values = store.get_many(settings)
+        else:
+            cached_values = [None] * len(settings)
+
+        result_values = []
+        pending_settings = []
+
+        for setting, statistics in zip(settings, cached_values):
+            if statistics:
+                result_values.append((str(setting), statistics[target_name], statistics))
+            else:
+                pending_settings.append(setting)
+
+        if result_values:
+            self.output(f"从缓存读取优化结果：{len(result_values)}个")
+
+        # Use multiprocessing pool for running backtesting with different setting,
+        # results are saved into cache as soon as completed
+        if pending_settings:
+            pool, path = self.create_optimization_pool()
+            if not pool:
+                return
+
+            try:
+                func = partial(optimize_setting, config)
+
+                for setting, statistics in pool.imap_unordered(func, pending_settings):
+                    if store:
+                        store.put(setting, statistics)
+
+                    result_values.append((str(setting), statistics[target_name], statistics))
+            finally:
+                pool.close()
+                pool.join()
+                os.remove(path)
 
         # Sort results and output
-        result_values = [result.get() for result in results]
         result_values.sort(reverse=True, key=lambda result: result[1])
 
         if output:
@@ -602,7 +916,14 @@ class BacktestingEngine:
 
         return result_values
 
-    def run_ga_optimization(self, optimization_setting: OptimizationSetting, population_size=100, ngen_size=30, output=True):
+    def run_ga_optimization(
+        self,
+        optimization_setting: OptimizationSetting,
+        population_size=100,
+        ngen_size=30,
+        output=True,
+        use_cache: bool = False
+    ):
         """"""
         # Get optimization setting and target
         settings = optimization_setting.generate_setting_ga()
@@ -630,36 +951,20 @@ class BacktestingEngine:
                     individual[i] = paramlist[i]
             return individual,
 
-        # Create ga object function
-        global ga_target_name
-        global ga_strategy_class
-        global ga_setting
-        global ga_vt_symbol
-        global ga_interval
-        global ga_start
-        global ga_rate
-        global ga_slippage
-        global ga_size
-        global ga_pricetick
-        global ga_capital
-        global ga_end
-        global ga_mode
-        global ga_inverse
-
-        ga_target_name = target_name
-        ga_strategy_class = self.strategy_class
-        ga_setting = settings[0]
-        ga_vt_symbol = self.vt_symbol
-        ga_interval = self.interval
-        ga_start = self.start
-        ga_rate = self.rate
-        ga_slippage = self.slippage
-        ga_size = self.size
-        ga_pricetick = self.pricetick
-        ga_capital = self.capital
-        ga_end = self.end
-        ga_mode = self.mode
-        ga_inverse = self.inverse
+        # Strategy and backtesting config passed to every evaluation
+        config = self.get_optimization_config(target_name)
+
+        # Use multiprocessing pool for evaluating individuals
+        pool, path = self.create_optimization_pool()
+        if not pool:
+            return
+
+        store = None
+        if use_cache:
+            checksum = get_history_checksum(self.history_data, self.mode)
+            store = OptimizationResultStore(config, checksum)
+
+        evaluator = GaEvaluator(pool, self.output, target_name, store)
 
         # Set up genetic algorithem
         toolbox = base.Toolbox()
@@ -667,8 +972,9 @@ class BacktestingEngine:
         toolbox.register("population", tools.initRepeat, list, toolbox.individual)
         toolbox.register("mate", tools.cxTwoPoint)
         toolbox.register("mutate", mutate_individual, indpb=1)
-        toolbox.register("evaluate", ga_optimize)
+        toolbox.register("evaluate", ga_optimize, config)
         toolbox.register("select", tools.selNSGA2)
+        toolbox.register("map", evaluator.map)
 
         total_size = len(settings)
         pop_size = population_size                      # number of individuals in each generation
@@ -689,10 +995,6 @@ class BacktestingEngine:
         stats.register("min", np.min, axis=0)
         stats.register("max", np.max, axis=0)
 
-        # Multiprocessing is not supported yet.
-        # pool = multiprocessing.Pool(multiprocessing.cpu_count())
-        # toolbox.register("map", pool.map)
-
         # Run ga optimization
         self.output(f"参数优化空间：{total_size}")
         self.output(f"每代族群总数：{pop_size}")
@@ -703,17 +1005,22 @@ class BacktestingEngine:
 
         start = time()
 
-        algorithms.eaMuPlusLambda(
-            pop,
-            toolbox,
-            mu,
-            lambda_,
-            cxpb,
-            mutpb,
-            ngen,
-            stats,
-            halloffame=hof
-        )
+        try:
+            algorithms.eaMuPlusLambda(
+                pop,
+                toolbox,
+                mu,
+                lambda_,
+                cxpb,
+                mutpb,
+                ngen,
+                stats,
+                halloffame=hof
+            )
+        finally:
+            pool.close()
+            pool.join()
+            os.remove(path)
 
         end = time()
         cost = int((end - start))
@@ -725,8 +1032,8 @@ class BacktestingEngine:
 
         for parameter_values in hof:
             setting = dict(parameter_values)
-            target_value = ga_optimize(parameter_values)[0]
-            results.append((setting, target_value, {}))
+            statistics = evaluator.cache[tuple(parameter_values)]
+            results.append((setting, statistics[target_name], statistics))
 
         return results
 
@@ -766,6 +1073,10 @@ class BacktestingEngine:
         """
         Cross limit order with last bar/tick data.
         """
+        if self.mode == BacktestingMode.TICK and self.matching_model:
+            self.match_limit_order()
+            return
+
         if self.mode == BacktestingMode.BAR:
             long_cross_price = self.bar.low_price
             short_cross_price = self.bar.high_price
@@ -834,6 +1145,63 @@ class BacktestingEngine:
 
             self.trades[trade.vt_tradeid] = trade
 
+    def match_limit_order(self):
+        """
+        Match limit order with order book of last tick by matching model,
+        which supports partial fill.
+        """
+        for order in list(self.active_limit_orders.values()):
+            # Push order update with status "not traded" (pending).
+            if order.status == Status.SUBMITTING:
+                order.status = Status.NOTTRADED
+                self.strategy.on_order(order)
+
+        fills = self.matching_model.match(self.tick)
+
+        for vt_orderid, trade_price, volume in fills:
+            # Order may be cancelled in callback of previous fill
+            order = self.active_limit_orders.get(vt_orderid, None)
+            if not order:
+                self.matching_model.cancel_order(vt_orderid)
+                continue
+
+            # Push order udpate with status "part traded" or "all traded".
+            order.traded += volume
+
+            if order.traded >= order.volume:
+                order.status = Status.ALLTRADED
+                self.active_limit_orders.pop(vt_orderid)
+            else:
+                order.status = Status.PARTTRADED
+
+            self.strategy.on_order(order)
+
+            # Push trade update
+            self.trade_count += 1
+
+            if order.direction == Direction.LONG:
+                pos_change = volume
+            else:
+                pos_change = -volume
+
+            trade = TradeData(
+                symbol=order.symbol,
+                exchange=order.exchange,
+                orderid=order.orderid,
+                tradeid=str(self.trade_count),
+                direction=order.direction,
+                offset=order.offset,
+                price=trade_price,
+                volume=volume,
+                datetime=self.datetime,
+                gateway_name=self.gateway_name,
+            )
+
+            self.strategy.pos += pos_change
+            self.strategy.on_trade(trade)
+
+            self.trades[trade.vt_tradeid] = trade
+
     def cross_stop_order(self):
         """
         Cross stop order with last bar/tick data.
@@ -979,6 +1347,9 @@ class BacktestingEngine:
         self.active_stop_orders[stop_order.stop_orderid] = stop_order
         self.stop_orders[stop_order.stop_orderid] = stop_order
 
+        if self.vectorized:
+            self.pending_stop_orders.append(stop_order)
+
         return stop_order.stop_orderid
 
     def send_limit_order(
@@ -1007,6 +1378,15 @@ class BacktestingEngine:
         self.active_limit_orders[order.vt_orderid] = order
         self.limit_orders[order.vt_orderid] = order
 
+        if self.vectorized:
+            self.pending_limit_orders.append(order)
+
+        # Matching model is only used in tick mode
+        if self.mode == BacktestingMode.TICK and self.matching_model:
+            self.matching_model.add_order(
+                order.vt_orderid, direction, price, volume, self.datetime
+            )
+
         return order.vt_orderid
 
     def cancel_order(self, strategy: CtaTemplate, vt_orderid: str):
@@ -1033,6 +1413,9 @@ class BacktestingEngine:
             return
         order = self.active_limit_orders.pop(vt_orderid)
 
+        if self.matching_model:
+            self.matching_model.cancel_order(vt_orderid)
+
         order.status = Status.CANCELLED
         self.strategy.on_order(order)
 
@@ -1198,6 +1581,169 @@ class DailyResult:
         self.net_pnl = self.total_pnl - self.commission - self.slippage
 
 
+def generate_bar_arrays(bars: List[BarData]) -> Dict[str, np.ndarray]:
+    """
+    Convert list of bar data into numpy arrays of each field.
+    """
+    ordinals = np.array([bar.datetime.toordinal() for bar in bars], dtype="int64")
+    dates = (ordinals - EPOCH_ORDINAL).astype("datetime64[D]")
+
+    arrays = {
+        "date": dates,
+        "open_price": np.array([bar.open_price for bar in bars], dtype=float),
+        "high_price": np.array([bar.high_price for bar in bars], dtype=float),
+        "low_price": np.array([bar.low_price for bar in bars], dtype=float),
+        "close_price": np.array([bar.close_price for bar in bars], dtype=float),
+        "volume": np.array([bar.volume for bar in bars], dtype=float),
+    }
+    return arrays
+
+
+def search_cross_index(
+    array: np.ndarray,
+    start: int,
+    price: float,
+    below: bool,
+    positive: bool
+) -> int:
+    """
+    Search index of the first value in array since start, which is below
+    (or above) the price. Length of array is returned if not found.
+    """
+    count = len(array)
+    step = 64
+
+    # Expand search range step by step, since most orders
+    # are crossed within a few bars after sent.
+    while start < count:
+        end = min(start + step, count)
+        data = array[start:end]
+
+        if below:
+            mask = data <= price
+        else:
+            mask = data >= price
+
+        if positive:
+            mask &= data > 0
+
+        ix = mask.argmax()
+        if mask[ix]:
+            return start + int(ix)
+
+        start = end
+        step *= 4
+
+    return count
+
+
+def calculate_daily_pnl(
+    daily_results: List[DailyResult],
+    size: int,
+    rate: float,
+    slippage: float,
+    inverse: bool
+):
+    """
+    Calculate pnl of all daily results with array operations, which
+    gives the same result as calling DailyResult.calculate_pnl day by day.
+    Return dict of daily field values used for generating DataFrame.
+    """
+    day_count = len(daily_results)
+    day_index = {}
+    close_prices = []
+
+    for ix, daily_result in enumerate(daily_results):
+        day_index[daily_result.date] = ix
+        close_prices.append(daily_result.close_price)
+
+    trade_days = []
+    trade_prices = []
+    trade_volumes = []
+    trade_directions = []
+
+    for daily_result in daily_results:
+        for trade in daily_result.trades:
+            trade_days.append(day_index[daily_result.date])
+            trade_prices.append(trade.price)
+            trade_volumes.append(trade.volume)
+            trade_directions.append(trade.direction == Direction.LONG)
+
+    close_array = np.array(close_prices, dtype=float)
+    trade_days = np.array(trade_days, dtype=int)
+    trade_prices = np.array(trade_prices, dtype=float)
+    trade_volumes = np.array(trade_volumes)
+    pos_changes = np.where(trade_directions, trade_volumes, -trade_volumes)
+
+    # If no pre_close provided on the first day,
+    # use value 1 to avoid zero division error
+    pre_closes = np.append(0, close_array[:-1])
+    pre_closes[pre_closes == 0] = 1
+
+    # Position of each day is accumulated trade by trade
+    trade_counts = np.bincount(trade_days, minlength=day_count)
+    pos_array = np.cumsum(pos_changes)
+    trade_totals = np.cumsum(trade_counts)
+
+    end_poses = np.zeros(day_count, dtype=pos_array.dtype)
+    traded = trade_totals > 0
+    end_poses[traded] = pos_array[trade_totals[traded] - 1]
+    start_poses = np.append(0, end_poses[:-1])
+
+    # Trading pnl is the pnl from new trade during the day
+    trade_closes = close_array[trade_days]
+
+    if not inverse:     # For normal contract
+        holding_pnls = start_poses * (close_array - pre_closes) * size
+        turnovers = trade_volumes * size * trade_prices
+        trading_pnls = pos_changes * (trade_closes - trade_prices) * size
+        slippages = trade_volumes * size * slippage
+    else:               # For crypto currency inverse contract
+        holding_pnls = start_poses * (1 / pre_closes - 1 / close_array) * size
+        turnovers = trade_volumes * size / trade_prices
+        trading_pnls = pos_changes * (1 / trade_prices - 1 / trade_closes) * size
+        slippages = trade_volumes * size * slippage / (trade_prices ** 2)
+
+    commissions = turnovers * rate
+
+    # Sum up values of trades in the same day
+    turnovers = np.bincount(trade_days, turnovers, day_count)
+    commissions = np.bincount(trade_days, commissions, day_count)
+    slippages = np.bincount(trade_days, slippages, day_count)
+    trading_pnls = np.bincount(trade_days, trading_pnls, day_count)
+
+    # Net pnl takes account of commission and slippage cost
+    total_pnls = trading_pnls + holding_pnls
+    net_pnls = total_pnls - commissions - slippages
+
+    results = {
+        "date": [daily_result.date for daily_result in daily_results],
+        "close_price": close_array,
+        "pre_close": pre_closes,
+        "trades": [daily_result.trades for daily_result in daily_results],
+        "trade_count": trade_counts,
+        "start_pos": start_poses,
+        "end_pos": end_poses,
+        "turnover": turnovers,
+        "commission": commissions,
+        "slippage": slippages,
+        "trading_pnl": trading_pnls,
+        "holding_pnl": holding_pnls,
+        "total_pnl": total_pnls,
+        "net_pnl": net_pnls,
+    }
+
+    # Keep daily result objects updated for get_all_daily_results
+    for key, values in results.items():
+        if isinstance(values, np.ndarray):
+            values = values.tolist()
+
+        for daily_result, value in zip(daily_results, values):
+            setattr(daily_result, key, value)
+
+    return results
+
+
 def optimize(
     target_name: str,
     strategy_class: CtaTemplate,
@@ -1212,7 +1758,9 @@ def optimize(
     capital: int,
     end: datetime,
     mode: BacktestingMode,
-    inverse: bool
+    inverse: bool,
+    vectorized: bool = False,
+    matching_model: TickMatchingModel = None
 ):
     """
     Function for running in multiprocessing.pool
@@ -1230,11 +1778,20 @@ def optimize(
         capital=capital,
         end=end,
         mode=mode,
-        inverse=inverse
+        inverse=inverse,
+        vectorized=vectorized,
+        matching_model=matching_model
     )
 
     engine.add_strategy(strategy_class, setting)
-    engine.load_data()
+
+    # Use history data shared by optimization if available
+    if worker_history_data:
+        engine.history_data = worker_history_data
+        engine.history_arrays = worker_history_arrays
+    else:
+        engine.load_data()
+
     engine.run_backtesting()
     engine.calculate_result()
     statistics = engine.calculate_statistics(output=False)
@@ -1243,33 +1800,370 @@ def optimize(
     return (str(setting), target_value, statistics)
 
 
-@lru_cache(maxsize=1000000)
-def _ga_optimize(parameter_values: tuple):
-    """"""
-    setting = dict(parameter_values)
+def generate_history_array(history_data: list, mode: BacktestingMode) -> np.ndarray:
+    """
+    Convert history data into columnar array, datetime is saved without
+    timezone.
+    """
+    if mode == BacktestingMode.BAR:
+        rows = [
+            (
+                bar.datetime.replace(tzinfo=None),
+                bar.volume,
+                bar.open_interest,
+                bar.open_price,
+                bar.high_price,
+                bar.low_price,
+                bar.close_price
+            )
+            for bar in history_data
+        ]
+        array = rows_to_array(rows, BAR_DTYPE)
+    else:
+        rows = [
+            (tick.datetime.replace(tzinfo=None),)
+            + tuple(getattr(tick, name) for name in TICK_DTYPE.names[1:])
+            for tick in history_data
+        ]
+        array = rows_to_array(rows, TICK_DTYPE)
+
+    return array
+
+
+def get_history_checksum(history_data: list, mode: BacktestingMode) -> str:
+    """
+    Get checksum of all fields of history data.
+    """
+    array = generate_history_array(history_data, mode)
+    return hashlib.md5(array.tobytes()).hexdigest()
+
 
-    result = optimize(
-        ga_target_name,
-        ga_strategy_class,
-        setting,
-        ga_vt_symbol,
-        ga_interval,
-        ga_start,
-        ga_rate,
-        ga_slippage,
-        ga_size,
-        ga_pricetick,
-        ga_capital,
-        ga_end,
-        ga_mode,
-        ga_inverse
+def publish_history_data(history_data: list, mode: BacktestingMode):
+    """
+    Save history data into a temp columnar file, which is memory-mapped
+    by optimization worker processes. Return file path and timezone.
+    """
+    tz = history_data[0].datetime.tzinfo
+    array = generate_history_array(history_data, mode)
+
+    fd, path = tempfile.mkstemp(suffix=".npy", prefix="vnpy_history_")
+    with os.fdopen(fd, "wb") as f:
+        np.save(f, array)
+
+    return path, tz
+
+
+def init_optimization_worker(
+    path: str,
+    tz: tzinfo,
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    mode: BacktestingMode
+):
+    """
+    Attach history data file published by parent process. Array of the
+    file is shared by all worker processes without copy, and data objects
+    are created from it chunk by chunk during replay.
+    """
+    global worker_history_data, worker_history_arrays
+
+    array = np.load(path, mmap_mode="r")
+
+    worker_history_data = MappedHistoryData(
+        array, tz, symbol, exchange, interval, mode
     )
-    return (result[1],)
 
+    if mode == BacktestingMode.BAR:
+        worker_history_arrays = worker_history_data.get_bar_arrays()
+    else:
+        worker_history_arrays = None
 
-def ga_optimize(parameter_values: list):
-    """"""
-    return _ga_optimize(tuple(parameter_values))
+
+class MappedHistoryData:
+    """
+    Read-only sequence of bar/tick data backed by memory-mapped array of
+    history data file. Data objects are only created for the chunk being
+    replayed, so memory of each worker process does not grow with length
+    of history data.
+    """
+
+    chunk_size = 10000
+
+    def __init__(
+        self,
+        array: np.ndarray,
+        tz: tzinfo,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        mode: BacktestingMode
+    ):
+        """"""
+        self.array: np.ndarray = array
+        self.tz: tzinfo = tz
+        self.symbol: str = symbol
+        self.exchange: Exchange = exchange
+        self.interval: Interval = interval
+        self.mode: BacktestingMode = mode
+
+        if mode == BacktestingMode.BAR:
+            self.names = BAR_DTYPE.names[1:]
+            self.data_class = BarData
+            self.kwargs = {"interval": interval}
+        else:
+            self.names = TICK_DTYPE.names[1:]
+            self.data_class = TickData
+            self.kwargs = {}
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.array)
+
+    def __iter__(self):
+        """"""
+        for start in range(0, len(self.array), self.chunk_size):
+            chunk = self.array[start:start + self.chunk_size]
+            yield from self.create_data(chunk)
+
+    def __getitem__(self, index):
+        """
+        Return data object of index, or view of data within slice.
+        """
+        if isinstance(index, slice):
+            return MappedHistoryData(
+                self.array[index],
+                self.tz,
+                self.symbol,
+                self.exchange,
+                self.interval,
+                self.mode
+            )
+
+        # Convert negative index and check range
+        index = range(len(self.array))[index]
+        return self.create_data(self.array[index:index + 1])[0]
+
+    def create_data(self, array: np.ndarray) -> list:
+        """
+        Create data objects from rows of array.
+        """
+        dts = array["datetime"].astype(datetime)
+        columns = [array[name].tolist() for name in self.names]
+
+        return [
+            self.data_class(
+                symbol=self.symbol,
+                exchange=self.exchange,
+                datetime=dt.replace(tzinfo=self.tz),
+                gateway_name="DB",
+                **self.kwargs,
+                **dict(zip(self.names, values))
+            )
+            for dt, *values in zip(dts, *columns)
+        ]
+
+    def get_bar_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Get arrays of each field for vectorized replay, price arrays are
+        views of memory-mapped array.
+        """
+        array = self.array
+
+        return {
+            "date": array["datetime"].astype("datetime64[D]"),
+            "open_price": array["open_price"],
+            "high_price": array["high_price"],
+            "low_price": array["low_price"],
+            "close_price": array["close_price"],
+            "volume": array["volume"],
+        }
+
+
+def optimize_setting(config: dict, setting: dict) -> tuple:
+    """
+    Run backtesting of one setting with explicit config, return the
+    setting together with statistics.
+    """
+    result = optimize(setting=setting, **config)
+    return setting, result[2]
+
+
+def ga_optimize(config: dict, parameter_values: list) -> dict:
+    """
+    Evaluate one individual with explicit backtesting config.
+    """
+    setting = dict(parameter_values)
+    result = optimize(setting=setting, **config)
+    return result[2]
+
+
+class GaEvaluator:
+    """
+    Map function of deap toolbox, which evaluates individuals with process
+    pool. Statistics are cached in parent process across generations (and
+    in result store if provided), so same individual is never evaluated
+    twice by any worker.
+    """
+
+    def __init__(
+        self,
+        pool,
+        output: Callable,
+        target_name: str,
+        store: "OptimizationResultStore" = None
+    ):
+        """"""
+        self.pool = pool
+        self.output = output
+        self.target_name = target_name
+        self.store = store
+
+        self.cache: Dict[tuple, dict] = {}
+        self.generation: int = 0
+
+    def map(self, func: Callable, individuals: list) -> list:
+        """"""
+        start = time()
+
+        keys = [tuple(individual) for individual in individuals]
+        new_keys = [key for key in dict.fromkeys(keys) if key not in self.cache]
+
+        if self.store:
+            cached_values = self.store.get_many([dict(key) for key in new_keys])
+
+            stored_count = 0
+            for key, statistics in zip(new_keys, cached_values):
+                if statistics:
+                    self.cache[key] = statistics
+                    stored_count += 1
+
+            if stored_count:
+                self.output(f"从缓存读取优化结果：{stored_count}个")
+
+            new_keys = [key for key in new_keys if key not in self.cache]
+
+        for key, statistics in zip(new_keys, self.pool.imap(func, new_keys)):
+            self.cache[key] = statistics
+
+            if self.store:
+                self.store.put(dict(key), statistics)
+
+        cost = time() - start
+        speed = len(new_keys) / cost if cost else 0
+
+        self.output(
+            f"第{self.generation}代评估完成，耗时{cost:.2f}秒，"
+            f"新评估{len(new_keys)}个，缓存命中{len(keys) - len(new_keys)}个，"
+            f"评估速度{speed:.2f}个/秒"
+        )
+        self.generation += 1
+
+        return [(self.cache[key][self.target_name],) for key in keys]
+
+
+class OptimizationResultStore:
+    """
+    On-disk store of optimization statistics, keyed by strategy class
+    source, backtesting engine version, setting, vt_symbol, interval,
+    checksum of history data and cost parameters.
+
+    Results are not reused once any history data is added or corrected,
+    or code of strategy or backtesting engine is changed. Store file is
+    opened with file lock for each read and write, so that it can be
+    shared by optimizations running in different processes.
+    """
+
+    def __init__(self, config: dict, data_checksum: str):
+        """"""
+        strategy_class = config["strategy_class"]
+        try:
+            source = inspect.getsource(strategy_class)
+        except (OSError, TypeError):
+            source = strategy_class.__name__
+
+        source_hash = hashlib.md5(source.encode("utf-8")).hexdigest()
+
+        self.prefix: str = json.dumps(
+            [
+                source_hash,
+                get_engine_version(),
+                config["vt_symbol"],
+                config["interval"].value,
+                str(config["start"]),
+                data_checksum,
+                config["rate"],
+                config["slippage"],
+                config["size"],
+                config["pricetick"],
+                config["capital"],
+                config["mode"].value,
+                config["inverse"],
+                repr(config["matching_model"])
+            ]
+        )
+
+        folder = get_folder_path("optimization")
+        self.path: str = str(folder.joinpath("result_cache"))
+        self.lock_path: Path = folder.joinpath("result_cache.lock")
+
+    def get_key(self, setting: dict) -> str:
+        """"""
+        text = self.prefix + json.dumps(sorted(setting.items()), default=str)
+        return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, settings: List[dict]) -> List[Optional[dict]]:
+        """
+        Get statistics of each setting, None if not found.
+        """
+        with lock_file(self.lock_path), shelve.open(self.path) as db:
+            return [db.get(self.get_key(setting), None) for setting in settings]
+
+    def put(self, setting: dict, statistics: dict) -> None:
+        """
+        Save statistics of setting and flush to disk immediately.
+        """
+        with lock_file(self.lock_path), shelve.open(self.path) as db:
+            db[self.get_key(setting)] = statistics
+
+
+@lru_cache(maxsize=1)
+def get_engine_version() -> str:
+    """
+    Get version of backtesting engine, which includes checksum of this
+    module file for changes not released yet.
+    """
+    data = Path(__file__).read_bytes()
+    return f"{vnpy.__version__}-{hashlib.md5(data).hexdigest()}"
+
+
+@contextmanager
+def lock_file(path: Path):
+    """
+    Hold exclusive lock of file, which blocks other processes.
+    """
+    with open(path, "a") as f:
+        f.seek(0)
+
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            # Locking is retried, since msvcrt gives up after 10 seconds
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass
+
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
 
 
 @lru_cache(maxsize=999)
@@ -1299,17 +2193,6 @@ def load_tick_data(
     )
 
 
-# GA related global value
-ga_end = None
-ga_mode = None
-ga_target_name = None
-ga_strategy_class = None
-ga_setting = None
-ga_vt_symbol = None
-ga_interval = None
-ga_start = None
-ga_rate = None
-ga_slippage = None
-ga_size = None
-ga_pricetick = None
-ga_capital = None
+# History data shared in optimization worker process
+worker_history_data = None
+worker_history_arrays = None
@@ -9,6 +9,7 @@ from typing import Any, Callable
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor
 from copy import copy
+from threading import RLock
 from tzlocal import get_localzone
 
 from vnpy.event import Event, EventEngine
@@ -101,6 +102,12 @@ class CtaEngine(BaseEngine):
 
         self.offset_converter = OffsetConverter(self.main_engine)
 
+        # Events may be processed by different threads if lanes of event
+        # engine are enabled, e.g. tick and order events of the same
+        # strategy. Lock is held when processing events, so that strategy
+        # callbacks and engine data are still used by one thread at a time.
+        self.event_lock = RLock()
+
     def init_engine(self):
         """
         """
@@ -148,85 +155,89 @@ class CtaEngine(BaseEngine):
 
     def process_tick_event(self, event: Event):
         """"""
-        tick = event.data
+        with self.event_lock:
+            tick = event.data
 
-        strategies = self.symbol_strategy_map[tick.vt_symbol]
-        if not strategies:
-            return
+            strategies = self.symbol_strategy_map[tick.vt_symbol]
+            if not strategies:
+                return
 
-        self.check_stop_order(tick)
+            self.check_stop_order(tick)
 
-        for strategy in strategies:
-            if strategy.inited:
-                self.call_strategy_func(strategy, strategy.on_tick, tick)
+            for strategy in strategies:
+                if strategy.inited:
+                    self.call_strategy_func(strategy, strategy.on_tick, tick)
 
     def process_order_event(self, event: Event):
         """"""
-        order = event.data
-
-        self.offset_converter.update_order(order)
-
-        strategy = self.orderid_strategy_map.get(order.vt_orderid, None)
-        if not strategy:
-            return
-
-        # Remove vt_orderid if order is no longer active.
-        vt_orderids = self.strategy_orderid_map[strategy.strategy_name]
-        if order.vt_orderid in vt_orderids and not order.is_active():
-            vt_orderids.remove(order.vt_orderid)
-
-        # For server stop order, call strategy on_stop_order function
-        if order.type == OrderType.STOP:
-            so = StopOrder(
-                vt_symbol=order.vt_symbol,
-                direction=order.direction,
-                offset=order.offset,
-                price=order.price,
-                volume=order.volume,
-                stop_orderid=order.vt_orderid,
-                strategy_name=strategy.strategy_name,
-                status=STOP_STATUS_MAP[order.status],
-                vt_orderids=[order.vt_orderid],
-            )
-            self.call_strategy_func(strategy, strategy.on_stop_order, so)
+        with self.event_lock:
+            order = event.data
+
+            self.offset_converter.update_order(order)
+
+            strategy = self.orderid_strategy_map.get(order.vt_orderid, None)
+            if not strategy:
+                return
+
+            # Remove vt_orderid if order is no longer active.
+            vt_orderids = self.strategy_orderid_map[strategy.strategy_name]
+            if order.vt_orderid in vt_orderids and not order.is_active():
+                vt_orderids.remove(order.vt_orderid)
+
+            # For server stop order, call strategy on_stop_order function
+            if order.type == OrderType.STOP:
+                so = StopOrder(
+                    vt_symbol=order.vt_symbol,
+                    direction=order.direction,
+                    offset=order.offset,
+                    price=order.price,
+                    volume=order.volume,
+                    stop_orderid=order.vt_orderid,
+                    strategy_name=strategy.strategy_name,
+                    status=STOP_STATUS_MAP[order.status],
+                    vt_orderids=[order.vt_orderid],
+                )
+                self.call_strategy_func(strategy, strategy.on_stop_order, so)
 
-        # Call strategy on_order function
-        self.call_strategy_func(strategy, strategy.on_order, order)
+            # Call strategy on_order function
+            self.call_strategy_func(strategy, strategy.on_order, order)
 
     def process_trade_event(self, event: Event):
         """"""
-        trade = event.data
+        with self.event_lock:
+            trade = event.data
 
-        # Filter duplicate trade push
-        if trade.vt_tradeid in self.vt_tradeids:
-            return
-        self.vt_tradeids.add(trade.vt_tradeid)
+            # Filter duplicate trade push
+            if trade.vt_tradeid in self.vt_tradeids:
+                return
+            self.vt_tradeids.add(trade.vt_tradeid)
 
-        self.offset_converter.update_trade(trade)
+            self.offset_converter.update_trade(trade)
 
-        strategy = self.orderid_strategy_map.get(trade.vt_orderid, None)
-        if not strategy:
-            return
+            strategy = self.orderid_strategy_map.get(trade.vt_orderid, None)
+            if not strategy:
+                return
 
-        # Update strategy pos before calling on_trade method
-        if trade.direction == Direction.LONG:
-            strategy.pos += trade.volume
-        else:
-            strategy.pos -= trade.volume
+            # Update strategy pos before calling on_trade method
+            if trade.direction == Direction.LONG:
+                strategy.pos += trade.volume
+            else:
+                strategy.pos -= trade.volume
 
-        self.call_strategy_func(strategy, strategy.on_trade, trade)
+            self.call_strategy_func(strategy, strategy.on_trade, trade)
 
-        # Sync strategy variables to data file
-        self.sync_strategy_data(strategy)
+            # Sync strategy variables to data file
+            self.sync_strategy_data(strategy)
 
-        # Update GUI
-        self.put_strategy_event(strategy)
+            # Update GUI
+            self.put_strategy_event(strategy)
 
     def process_position_event(self, event: Event):
         """"""
-        position = event.data
+        with self.event_lock:
+            position = event.data
 
-        self.offset_converter.update_position(position)
+            self.offset_converter.update_position(position)
 
     def check_stop_order(self, tick: TickData):
         """"""
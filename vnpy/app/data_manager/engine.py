@@ -6,7 +6,9 @@ from vnpy.trader.engine import BaseEngine, MainEngine, EventEngine
 from vnpy.trader.constant import Interval, Exchange
 from vnpy.trader.object import BarData, HistoryRequest
 from vnpy.trader.database import database_manager
+from vnpy.trader.database.database import DB_TZ
 from vnpy.trader.rqdata import rqdata_client
+from vnpy.trader.utility import generate_bar_array, generate_window_bar_array
 
 
 APP_NAME = "DataManager"
@@ -78,10 +80,10 @@ class ManagerEngine(BaseEngine):
                 start = bar.datetime
 
         # insert into database
-        database_manager.save_bar_data(bars)
+        speed = database_manager.bulk_save_bar_data(bars)
 
         end = bar.datetime
-        return start, end, count
+        return start, end, count, speed
 
     def output_data_to_csv(
         self,
@@ -181,6 +183,83 @@ class ManagerEngine(BaseEngine):
 
         return count
 
+    def resample_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> int:
+        """
+        Generate 1 minute bar data from tick data in database, and save
+        into database.
+        """
+        ticks = database_manager.load_tick_arrays(symbol, exchange, start, end)
+        arrays = generate_bar_array(ticks)
+
+        return self.save_bar_arrays(arrays, symbol, exchange, Interval.MINUTE)
+
+    def resample_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> int:
+        """
+        Generate 1 hour bar data from 1 minute bar data in database, and
+        save into database.
+        """
+        bars = database_manager.load_bar_arrays(
+            symbol, exchange, Interval.MINUTE, start, end
+        )
+        arrays = generate_window_bar_array(bars, 1, Interval.HOUR)
+
+        return self.save_bar_arrays(arrays, symbol, exchange, Interval.HOUR)
+
+    def save_bar_arrays(
+        self,
+        arrays: Dict,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval
+    ) -> int:
+        """
+        Save bar data generated in batch into database.
+        """
+        # Datetime of loaded data is naive in database timezone
+        dts = arrays["datetime"].astype("datetime64[us]").tolist()
+
+        bars = [
+            BarData(
+                symbol=symbol,
+                exchange=exchange,
+                datetime=DB_TZ.localize(dt),
+                interval=interval,
+                volume=volume,
+                open_interest=open_interest,
+                open_price=open_price,
+                high_price=high_price,
+                low_price=low_price,
+                close_price=close_price,
+                gateway_name="DB",
+            )
+            for dt, volume, open_interest, open_price, high_price, low_price, close_price in zip(
+                dts,
+                arrays["volume"].tolist(),
+                arrays["open_interest"].tolist(),
+                arrays["open_price"].tolist(),
+                arrays["high_price"].tolist(),
+                arrays["low_price"].tolist(),
+                arrays["close_price"].tolist()
+            )
+        ]
+
+        if bars:
+            database_manager.bulk_save_bar_data(bars)
+
+        return len(bars)
+
     def download_bar_data(
         self,
         symbol: str,
@@ -215,7 +215,7 @@ class ManagerWidget(QtWidgets.QWidget):
         open_interest_head = dialog.open_interest_edit.text()
         datetime_format = dialog.format_edit.text()
 
-        start, end, count = self.engine.import_data_from_csv(
+        start, end, count, speed = self.engine.import_data_from_csv(
             file_path,
             symbol,
             exchange,
@@ -238,6 +238,7 @@ class ManagerWidget(QtWidgets.QWidget):
         起始：{start}\n\
         结束：{end}\n\
         总数量：{count}\n\
+        写入速度：{speed:.0f}条/秒\n\
         "
         QtWidgets.QMessageBox.information(self, "载入成功！", msg)
 
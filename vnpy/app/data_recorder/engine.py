@@ -2,8 +2,8 @@
 
 import sys
 from threading import Thread
-from queue import Queue, Empty
-from copy import copy
+from queue import Queue, Empty, Full
+from time import perf_counter
 
 from vnpy.event import Event, EventEngine
 from vnpy.trader.engine import BaseEngine, MainEngine
@@ -14,7 +14,7 @@ from vnpy.trader.object import (
     BarData,
     ContractData
 )
-from vnpy.trader.event import EVENT_TICK, EVENT_CONTRACT
+from vnpy.trader.event import EVENT_TICK, EVENT_CONTRACT, EVENT_TIMER
 from vnpy.trader.utility import load_json, save_json, BarGenerator
 from vnpy.trader.database import database_manager
 from vnpy.app.spread_trading.base import EVENT_SPREAD_DATA, SpreadData
@@ -25,6 +25,7 @@ APP_NAME = "DataRecorder"
 EVENT_RECORDER_LOG = "eRecorderLog"
 EVENT_RECORDER_UPDATE = "eRecorderUpdate"
 EVENT_RECORDER_EXCEPTION = "eRecorderException"
+EVENT_RECORDER_STATS = "eRecorderStats"
 
 
 class RecorderEngine(BaseEngine):
@@ -35,7 +36,6 @@ class RecorderEngine(BaseEngine):
         """"""
         super().__init__(main_engine, event_engine, APP_NAME)
 
-        self.queue = Queue()
         self.thread = Thread(target=self.run)
         self.active = False
 
@@ -43,7 +43,23 @@ class RecorderEngine(BaseEngine):
         self.bar_recordings = {}
         self.bar_generators = {}
 
+        # Batch writing parameters
+        self.batch_size = 1000              # max items of one flush
+        self.flush_interval = 500           # max milliseconds before flush
+        self.queue_size = 100000            # max items waiting in queue
+        self.drop_when_full = True          # drop new item or block when queue is full
+
+        # Writing statistics
+        self.flush_latency = 0
+        self.write_count = 0
+        self.drop_count = 0
+        self.last_write_count = 0
+        self.last_stats_time = perf_counter()
+
         self.load_setting()
+
+        self.queue = Queue(maxsize=self.queue_size)
+
         self.register_event()
         self.start()
         self.put_event()
@@ -54,11 +70,20 @@ class RecorderEngine(BaseEngine):
         self.tick_recordings = setting.get("tick", {})
         self.bar_recordings = setting.get("bar", {})
 
+        self.batch_size = setting.get("batch_size", self.batch_size)
+        self.flush_interval = setting.get("flush_interval", self.flush_interval)
+        self.queue_size = setting.get("queue_size", self.queue_size)
+        self.drop_when_full = setting.get("drop_when_full", self.drop_when_full)
+
     def save_setting(self):
         """"""
         setting = {
             "tick": self.tick_recordings,
-            "bar": self.bar_recordings
+            "bar": self.bar_recordings,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+            "queue_size": self.queue_size,
+            "drop_when_full": self.drop_when_full
         }
         save_json(self.setting_filename, setting)
 
@@ -66,29 +91,75 @@ class RecorderEngine(BaseEngine):
         """"""
         while self.active:
             try:
-                task = self.queue.get(timeout=1)
-                task_type, data = task
-
-                if task_type == "tick":
-                    database_manager.save_tick_data([data])
-                elif task_type == "bar":
-                    database_manager.save_bar_data([data])
-
-            except Empty:
-                continue
-
+                batch = self.get_batch()
+                if batch:
+                    self.flush(batch)
             except Exception:
                 self.active = False
 
                 info = sys.exc_info()
                 event = Event(EVENT_RECORDER_EXCEPTION, info)
                 self.event_engine.put(event)
+                return
+
+        # Write data left in queue after closed
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except Empty:
+                break
+
+        if batch:
+            self.flush(batch)
+
+    def get_batch(self) -> list:
+        """
+        Get tasks from queue until batch size reached or flush interval passed.
+        """
+        interval = self.flush_interval / 1000
+
+        try:
+            batch = [self.queue.get(timeout=interval)]
+        except Empty:
+            return []
+
+        deadline = perf_counter() + interval
+
+        while len(batch) < self.batch_size:
+            timeout = deadline - perf_counter()
+            if timeout <= 0:
+                break
+
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except Empty:
+                break
+
+        return batch
+
+    def flush(self, batch: list):
+        """
+        Group tasks by data type and save each with one database call.
+        """
+        start = perf_counter()
+
+        ticks = [data for task_type, data in batch if task_type == "tick"]
+        bars = [data for task_type, data in batch if task_type == "bar"]
+
+        if ticks:
+            database_manager.save_tick_data(ticks)
+        if bars:
+            database_manager.save_bar_data(bars)
+
+        self.flush_latency = (perf_counter() - start) * 1000
+        self.write_count += len(batch)
 
     def close(self):
         """"""
         self.active = False
 
-        if self.thread.isAlive():
+        if self.thread.is_alive():
             self.thread.join()
 
     def start(self):
@@ -182,6 +253,7 @@ class RecorderEngine(BaseEngine):
         self.event_engine.register(EVENT_CONTRACT, self.process_contract_event)
         self.event_engine.register(
             EVENT_SPREAD_DATA, self.process_spread_event)
+        self.event_engine.register(EVENT_TIMER, self.process_timer_event)
 
     def update_tick(self, tick: TickData):
         """"""
@@ -214,6 +286,10 @@ class RecorderEngine(BaseEngine):
         if tick.datetime:
             self.update_tick(tick)
 
+    def process_timer_event(self, event: Event):
+        """"""
+        self.put_stats_event()
+
     def write_log(self, msg: str):
         """"""
         event = Event(
@@ -241,15 +317,55 @@ class RecorderEngine(BaseEngine):
         )
         self.event_engine.put(event)
 
+    def put_stats_event(self):
+        """"""
+        now = perf_counter()
+        write_count = self.write_count
+
+        speed = (write_count - self.last_write_count) / (now - self.last_stats_time)
+
+        self.last_write_count = write_count
+        self.last_stats_time = now
+
+        data = {
+            "queue": self.queue.qsize(),
+            "latency": self.flush_latency,
+            "speed": speed,
+            "dropped": self.drop_count
+        }
+
+        event = Event(
+            EVENT_RECORDER_STATS,
+            data
+        )
+        self.event_engine.put(event)
+
+    def put_task(self, task: tuple):
+        """
+        Put task into queue, drop it or block until queue available when full.
+        """
+        if not self.drop_when_full:
+            self.queue.put(task)
+            return
+
+        try:
+            self.queue.put_nowait(task)
+        except Full:
+            self.drop_count += 1
+
+            if self.drop_count == 1:
+                self.write_log("记录队列已满，开始丢弃新数据")
+
     def record_tick(self, tick: TickData):
         """"""
-        task = ("tick", copy(tick))
-        self.queue.put(task)
+        # Tick pushed by gateway is a new object, so no copy is needed
+        task = ("tick", tick)
+        self.put_task(task)
 
     def record_bar(self, bar: BarData):
         """"""
-        task = ("bar", copy(bar))
-        self.queue.put(task)
+        task = ("bar", bar)
+        self.put_task(task)
 
     def get_bar_generator(self, vt_symbol: str):
         """"""
@@ -10,7 +10,8 @@ from ..engine import (
     APP_NAME,
     EVENT_RECORDER_LOG,
     EVENT_RECORDER_UPDATE,
-    EVENT_RECORDER_EXCEPTION
+    EVENT_RECORDER_EXCEPTION,
+    EVENT_RECORDER_STATS
 )
 
 
@@ -21,6 +22,7 @@ class RecorderManager(QtWidgets.QWidget):
     signal_update = QtCore.pyqtSignal(Event)
     signal_contract = QtCore.pyqtSignal(Event)
     signal_exception = QtCore.pyqtSignal(Event)
+    signal_stats = QtCore.pyqtSignal(Event)
 
     def __init__(self, main_engine: MainEngine, event_engine: EventEngine):
         super().__init__()
@@ -73,6 +75,8 @@ class RecorderManager(QtWidgets.QWidget):
         self.log_edit = QtWidgets.QTextEdit()
         self.log_edit.setReadOnly(True)
 
+        self.stats_label = QtWidgets.QLabel()
+
         # Set layout
         grid = QtWidgets.QGridLayout()
         grid.addWidget(QtWidgets.QLabel("K线记录"), 0, 0)
@@ -95,6 +99,7 @@ class RecorderManager(QtWidgets.QWidget):
         grid2.addWidget(self.bar_recording_edit, 1, 0)
         grid2.addWidget(self.tick_recording_edit, 1, 1)
         grid2.addWidget(self.log_edit, 2, 0, 1, 2)
+        grid2.addWidget(self.stats_label, 3, 0, 1, 2)
 
         vbox = QtWidgets.QVBoxLayout()
         vbox.addLayout(hbox)
@@ -107,6 +112,7 @@ class RecorderManager(QtWidgets.QWidget):
         self.signal_contract.connect(self.process_contract_event)
         self.signal_update.connect(self.process_update_event)
         self.signal_exception.connect(self.process_exception_event)
+        self.signal_stats.connect(self.process_stats_event)
 
         self.event_engine.register(EVENT_CONTRACT, self.signal_contract.emit)
         self.event_engine.register(
@@ -114,6 +120,7 @@ class RecorderManager(QtWidgets.QWidget):
         self.event_engine.register(
             EVENT_RECORDER_UPDATE, self.signal_update.emit)
         self.event_engine.register(EVENT_RECORDER_EXCEPTION, self.signal_exception.emit)
+        self.event_engine.register(EVENT_RECORDER_STATS, self.signal_stats.emit)
 
     def process_log_event(self, event: Event):
         """"""
@@ -133,6 +140,18 @@ class RecorderManager(QtWidgets.QWidget):
         tick_text = "\n".join(data["tick"])
         self.tick_recording_edit.setText(tick_text)
 
+    def process_stats_event(self, event: Event):
+        """"""
+        data = event.data
+
+        text = (
+            f"队列长度：{data['queue']}    "
+            f"写入耗时：{data['latency']:.1f}毫秒    "
+            f"写入速度：{data['speed']:.0f}条/秒    "
+            f"丢弃数量：{data['dropped']}"
+        )
+        self.stats_label.setText(text)
+
     def process_contract_event(self, event: Event):
         """"""
         contract = event.data
@@ -1,7 +1,8 @@
-from collections import defaultdict
 from datetime import date, datetime, timedelta
-from typing import Dict, List, Set, Tuple
+from typing import Dict, List, Tuple
 from functools import lru_cache
+from itertools import chain, repeat
+from operator import attrgetter
 import traceback
 
 import numpy as np
@@ -12,7 +13,7 @@ from pandas import DataFrame
 from vnpy.trader.constant import Direction, Offset, Interval, Status
 from vnpy.trader.database import database_manager
 from vnpy.trader.object import OrderData, TradeData, BarData
-from vnpy.trader.utility import round_to, extract_vt_symbol
+from vnpy.trader.utility import round_to, extract_vt_symbol, ChunkedDataStream
 
 from .template import StrategyTemplate
 
@@ -44,6 +45,7 @@ class BacktestingEngine:
         self.priceticks: Dict[str, float] = 0
 
         self.capital: float = 1_000_000
+        self.streaming: bool = False
 
         self.strategy: StrategyTemplate = None
         self.bars: Dict[str, BarData] = {}
@@ -51,8 +53,7 @@ class BacktestingEngine:
 
         self.interval: Interval = None
         self.days: int = 0
-        self.history_data: Dict[Tuple, BarData] = {}
-        self.dts: Set[datetime] = set()
+        self.history_data: BarPanel = None
 
         self.limit_order_count = 0
         self.limit_orders = {}
@@ -95,7 +96,8 @@ class BacktestingEngine:
         sizes: Dict[str, float],
         priceticks: Dict[str, float],
         capital: int = 0,
-        end: datetime = None
+        end: datetime = None,
+        streaming: bool = False
     ) -> None:
         """"""
         self.vt_symbols = vt_symbols
@@ -109,6 +111,7 @@ class BacktestingEngine:
         self.start = start
         self.end = end
         self.capital = capital
+        self.streaming = streaming
 
     def add_strategy(self, strategy_class: type, setting: dict) -> None:
         """"""
@@ -128,20 +131,26 @@ class BacktestingEngine:
             return
 
         # Clear previously loaded history data
-        self.history_data.clear()
-        self.dts.clear()
+        self.history_data = None
+
+        # Data is loaded chunk by chunk during replay in streaming mode
+        if self.streaming:
+            self.output("流式回放模式，历史数据将在回放时分块加载")
+            return
 
         # Load 30 days of data each time and allow for progress update
         progress_delta = timedelta(days=30)
         total_delta = self.end - self.start
         interval_delta = INTERVAL_DELTA_MAP[self.interval]
 
+        datas: Dict[str, List[BarData]] = {}
+
         for vt_symbol in self.vt_symbols:
             start = self.start
             end = self.start + progress_delta
             progress = 0
 
-            data_count = 0
+            symbol_data = datas.setdefault(vt_symbol, [])
             while start < self.end:
                 end = min(end, self.end)  # Make sure end time stays within set range
 
@@ -152,10 +161,7 @@ class BacktestingEngine:
                     end
                 )
 
-                for bar in data:
-                    self.dts.add(bar.datetime)
-                    self.history_data[(bar.datetime, vt_symbol)] = bar
-                    data_count += 1
+                symbol_data.extend(data)
 
                 progress += progress_delta / total_delta
                 progress = min(progress, 1)
@@ -165,33 +171,56 @@ class BacktestingEngine:
                 start = end + interval_delta
                 end += (progress_delta + interval_delta)
 
-            self.output(f"{vt_symbol}历史数据加载完成，数据量：{data_count}")
+            self.output(f"{vt_symbol}历史数据加载完成，数据量：{len(symbol_data)}")
+
+        self.history_data = BarPanel(self.vt_symbols, datas)
 
-        self.output("所有历史数据加载完成")
+        self.output(f"所有历史数据加载完成，时间点数量：{len(self.history_data)}")
 
     def run_backtesting(self) -> None:
         """"""
         self.strategy.on_init()
 
-        # Generate sorted datetime list
-        dts = list(self.dts)
-        dts.sort()
+        # Replay rows of bar panel loaded from stream in streaming mode,
+        # otherwise rows of bar panel with all history data loaded
+        if self.streaming and not self.history_data:
+            stream = self.get_history_stream()
+            history_data = iter(stream)
+        else:
+            stream = None
+
+            # History data is None if not loaded, then nothing is replayed
+            if self.history_data:
+                count = len(self.history_data)
+            else:
+                count = 0
+
+            history_data = zip(repeat(self.history_data), range(count))
 
         # Use the first [days] of history data for initializing strategy
         day_count = 0
-        ix = 0
+        item = None
+
+        # Bar panel being replayed changes with every chunk in streaming
+        # mode, and is not kept as history data after replay, so that
+        # history data is streamed again in next run.
+        for item in history_data:
+            panel, ix = item
+            dt = panel.dts[ix]
 
-        for ix, dt in enumerate(dts):
             if self.datetime and dt.day != self.datetime.day:
                 day_count += 1
                 if day_count >= self.days:
                     break
 
             try:
-                self.new_bars(dt)
+                self.new_bars(panel, ix)
             except Exception:
                 self.output("触发异常，回测终止")
                 self.output(traceback.format_exc())
+
+                if stream:
+                    stream.close()
                 return
 
         self.strategy.inited = True
@@ -201,17 +230,55 @@ class BacktestingEngine:
         self.strategy.trading = True
         self.output("开始回放历史数据")
 
-        # Use the rest of history data for running backtesting
-        for dt in dts[ix:]:
+        # Use the rest of history data for running backtesting,
+        # data which stopped initialization is the first one to replay
+        if item:
+            history_data = chain([item], history_data)
+
+        for panel, ix in history_data:
             try:
-                self.new_bars(dt)
+                self.new_bars(panel, ix)
             except Exception:
                 self.output("触发异常，回测终止")
                 self.output(traceback.format_exc())
+
+                if stream:
+                    stream.close()
                 return
 
+        if stream:
+            self.output(f"历史数据流式加载完成，时间点数量：{stream.count}")
+
         self.output("历史数据回放结束")
 
+    def get_history_stream(self) -> ChunkedDataStream:
+        """
+        Create stream which loads bar data of all contracts chunk by chunk,
+        and yields (bar panel, row index) of each chunk in time order.
+        """
+        if not self.end:
+            self.end = datetime.now()
+
+        def load_func(start: datetime, end: datetime) -> List[Tuple]:
+            datas = {}
+
+            for vt_symbol in self.vt_symbols:
+                symbol, exchange = extract_vt_symbol(vt_symbol)
+                datas[vt_symbol] = database_manager.load_bar_data(
+                    symbol, exchange, self.interval, start, end
+                )
+
+            panel = BarPanel(self.vt_symbols, datas)
+            return list(zip(repeat(panel), range(len(panel))))
+
+        return ChunkedDataStream(
+            load_func,
+            self.start,
+            self.end,
+            timedelta(days=30),
+            INTERVAL_DELTA_MAP[self.interval]
+        )
+
     def calculate_result(self) -> None:
         """"""
         self.output("开始计算逐日盯市盈亏")
@@ -226,36 +293,16 @@ class BacktestingEngine:
             daily_result = self.daily_results[d]
             daily_result.add_trade(trade)
 
-        # Calculate daily result by iteration.
-        pre_closes = {}
-        start_poses = {}
-
-        for daily_result in self.daily_results.values():
-            daily_result.calculate_pnl(
-                pre_closes,
-                start_poses,
-                self.sizes,
-                self.rates,
-                self.slippages,
-            )
-
-            pre_closes = daily_result.close_prices
-            start_poses = daily_result.end_poses
+        # Calculate daily result with array operations.
+        results = calculate_daily_pnl(
+            list(self.daily_results.values()),
+            self.sizes,
+            self.rates,
+            self.slippages
+        )
 
         # Generate dataframe
-        results = defaultdict(list)
-
-        for daily_result in self.daily_results.values():
-            fields = [
-                "date", "trade_count", "turnover",
-                "commission", "slippage", "trading_pnl",
-                "holding_pnl", "total_pnl", "net_pnl"
-            ]
-            for key in fields:
-                value = getattr(daily_result, key)
-                results[key].append(value)
-
-        self.daily_df = DataFrame.from_dict(results).set_index("date")
+        self.daily_df = DataFrame(results).set_index("date")
 
         self.output("逐日盯市盈亏计算完成")
         return self.daily_df
@@ -472,13 +519,17 @@ class BacktestingEngine:
         else:
             self.daily_results[d] = PortfolioDailyResult(d, close_prices)
 
-    def new_bars(self, dt: datetime) -> None:
-        """"""
+    def new_bars(self, panel: "BarPanel", ix: int) -> None:
+        """
+        Push bars of row ix in bar panel.
+        """
+        dt = panel.dts[ix]
         self.datetime = dt
 
         self.bars.clear()
-        for vt_symbol in self.vt_symbols:
-            bar = self.history_data.get((dt, vt_symbol), None)
+        row = panel.bars[ix].tolist()
+
+        for vt_symbol, bar in zip(self.vt_symbols, row):
             if bar:
                 self.bars[vt_symbol] = bar
             else:
@@ -805,6 +856,218 @@ class PortfolioDailyResult:
             contract_result.update_close_price(close_price)
 
 
+class BarPanel:
+    """
+    Time aligned bar data of multiple contracts, with datetimes as rows
+    and contracts as columns.
+    """
+
+    def __init__(self, vt_symbols: List[str], datas: Dict[str, List[BarData]]):
+        """
+        Build panel with bar data list of each contract. Rows are sorted
+        union of datetimes of all contracts.
+        """
+        self.vt_symbols: List[str] = vt_symbols
+
+        dt_lists = []
+        for vt_symbol in vt_symbols:
+            data = datas.get(vt_symbol, [])
+            dt_lists.append([bar.datetime for bar in data])
+
+        # Hashes of datetime objects are cached, so merging with set union
+        # is much faster than comparison based merging in Python.
+        self.dts: List[datetime] = sorted(set().union(*dt_lists))
+        index = {dt: ix for ix, dt in enumerate(self.dts)}
+
+        # Cell is None if bar data of the contract is missing
+        self.bars: np.ndarray = np.full(
+            (len(self.dts), len(vt_symbols)), None, dtype=object
+        )
+
+        for col, (vt_symbol, dt_list) in enumerate(zip(vt_symbols, dt_lists)):
+            if not dt_list:
+                continue
+
+            rows = [index[dt] for dt in dt_list]
+
+            values = np.empty(len(rows), dtype=object)
+            values[:] = datas[vt_symbol]
+            self.bars[rows, col] = values
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.dts)
+
+    def get_array(self, field: str) -> np.ndarray:
+        """
+        Get float array of one bar data field (e.g. close_price) with shape
+        (datetimes, contracts), nan if bar data is missing.
+        """
+        getter = attrgetter(field)
+        array = np.full(self.bars.shape, np.nan)
+
+        mask = self.bars != None  # noqa: E711
+        array[mask] = [getter(bar) for bar in self.bars[mask]]
+
+        return array
+
+
+def calculate_daily_pnl(
+    daily_results: List[PortfolioDailyResult],
+    sizes: Dict[str, float],
+    rates: Dict[str, float],
+    slippages: Dict[str, float]
+) -> Dict[str, list]:
+    """
+    Calculate pnl of all daily results with array operations on (day,
+    contract) matrix, which gives the same result as calling
+    PortfolioDailyResult.calculate_pnl day by day. Return dict of daily
+    field values used for generating DataFrame.
+    """
+    vt_symbols = list(dict.fromkeys(
+        vt_symbol
+        for daily_result in daily_results
+        for vt_symbol in daily_result.contract_results
+    ))
+    symbol_index = {vt_symbol: ix for ix, vt_symbol in enumerate(vt_symbols)}
+
+    day_count = len(daily_results)
+    symbol_count = len(vt_symbols)
+    shape = (day_count, symbol_count)
+
+    listed = np.zeros(shape, dtype=bool)
+    close_prices = np.zeros(shape)
+    pre_closes = np.zeros(shape)
+
+    trade_cells = []
+    trade_prices = []
+    trade_volumes = []
+    trade_directions = []
+
+    for d, daily_result in enumerate(daily_results):
+        for vt_symbol, contract_result in daily_result.contract_results.items():
+            ix = symbol_index[vt_symbol]
+            listed[d, ix] = True
+            close_prices[d, ix] = contract_result.close_price
+
+            for trade in contract_result.trades:
+                trade_cells.append(d * symbol_count + ix)
+                trade_prices.append(trade.price)
+                trade_volumes.append(trade.volume)
+                trade_directions.append(trade.direction == Direction.LONG)
+
+        # Pre close is taken from close prices of last day
+        if d:
+            for vt_symbol, close_price in daily_results[d - 1].close_prices.items():
+                pre_closes[d, symbol_index[vt_symbol]] = close_price
+
+    # If no pre_close provided on the first day,
+    # use value 1 to avoid zero division error
+    pre_closes[pre_closes == 0] = 1
+
+    trade_cells = np.array(trade_cells, dtype=int)
+    trade_prices = np.array(trade_prices, dtype=float)
+    trade_volumes = np.array(trade_volumes, dtype=float)
+    pos_changes = np.where(trade_directions, trade_volumes, -trade_volumes)
+
+    cell_count = day_count * symbol_count
+    trade_counts = np.bincount(trade_cells, minlength=cell_count).reshape(shape)
+    changes = np.bincount(trade_cells, pos_changes, cell_count).reshape(shape)
+
+    # Position is carried over from last day only if contract listed in
+    # last day, otherwise it starts from 0 again.
+    cum_changes = np.cumsum(changes, axis=0)
+    pre_changes = cum_changes - changes
+
+    restart = np.ones(shape, dtype=bool)
+    restart[1:] = ~listed[:-1]
+
+    restart_days = np.where(restart, np.arange(day_count)[:, None], 0)
+    restart_days = np.maximum.accumulate(restart_days, axis=0)
+    offsets = pre_changes[restart_days, np.arange(symbol_count)]
+
+    start_poses = pre_changes - offsets
+    end_poses = cum_changes - offsets
+
+    # Holding pnl is the pnl from holding position at day start
+    size_array = np.array([sizes[vt_symbol] for vt_symbol in vt_symbols], dtype=float)
+    holding_pnls = start_poses * (close_prices - pre_closes) * size_array
+
+    # Trading pnl is the pnl from new trade during the day
+    trade_symbols = trade_cells % symbol_count
+    trade_sizes = size_array[trade_symbols]
+    trade_rates = np.array([rates[vt_symbol] for vt_symbol in vt_symbols])[trade_symbols]
+    trade_slippages = np.array([slippages[vt_symbol] for vt_symbol in vt_symbols])[trade_symbols]
+
+    turnovers = trade_volumes * trade_sizes * trade_prices
+    commissions = turnovers * trade_rates
+    trading_pnls = pos_changes * (close_prices.ravel()[trade_cells] - trade_prices) * trade_sizes
+    slippages = trade_volumes * trade_sizes * trade_slippages
+
+    # Sum up values of trades in the same day for each contract
+    turnovers = np.bincount(trade_cells, turnovers, cell_count).reshape(shape)
+    commissions = np.bincount(trade_cells, commissions, cell_count).reshape(shape)
+    trading_pnls = np.bincount(trade_cells, trading_pnls, cell_count).reshape(shape)
+    slippages = np.bincount(trade_cells, slippages, cell_count).reshape(shape)
+
+    # Net pnl takes account of commission and slippage cost
+    total_pnls = trading_pnls + holding_pnls
+    net_pnls = total_pnls - commissions - slippages
+
+    contract_values = {
+        "pre_close": pre_closes,
+        "trade_count": trade_counts,
+        "start_pos": start_poses,
+        "end_pos": end_poses,
+        "turnover": turnovers,
+        "commission": commissions,
+        "slippage": slippages,
+        "trading_pnl": trading_pnls,
+        "holding_pnl": holding_pnls,
+        "total_pnl": total_pnls,
+        "net_pnl": net_pnls,
+    }
+
+    # Sum up values of contracts in the same day, contract by contract
+    results = {"date": [daily_result.date for daily_result in daily_results]}
+
+    for key in [
+        "trade_count", "turnover", "commission", "slippage",
+        "trading_pnl", "holding_pnl", "total_pnl", "net_pnl"
+    ]:
+        values = contract_values[key]
+        total = np.zeros(day_count, dtype=values.dtype)
+
+        for ix in range(symbol_count):
+            total += np.where(listed[:, ix], values[:, ix], 0)
+
+        results[key] = total
+
+    # Keep daily result objects updated for get_all_daily_results
+    contract_values = {key: values.tolist() for key, values in contract_values.items()}
+
+    for d, daily_result in enumerate(daily_results):
+        daily_result.pre_closes = daily_results[d - 1].close_prices if d else {}
+        daily_result.end_poses = {}
+
+        for vt_symbol, contract_result in daily_result.contract_results.items():
+            ix = symbol_index[vt_symbol]
+
+            for key, values in contract_values.items():
+                setattr(contract_result, key, values[d][ix])
+
+            daily_result.end_poses[vt_symbol] = contract_result.end_pos
+
+    for key, values in results.items():
+        if isinstance(values, np.ndarray):
+            values = values.tolist()
+
+        for daily_result, value in zip(daily_results, values):
+            setattr(daily_result, key, value)
+
+    return results
+
+
 @lru_cache(maxsize=999)
 def load_bar_data(
     vt_symbol: str,
@@ -1,11 +1,21 @@
 """"""
 
 import traceback
-from typing import Optional
+from threading import Lock
+from time import time
+from typing import Any, Dict, List, Optional, Tuple
 
-from vnpy.event import Event, EventEngine
+from vnpy.event import Event, EventEngine, EVENT_TIMER
 from vnpy.rpc import RpcServer
 from vnpy.trader.engine import BaseEngine, MainEngine
+from vnpy.trader.event import (
+    EVENT_TICK,
+    EVENT_ORDER,
+    EVENT_TRADE,
+    EVENT_POSITION,
+    EVENT_ACCOUNT,
+    EVENT_CONTRACT
+)
 from vnpy.trader.utility import load_json, save_json
 from vnpy.trader.object import LogData
 
@@ -13,6 +23,22 @@ APP_NAME = "RpcService"
 
 EVENT_RPC_LOG = "eRpcLog"
 
+# Events of these types are published with vt_symbol appended to topic
+SYMBOL_EVENT_TYPES = [EVENT_TICK, EVENT_ORDER, EVENT_TRADE, EVENT_POSITION]
+
+# Events of these types change OMS state and are published with sequence
+# number, value is key attribute of event data in state.
+STATE_EVENT_KEYS = {
+    EVENT_CONTRACT: "vt_symbol",
+    EVENT_ACCOUNT: "vt_accountid",
+    EVENT_POSITION: "vt_positionid",
+    EVENT_ORDER: "vt_orderid",
+    EVENT_TRADE: "vt_tradeid"
+}
+
+# Max number of snapshots kept for clients fetching chunks
+SNAPSHOT_LIMIT = 10
+
 
 class RpcEngine(BaseEngine):
     """"""
@@ -27,6 +53,21 @@ class RpcEngine(BaseEngine):
 
         self.server: Optional[RpcServer] = None
 
+        # OMS state of published data, sequence number is increased with
+        # every state event published. Session id is start time (in
+        # milliseconds) of engine, so that clients can find sequence number
+        # reset after server restarted.
+        self.session: int = int(time() * 1000)
+        self.sequence: int = 0
+        self.states: Dict[str, Dict[str, Any]] = {
+            event_type: {} for event_type in STATE_EVENT_KEYS.keys()
+        }
+        self.state_lock: Lock = Lock()
+
+        self.snapshots: Dict[int, List[List[Event]]] = {}
+        self.snapshot_lock: Lock = Lock()
+
+        self.init_state()
         self.init_server()
         self.load_setting()
         self.register_event()
@@ -56,6 +97,28 @@ class RpcEngine(BaseEngine):
         self.server.register(self.main_engine.get_all_contracts)
         self.server.register(self.main_engine.get_all_active_orders)
 
+        self.server.register(self.create_snapshot)
+        self.server.register(self.get_snapshot_chunk)
+
+    def init_state(self):
+        """
+        Load data already in OMS engine into state.
+        """
+        datas = {
+            EVENT_CONTRACT: self.main_engine.get_all_contracts(),
+            EVENT_ACCOUNT: self.main_engine.get_all_accounts(),
+            EVENT_POSITION: self.main_engine.get_all_positions(),
+            EVENT_ORDER: self.main_engine.get_all_orders(),
+            EVENT_TRADE: self.main_engine.get_all_trades()
+        }
+
+        for event_type, data_list in datas.items():
+            key = STATE_EVENT_KEYS[event_type]
+            state = self.states[event_type]
+
+            for data in data_list:
+                state[getattr(data, key)] = data
+
     def load_setting(self):
         """"""
         setting = load_json(self.setting_filename)
@@ -111,8 +174,78 @@ class RpcEngine(BaseEngine):
 
     def process_event(self, event: Event):
         """"""
-        if self.server.is_active():
-            self.server.publish("", event)
+        topic = self.get_topic(event)
+        if not topic:
+            return
+
+        key = STATE_EVENT_KEYS.get(event.type, None)
+
+        # Other data is published without sequence number
+        if not key:
+            if self.server.is_active():
+                self.server.publish(topic, [self.session, 0, event])
+            return
+
+        # Update state and publish with same lock, so that snapshot and
+        # sequence number are always consistent
+        with self.state_lock:
+            self.sequence += 1
+            self.states[event.type][getattr(event.data, key)] = event.data
+
+            if self.server.is_active():
+                self.server.publish(topic, [self.session, self.sequence, event])
+
+    def create_snapshot(self, chunk_size: int = 1000) -> Tuple[int, int, int]:
+        """
+        Create snapshot of OMS state, return session id, sequence number of
+        snapshot and count of chunks to be fetched with get_snapshot_chunk.
+        """
+        with self.state_lock:
+            sequence = self.sequence
+
+            events = []
+            for event_type, state in self.states.items():
+                events.extend([Event(event_type, data) for data in state.values()])
+
+        chunks = [
+            events[i:i + chunk_size] for i in range(0, len(events), chunk_size)
+        ]
+
+        with self.snapshot_lock:
+            self.snapshots[sequence] = chunks
+
+            # Remove oldest snapshot
+            if len(self.snapshots) > SNAPSHOT_LIMIT:
+                self.snapshots.pop(min(self.snapshots.keys()))
+
+        return self.session, sequence, len(chunks)
+
+    def get_snapshot_chunk(self, sequence: int, index: int) -> List[Event]:
+        """"""
+        with self.snapshot_lock:
+            return self.snapshots[sequence][index]
+
+    def get_topic(self, event: Event) -> str:
+        """
+        Get topic of event for publishing, return empty string if event
+        should not be published.
+        """
+        # Client has its own timer
+        if event.type == EVENT_TIMER:
+            return ""
+
+        for event_type in SYMBOL_EVENT_TYPES:
+            if event.type == event_type:
+                return event_type + event.data.vt_symbol
+            # Events of specific vt_symbol or vt_orderid are pushed again
+            # by client when processing general events.
+            elif event.type.startswith(event_type):
+                return ""
+
+        if event.type.startswith(EVENT_ACCOUNT) and event.type != EVENT_ACCOUNT:
+            return ""
+
+        return event.type
 
     def write_log(self, msg: str) -> None:
         """"""
@@ -1,6 +1,7 @@
 from collections import defaultdict
-from datetime import date, datetime
-from typing import Callable, Type
+from datetime import date, datetime, timedelta
+from itertools import chain
+from typing import Callable, Type, List
 
 import numpy as np
 import matplotlib.pyplot as plt
@@ -10,6 +11,8 @@ from pandas import DataFrame
 from vnpy.trader.constant import (Direction, Offset, Exchange,
                                   Interval, Status)
 from vnpy.trader.object import TradeData, BarData, TickData
+from vnpy.trader.matching import TickMatchingModel
+from vnpy.trader.utility import ChunkedDataStream
 
 from .template import SpreadStrategyTemplate, SpreadAlgoTemplate
 from .base import SpreadData, BacktestingMode, load_bar_data, load_tick_data
@@ -17,6 +20,13 @@ from .base import SpreadData, BacktestingMode, load_bar_data, load_tick_data
 sns.set_style("whitegrid")
 
 
+INTERVAL_DELTA_MAP = {
+    Interval.MINUTE: timedelta(minutes=1),
+    Interval.HOUR: timedelta(hours=1),
+    Interval.DAILY: timedelta(days=1),
+}
+
+
 class BacktestingEngine:
     """"""
 
@@ -34,6 +44,8 @@ class BacktestingEngine:
         self.pricetick = 0
         self.capital = 1_000_000
         self.mode = BacktestingMode.BAR
+        self.matching_model: TickMatchingModel = None
+        self.streaming: bool = False
 
         self.strategy_class: Type[SpreadStrategyTemplate] = None
         self.strategy: SpreadStrategyTemplate = None
@@ -83,6 +95,9 @@ class BacktestingEngine:
         self.logs.clear()
         self.daily_results.clear()
 
+        if self.matching_model:
+            self.matching_model.clear()
+
     def set_parameters(
         self,
         spread: SpreadData,
@@ -94,7 +109,9 @@ class BacktestingEngine:
         pricetick: float,
         capital: int = 0,
         end: datetime = None,
-        mode: BacktestingMode = BacktestingMode.BAR
+        mode: BacktestingMode = BacktestingMode.BAR,
+        matching_model: TickMatchingModel = None,
+        streaming: bool = False
     ):
         """"""
         self.spread = spread
@@ -107,6 +124,8 @@ class BacktestingEngine:
         self.capital = capital
         self.end = end
         self.mode = mode
+        self.matching_model = matching_model
+        self.streaming = streaming
 
     def add_strategy(self, strategy_class: type, setting: dict):
         """"""
@@ -130,6 +149,12 @@ class BacktestingEngine:
             self.output("起始日期必须小于结束日期")
             return
 
+        # Data is loaded chunk by chunk during replay in streaming mode
+        if self.streaming:
+            self.history_data = []
+            self.output("流式回放模式，历史数据将在回放时分块加载")
+            return
+
         if self.mode == BacktestingMode.BAR:
             self.history_data = load_bar_data(
                 self.spread,
@@ -139,7 +164,7 @@ class BacktestingEngine:
                 self.pricetick
             )
         else:
-            self.history_datas = load_tick_data(
+            self.history_data = load_tick_data(
                 self.spread,
                 self.start,
                 self.end
@@ -156,11 +181,20 @@ class BacktestingEngine:
 
         self.strategy.on_init()
 
+        # Replay data from stream in streaming mode, otherwise from
+        # history data list loaded
+        if self.streaming and not self.history_data:
+            stream = self.get_history_stream()
+            history_data = iter(stream)
+        else:
+            stream = None
+            history_data = iter(self.history_data)
+
         # Use the first [days] of history data for initializing strategy
         day_count = 0
-        ix = 0
+        data = None
 
-        for ix, data in enumerate(self.history_data):
+        for data in history_data:
             if self.datetime and data.datetime.day != self.datetime.day:
                 day_count += 1
                 if day_count >= self.days:
@@ -176,12 +210,47 @@ class BacktestingEngine:
         self.strategy.trading = True
         self.output("开始回放历史数据")
 
-        # Use the rest of history data for running backtesting
-        for data in self.history_data[ix:]:
+        # Use the rest of history data for running backtesting,
+        # data which stopped initialization is the first one to replay
+        if data:
+            history_data = chain([data], history_data)
+
+        for data in history_data:
             func(data)
 
+        if stream:
+            self.output(f"历史数据流式加载完成，数据量：{stream.count}")
+
         self.output("历史数据回放结束")
 
+    def get_history_stream(self) -> ChunkedDataStream:
+        """
+        Create stream which loads history data chunk by chunk.
+        """
+        if not self.end:
+            self.end = datetime.now()
+
+        # Call functions wrapped by lru_cache, since chunk data is only
+        # used once during replay.
+        if self.mode == BacktestingMode.BAR:
+            def load_func(start: datetime, end: datetime) -> List[BarData]:
+                return load_bar_data.__wrapped__(
+                    self.spread, self.interval, start, end, self.pricetick
+                )
+
+            chunk_delta = timedelta(days=30)
+            interval_delta = INTERVAL_DELTA_MAP[self.interval]
+        else:
+            def load_func(start: datetime, end: datetime) -> List[TickData]:
+                return load_tick_data.__wrapped__(self.spread, start, end)
+
+            chunk_delta = timedelta(days=1)
+            interval_delta = timedelta(microseconds=1)
+
+        return ChunkedDataStream(
+            load_func, self.start, self.end, chunk_delta, interval_delta
+        )
+
     def calculate_result(self):
         """"""
         self.output("开始计算逐日盯市盈亏")
@@ -449,6 +518,10 @@ class BacktestingEngine:
         """
         Cross limit order with last bar/tick data.
         """
+        if self.mode == BacktestingMode.TICK and self.matching_model:
+            self.match_algo()
+            return
+
         if self.mode == BacktestingMode.BAR:
             long_cross_price = self.bar.close_price
             short_cross_price = self.bar.close_price
@@ -511,6 +584,58 @@ class BacktestingEngine:
 
             self.trades[trade.vt_tradeid] = trade
 
+    def match_algo(self):
+        """
+        Match algo with order book of last tick by matching model, which
+        supports partial fill.
+        """
+        fills = self.matching_model.match(self.tick)
+
+        for algoid, trade_price, volume in fills:
+            # Algo may be stopped in callback of previous fill
+            algo = self.active_algos.get(algoid, None)
+            if not algo:
+                self.matching_model.cancel_order(algoid)
+                continue
+
+            # Push algo udpate with status "part traded" or "all traded".
+            algo.traded += volume
+
+            if algo.traded >= algo.volume:
+                algo.status = Status.ALLTRADED
+                self.active_algos.pop(algoid)
+            else:
+                algo.status = Status.PARTTRADED
+
+            self.strategy.update_spread_algo(algo)
+
+            # Push trade update
+            self.trade_count += 1
+
+            if algo.direction == Direction.LONG:
+                pos_change = volume
+            else:
+                pos_change = -volume
+
+            trade = TradeData(
+                symbol=self.spread.name,
+                exchange=Exchange.LOCAL,
+                orderid=algo.algoid,
+                tradeid=str(self.trade_count),
+                direction=algo.direction,
+                offset=algo.offset,
+                price=trade_price,
+                volume=volume,
+                datetime=self.datetime,
+                gateway_name=self.gateway_name,
+            )
+            trade.value = trade_price
+
+            self.spread.net_pos += pos_change
+            self.strategy.on_spread_pos()
+
+            self.trades[trade.vt_tradeid] = trade
+
     def load_bar(
         self, spread: SpreadData, days: int, interval: Interval, callback: Callable
     ):
@@ -555,6 +680,12 @@ class BacktestingEngine:
         self.algos[algoid] = algo
         self.active_algos[algoid] = algo
 
+        # Matching model is only used in tick mode
+        if self.mode == BacktestingMode.TICK and self.matching_model:
+            self.matching_model.add_order(
+                algoid, direction, price, volume, self.datetime
+            )
+
         return algoid
 
     def stop_algo(
@@ -567,6 +698,9 @@ class BacktestingEngine:
             return
         algo = self.active_algos.pop(algoid)
 
+        if self.matching_model:
+            self.matching_model.cancel_order(algoid)
+
         algo.status = Status.CANCELLED
         self.strategy.update_spread_algo(algo)
 
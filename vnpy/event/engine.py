@@ -4,11 +4,21 @@ Event-driven framework of vn.py framework.
 
 from collections import defaultdict
 from queue import Empty, Queue
-from threading import Thread
-from time import sleep
-from typing import Any, Callable, List
+from threading import Lock, Thread
+from time import perf_counter, sleep
+from typing import Any, Callable, Dict, List, Sequence
 
 EVENT_TIMER = "eTimer"
+EVENT_STATS = "eEventStats"
+
+# Upper bounds (in milliseconds) of latency histogram buckets
+LATENCY_BUCKETS = (0.1, 1, 10, 100, 1000)
+
+# Event types processed in priority lane (order and trade events)
+PRIORITY_TYPES = ("eOrder.", "eTrade.")
+
+# Event types sharded into worker lanes by vt_symbol (tick events)
+LANE_TYPES = ("eTick.",)
 
 
 class Event:
@@ -28,6 +38,125 @@ class Event:
 HandlerType = Callable[[Event], None]
 
 
+class LatencyStats:
+    """
+    Count, total, max and histogram of latency in milliseconds.
+    """
+
+    def __init__(self):
+        """"""
+        self.count: int = 0
+        self.total: float = 0
+        self.max: float = 0
+        self.buckets: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def update(self, latency: float) -> None:
+        """"""
+        self.count += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency < bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def to_dict(self) -> dict:
+        """"""
+        labels = [f"<{bound}ms" for bound in LATENCY_BUCKETS]
+        labels.append(f">={LATENCY_BUCKETS[-1]}ms")
+
+        return {
+            "count": self.count,
+            "total": self.total,
+            "average": self.total / self.count if self.count else 0,
+            "max": self.max,
+            "histogram": dict(zip(labels, self.buckets))
+        }
+
+
+class EventConflater:
+    """
+    Keep only the latest event of each vt_symbol (or event type if data
+    has no vt_symbol), and pass them to handler at most every interval
+    milliseconds in its own thread.
+
+    Used for slow consumers (e.g. UI monitors) so that intermediate
+    events are dropped instead of being queued.
+    """
+
+    def __init__(self, handler: HandlerType, interval: int):
+        """"""
+        self.handler: HandlerType = handler
+        self.interval: float = interval / 1000
+
+        # Named after handler wrapped, so that it has stable name in
+        # latency statistics
+        self.__qualname__ = f"{get_handler_name(handler)}[conflated]"
+
+        self.events: Dict[str, Event] = {}
+        self.lock: Lock = Lock()
+
+        self.active: bool = False
+        self.thread: Thread = Thread(target=self.run, daemon=True)
+
+    def __call__(self, event: Event) -> None:
+        """
+        Replace pending event of same key with the new one.
+        """
+        key = getattr(event.data, "vt_symbol", event.type)
+
+        with self.lock:
+            self.events[key] = event
+
+    def run(self) -> None:
+        """"""
+        while self.active:
+            sleep(self.interval)
+
+            with self.lock:
+                events = self.events
+                self.events = {}
+
+            for event in events.values():
+                self.handler(event)
+
+    def start(self) -> None:
+        """"""
+        self.active = True
+        self.thread.start()
+
+    def stop(self) -> None:
+        """"""
+        self.active = False
+
+
+def get_handler_name(handler: HandlerType) -> str:
+    """
+    Get name of handler which stays same across runs.
+    """
+    if isinstance(handler, EventConflater):
+        return handler.__qualname__
+
+    module = getattr(handler, "__module__", None)
+    qualname = getattr(handler, "__qualname__", None)
+
+    if module and qualname:
+        return f"{module}.{qualname}"
+
+    # Method of builtin or extension type, e.g. emit of Qt signal
+    owner = getattr(handler, "__self__", None)
+    name = getattr(handler, "__name__", None)
+
+    if owner is not None and name:
+        cls = type(owner)
+        return f"{cls.__module__}.{cls.__qualname__}.{name}"
+
+    return repr(handler)
+
+
 class EventEngine:
     """
     Event engine distributes event object based on its type
@@ -35,9 +164,27 @@ class EventEngine:
 
     It also generates timer event by every interval seconds,
     which can be used for timing purpose.
+
+    If lanes is set above 0, events are dispatched by multiple threads:
+        * events of priority types are processed in a priority lane
+        * events of lane types are sharded into worker lanes by vt_symbol
+          of event data, so that same vt_symbol is always processed in
+          same lane with original order
+        * all other events are processed in the default lane
+
+    Lanes are disabled by default. With lanes enabled, handlers of
+    different event types (e.g. on_tick and on_order of one strategy) can
+    be called at the same time in different threads, so that data shared
+    by those handlers must be guarded by lock (as in CtaEngine).
     """
 
-    def __init__(self, interval: int = 1):
+    def __init__(
+        self,
+        interval: int = 1,
+        lanes: int = 0,
+        priority_types: Sequence[str] = PRIORITY_TYPES,
+        lane_types: Sequence[str] = LANE_TYPES
+    ):
         """
         Timer event is generated every 1 second by default, if
         interval not specified.
@@ -50,14 +197,47 @@ class EventEngine:
         self._handlers: defaultdict = defaultdict(list)
         self._general_handlers: List = []
 
+        self._lanes: int = lanes
+        self._priority_types: tuple = tuple(priority_types)
+        self._lane_types: tuple = tuple(lane_types)
+        self._priority_queue: Queue = Queue()
+        self._lane_queues: List[Queue] = [Queue() for _ in range(lanes)]
+
+        self._lane_threads: List[Thread] = []
+        if lanes:
+            queues = [self._priority_queue] + self._lane_queues
+            self._lane_threads = [
+                Thread(target=self._run_queue, args=(queue,)) for queue in queues
+            ]
+
+        self._conflaters: Dict[tuple, EventConflater] = {}
+
+        self._stats_active: bool = False
+        self._stats_interval: int = 0
+        self._stats_lock: Lock = Lock()
+        self._timer_count: int = 0
+        self._wait_stats: Dict[str, LatencyStats] = defaultdict(LatencyStats)
+        self._handler_stats: Dict[str, LatencyStats] = defaultdict(LatencyStats)
+        self._max_queue_size: int = 0
+
     def _run(self) -> None:
         """
         Get event from queue and then process it.
         """
+        self._run_queue(self._queue)
+
+    def _run_queue(self, queue: Queue) -> None:
+        """
+        Get event from a lane queue and then process it.
+        """
         while self._active:
             try:
-                event = self._queue.get(block=True, timeout=1)
-                self._process(event)
+                event = queue.get(block=True, timeout=1)
+
+                if self._stats_active:
+                    self._process_with_stats(event)
+                else:
+                    self._process(event)
             except Empty:
                 pass
 
@@ -75,6 +255,33 @@ class EventEngine:
         if self._general_handlers:
             [handler(event) for handler in self._general_handlers]
 
+    def _process_with_stats(self, event: Event) -> None:
+        """
+        Process event and record queue wait time and handler execution time.
+        """
+        start = perf_counter()
+        put_time = getattr(event, "put_time", start)
+
+        handlers = list(self._handlers.get(event.type, []))
+        handlers.extend(self._general_handlers)
+
+        costs = []
+        for handler in handlers:
+            handler_start = perf_counter()
+            handler(event)
+            costs.append((handler, perf_counter() - handler_start))
+
+        queue_size = self.get_queue_size()
+
+        with self._stats_lock:
+            self._wait_stats[event.type].update((start - put_time) * 1000)
+
+            for handler, cost in costs:
+                name = get_handler_name(handler)
+                self._handler_stats[name].update(cost * 1000)
+
+            self._max_queue_size = max(self._max_queue_size, queue_size)
+
     def _run_timer(self) -> None:
         """
         Sleep by interval second(s) and then generate a timer event.
@@ -84,6 +291,14 @@ class EventEngine:
             event = Event(EVENT_TIMER)
             self.put(event)
 
+            # Publish statistics event every stats interval timer events
+            if self._stats_active:
+                self._timer_count += 1
+
+                if self._timer_count >= self._stats_interval:
+                    self._timer_count = 0
+                    self.put(Event(EVENT_STATS, self.dump_stats()))
+
     def start(self) -> None:
         """
         Start event engine to process events and generate timer events.
@@ -92,6 +307,9 @@ class EventEngine:
         self._thread.start()
         self._timer.start()
 
+        for thread in self._lane_threads:
+            thread.start()
+
     def stop(self) -> None:
         """
         Stop event engine.
@@ -100,11 +318,36 @@ class EventEngine:
         self._timer.join()
         self._thread.join()
 
+        for thread in self._lane_threads:
+            thread.join()
+
+        for conflater in self._conflaters.values():
+            conflater.stop()
+
     def put(self, event: Event) -> None:
         """
         Put an event object into event queue.
         """
-        self._queue.put(event)
+        if self._stats_active:
+            event.put_time = perf_counter()
+
+        if self._lanes:
+            self._get_lane_queue(event).put(event)
+        else:
+            self._queue.put(event)
+
+    def _get_lane_queue(self, event: Event) -> Queue:
+        """
+        Get queue of lane which the event should be processed in.
+        """
+        if event.type.startswith(self._priority_types):
+            return self._priority_queue
+
+        if event.type.startswith(self._lane_types):
+            vt_symbol = getattr(event.data, "vt_symbol", "")
+            return self._lane_queues[hash(vt_symbol) % self._lanes]
+
+        return self._queue
 
     def register(self, type: str, handler: HandlerType) -> None:
         """
@@ -127,6 +370,37 @@ class EventEngine:
         if not handler_list:
             self._handlers.pop(type)
 
+    def register_conflated(
+        self,
+        type: str,
+        handler: HandlerType,
+        interval: int
+    ) -> None:
+        """
+        Register a handler function which only receives the latest event
+        of each vt_symbol, at most every interval milliseconds.
+        """
+        key = (type, handler)
+        if key in self._conflaters:
+            return
+
+        conflater = EventConflater(handler, interval)
+        conflater.start()
+
+        self._conflaters[key] = conflater
+        self.register(type, conflater)
+
+    def unregister_conflated(self, type: str, handler: HandlerType) -> None:
+        """
+        Unregister an existing conflated handler function.
+        """
+        conflater = self._conflaters.pop((type, handler), None)
+        if not conflater:
+            return
+
+        conflater.stop()
+        self.unregister(type, conflater)
+
     def register_general(self, handler: HandlerType) -> None:
         """
         Register a new handler function for all event types. Every
@@ -141,3 +415,66 @@ class EventEngine:
         """
         if handler in self._general_handlers:
             self._general_handlers.remove(handler)
+
+    def enable_stats(self, interval: int = 10) -> None:
+        """
+        Start recording latency statistics, and publish EVENT_STATS
+        every interval timer events.
+        """
+        self.reset_stats()
+        self._stats_interval = interval
+        self._stats_active = True
+
+    def disable_stats(self) -> None:
+        """
+        Stop recording latency statistics.
+        """
+        self._stats_active = False
+
+    def reset_stats(self) -> None:
+        """
+        Clear all statistics recorded.
+        """
+        with self._stats_lock:
+            self._timer_count = 0
+            self._wait_stats.clear()
+            self._handler_stats.clear()
+            self._max_queue_size = 0
+
+    def get_queue_size(self) -> int:
+        """
+        Get count of events waiting in all queues.
+        """
+        size = self._queue.qsize() + self._priority_queue.qsize()
+        for queue in self._lane_queues:
+            size += queue.qsize()
+        return size
+
+    def dump_stats(self) -> dict:
+        """
+        Get snapshot of statistics, including:
+            * queue: current and max queue size
+            * wait: queue wait time of each event type
+            * handler: execution time of each handler
+        Latency is in milliseconds.
+
+        Execution time only covers the work done in event engine thread:
+        handlers which emit Qt signal (e.g. monitors in UI) only measure
+        signal dispatch and share the name of signal emit method, and
+        conflated handlers only measure replacing pending event.
+        """
+        with self._stats_lock:
+            return {
+                "queue": {
+                    "size": self.get_queue_size(),
+                    "max": self._max_queue_size
+                },
+                "wait": {
+                    type: stats.to_dict()
+                    for type, stats in self._wait_stats.items()
+                },
+                "handler": {
+                    name: stats.to_dict()
+                    for name, stats in self._handler_stats.items()
+                }
+            }
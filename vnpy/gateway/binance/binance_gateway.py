@@ -154,6 +154,10 @@ class BinanceGateway(BaseGateway):
         self.trade_ws_api.stop()
         self.market_ws_api.stop()
 
+    def get_latency_stats(self):
+        """"""
+        return self.rest_api.get_latency_stats()
+
     def process_timer_event(self, event: Event):
         """"""
         self.rest_api.keep_user_stream()
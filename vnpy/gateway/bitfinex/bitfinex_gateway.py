@@ -241,7 +241,10 @@ class BitfinexRestApi(RestClient):
         )
 
         self.init(REST_HOST, proxy_host, proxy_port)
-        self.start(session)
+
+        # Nonce in signature must be increasing, so requests are sent one
+        # by one with single session whatever session setting is.
+        self.start(1)
 
         self.gateway.write_log("REST API启动成功")
         self.query_contract()
@@ -153,6 +153,10 @@ class BitmexGateway(BaseGateway):
         self.rest_api.stop()
         self.ws_api.stop()
 
+    def get_latency_stats(self):
+        """"""
+        return self.rest_api.get_latency_stats()
+
     def process_timer_event(self, event: Event):
         """"""
         self.rest_api.reset_rate_limit()
@@ -239,7 +239,9 @@ class OnetokenRestApi(RestClient):
 
         self.init(REST_HOST, proxy_host, proxy_port)
 
-        self.start(session_number)
+        # Nonce in signature must be increasing, so requests are sent one
+        # by one with single session whatever session setting is.
+        self.start(1)
 
         self.gateway.write_log("REST API启动成功")
 
@@ -1,3 +1,7 @@
+from threading import Lock, Thread
+from time import sleep
+from typing import Any, Dict, List, Tuple
+
 from vnpy.event import Event
 from vnpy.rpc import RpcClient
 from vnpy.trader.gateway import BaseGateway
@@ -7,6 +11,25 @@ from vnpy.trader.object import (
     OrderRequest
 )
 from vnpy.trader.constant import Exchange
+from vnpy.trader.event import (
+    EVENT_TICK,
+    EVENT_ORDER,
+    EVENT_TRADE,
+    EVENT_POSITION,
+    EVENT_ACCOUNT,
+    EVENT_CONTRACT,
+    EVENT_LOG
+)
+
+
+# Key attribute of data in events of OMS state
+STATE_EVENT_KEYS = {
+    EVENT_CONTRACT: "vt_symbol",
+    EVENT_ACCOUNT: "vt_accountid",
+    EVENT_POSITION: "vt_positionid",
+    EVENT_ORDER: "vt_orderid",
+    EVENT_TRADE: "vt_tradeid"
+}
 
 
 class RpcGateway(BaseGateway):
@@ -26,17 +49,57 @@ class RpcGateway(BaseGateway):
         super().__init__(event_engine, "RPC")
 
         self.symbol_gateway_map = {}
+        self.active: bool = False
+
+        # Session id of server and sequence number of last state event
+        # processed. State events are buffered during snapshot syncing,
+        # which starts after connected.
+        self.session: int = 0
+        self.sequence: int = 0
+        self.syncing: bool = True
+        self.sync_buffer: List[Tuple[int, int, Event]] = []
+        self.sync_lock: Lock = Lock()
+        self.snapshot_chunk_size: int = 1000
+        self.sync_timeout: float = 10
+
+        # OMS state data last pushed, used for skipping unchanged data
+        # when snapshot is synced again.
+        self.states: Dict[str, Dict[str, Any]] = {
+            event_type: {} for event_type in STATE_EVENT_KEYS.keys()
+        }
 
         self.client = RpcClient()
         self.client.callback = self.client_callback
 
+        # General events of trading data are pushed with gateway functions,
+        # so that events of specific vt_symbol are also pushed.
+        self.event_funcs = {
+            EVENT_TICK: self.on_tick,
+            EVENT_ORDER: self.on_order,
+            EVENT_TRADE: self.on_trade,
+            EVENT_POSITION: self.on_position,
+            EVENT_ACCOUNT: self.on_account
+        }
+
     def connect(self, setting: dict):
         """"""
         req_address = setting["主动请求地址"]
         pub_address = setting["推送订阅地址"]
 
-        self.client.subscribe_topic("")
+        # Tick data is only received after subscribed
+        topics = [
+            EVENT_ORDER,
+            EVENT_TRADE,
+            EVENT_POSITION,
+            EVENT_ACCOUNT,
+            EVENT_CONTRACT,
+            EVENT_LOG
+        ]
+        for topic in topics:
+            self.client.subscribe_topic(topic)
+
         self.client.start(req_address, pub_address)
+        self.active = True
 
         self.write_log("服务器连接成功，开始初始化查询")
 
@@ -44,6 +107,8 @@ class RpcGateway(BaseGateway):
 
     def subscribe(self, req: SubscribeRequest):
         """"""
+        self.client.subscribe_topic(EVENT_TICK + req.vt_symbol)
+
         gateway_name = self.symbol_gateway_map.get(req.vt_symbol, "")
         self.client.subscribe(req, gateway_name)
 
@@ -66,52 +131,188 @@ class RpcGateway(BaseGateway):
         pass
 
     def query_all(self):
+        """
+        Sync all OMS data with server by snapshot. Syncing is retried in
+        another thread if failed.
+        """
+        with self.sync_lock:
+            self.syncing = True
+            self.sync_buffer.clear()
+
+        try:
+            self.sync_snapshot()
+        except Exception as e:
+            self.on_sync_failed(e)
+            Thread(target=self.resync_snapshot, daemon=True).start()
+
+    def resync_snapshot(self):
+        """
+        Sync snapshot again, retry with increasing interval until succeeded
+        or gateway closed.
+        """
+        interval = 1
+
+        while self.active:
+            try:
+                self.sync_snapshot()
+                return
+            except Exception as e:
+                self.on_sync_failed(e)
+
+            sleep(interval)
+            interval = min(interval * 2, 60)
+
+    def on_sync_failed(self, e: Exception):
         """"""
-        contracts = self.client.get_all_contracts()
-        for contract in contracts:
-            self.symbol_gateway_map[contract.vt_symbol] = contract.gateway_name
-            contract.gateway_name = self.gateway_name
-            self.on_contract(contract)
-        self.write_log("合约信息查询成功")
-
-        accounts = self.client.get_all_accounts()
-        for account in accounts:
-            account.gateway_name = self.gateway_name
-            self.on_account(account)
-        self.write_log("资金信息查询成功")
-
-        positions = self.client.get_all_positions()
-        for position in positions:
-            position.gateway_name = self.gateway_name
-            self.on_position(position)
-        self.write_log("持仓信息查询成功")
-
-        orders = self.client.get_all_orders()
-        for order in orders:
-            order.gateway_name = self.gateway_name
-            self.on_order(order)
-        self.write_log("委托信息查询成功")
-
-        trades = self.client.get_all_trades()
-        for trade in trades:
-            trade.gateway_name = self.gateway_name
-            self.on_trade(trade)
-        self.write_log("成交信息查询成功")
+        # Events buffered are included in snapshot of next try
+        with self.sync_lock:
+            self.sync_buffer.clear()
+
+        # Only last line of traceback in remote exception is logged
+        lines = str(e).strip().splitlines()
+        msg = lines[-1] if lines else ""
+        self.write_log(f"快照同步失败，稍后重试：{e.__class__.__name__} {msg}")
+
+    def sync_snapshot(self):
+        """
+        Process snapshot data fetched by chunks, then replay state events
+        published after snapshot. Snapshot is fetched again if any event
+        is missing or server session is changed.
+        """
+        while True:
+            session, sequence, chunk_count = self.client.call(
+                "create_snapshot",
+                (self.snapshot_chunk_size,),
+                timeout=self.sync_timeout
+            )
+
+            # Request all chunks at once and process them in order
+            futures = [
+                self.client.call_async("get_snapshot_chunk", (sequence, i))
+                for i in range(chunk_count)
+            ]
+
+            count = 0
+            for future in futures:
+                events = future.result(self.sync_timeout)
+                count += len(events)
+
+                for event in events:
+                    self.process_event(event, True)
+
+            with self.sync_lock:
+                # Events published before snapshot are already included
+                next_sequence = sequence + 1
+                missing = False
+
+                for event_session, event_sequence, event in self.sync_buffer:
+                    # Events of older session are replaced by snapshot,
+                    # newer session means server restarted again.
+                    if event_session != session:
+                        if event_session > session:
+                            missing = True
+                            break
+                        continue
+
+                    if event_sequence < next_sequence:
+                        continue
+                    elif event_sequence > next_sequence:
+                        missing = True
+                        break
+
+                    self.process_event(event)
+                    next_sequence += 1
+
+                self.sync_buffer.clear()
+
+                if not missing:
+                    self.session = session
+                    self.sequence = next_sequence - 1
+                    self.syncing = False
+
+            if not missing:
+                break
+
+            self.write_log("快照同步期间推送数据缺失，重新同步快照")
+
+        self.write_log(f"快照同步成功，序列号：{sequence}，数据量：{count}")
 
     def close(self):
         """"""
+        self.active = False
+
         self.client.stop()
         self.client.join()
 
-    def client_callback(self, topic: str, event: Event):
+    def client_callback(self, topic: str, data: Any):
         """"""
+        session, sequence, event = data
+
         if event is None:
             print("none event", topic, event)
             return
 
+        # Data without sequence number is not OMS state
+        if not sequence:
+            self.process_event(event)
+            return
+
+        with self.sync_lock:
+            if self.syncing:
+                self.sync_buffer.append((session, sequence, event))
+                return
+
+            # Sequence number is reset after server restarted
+            if session != self.session:
+                self.start_resync(session, sequence, event)
+                self.write_log("服务器已重启，开始重新同步快照")
+                return
+
+            # Duplicate event
+            if sequence <= self.sequence:
+                return
+
+            if sequence > self.sequence + 1:
+                self.start_resync(session, sequence, event)
+                self.write_log(f"推送数据缺失，序列号：{self.sequence + 1}，开始重新同步快照")
+                return
+
+            self.sequence = sequence
+            self.process_event(event)
+
+    def start_resync(self, session: int, sequence: int, event: Event):
+        """
+        Resync snapshot in another thread, since reply of remote call is
+        received in client thread.
+        """
+        self.syncing = True
+        self.sync_buffer.append((session, sequence, event))
+
+        Thread(target=self.resync_snapshot, daemon=True).start()
+
+    def process_event(self, event: Event, snapshot: bool = False):
+        """"""
         data = event.data
 
+        if event.type == EVENT_CONTRACT:
+            self.symbol_gateway_map[data.vt_symbol] = data.gateway_name
+
         if hasattr(data, "gateway_name"):
             data.gateway_name = self.gateway_name
 
-        self.event_engine.put(event)
+        key = STATE_EVENT_KEYS.get(event.type, None)
+        if key:
+            state = self.states[event.type]
+            data_key = getattr(data, key)
+
+            # Data in snapshot already pushed is not pushed again,
+            # e.g. trades and orders not changed
+            if snapshot and state.get(data_key, None) == data:
+                return
+            state[data_key] = data
+
+        func = self.event_funcs.get(event.type, None)
+        if func:
+            func(data)
+        else:
+            self.event_engine.put(event)
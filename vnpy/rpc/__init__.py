@@ -1,17 +1,21 @@
 import os
+import pickle
 import signal
 import threading
 import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
 from datetime import datetime, timedelta
 from functools import lru_cache
-from typing import Any, Callable, Dict
+from itertools import count
+from typing import Any, Callable, Dict, List, Set, Tuple
 from pathlib import Path
 
 import zmq
 import zmq.auth
-from zmq.backend.cython.constants import NOBLOCK
 from zmq.auth.thread import ThreadAuthenticator
 
+from .codec import Codec, PickleCodec, get_codec, get_codec_names
+
 
 # Achieve Ctrl-c interrupt recv
 signal.signal(signal.SIGINT, signal.SIG_DFL)
@@ -21,6 +25,12 @@ KEEP_ALIVE_TOPIC: str = "_keep_alive"
 KEEP_ALIVE_INTERVAL: timedelta = timedelta(seconds=1)
 KEEP_ALIVE_TOLERANCE: timedelta = timedelta(seconds=3)
 
+NEGOTIATE_CODEC_FUNCTION: str = "_negotiate_codec"
+
+# Data published in legacy format is a single frame pickled with protocol
+# 2 or higher, which always starts with this byte.
+LEGACY_PUBLISH_PREFIX: bytes = b"\x80"
+
 
 class RemoteException(Exception):
     """
@@ -41,33 +51,68 @@ class RemoteException(Exception):
 
 
 class RpcServer:
-    """"""
+    """
+    Data is published as frames of [topic, codec name, data], which can
+    not be received by RpcClient of older versions (before codec support).
+    Use legacy_publish to publish single frame of pickled [topic, data]
+    for them instead, then topic is filtered by client after received.
+    """
 
-    def __init__(self):
+    def __init__(
+        self,
+        codec: str = PickleCodec.name,
+        worker_count: int = 4,
+        legacy_publish: bool = False
+    ):
         """
         Constructor
         """
         # Save functions dict: key is fuction name, value is fuction object
         self.__functions: Dict[str, Any] = {}
 
+        self.__legacy_publish: bool = legacy_publish
+
+        # Name and codec used for publishing, pickle by default since every
+        # client supports it. Other codec is replaced by pickle once a client
+        # without it negotiates codec.
+        self.__pub_codec: Tuple[bytes, Codec] = (codec.encode(), get_codec(codec))
+
         # Zmq port related
         self.__context: zmq.Context = zmq.Context()
 
-        # Reply socket (Request–reply pattern)
-        self.__socket_rep: zmq.Socket = self.__context.socket(zmq.REP)
+        # Router socket (Request–reply pattern), accepts both REQ and
+        # DEALER clients
+        self.__socket_router: zmq.Socket = self.__context.socket(zmq.ROUTER)
 
         # Publish socket (Publish–subscribe pattern)
         self.__socket_pub: zmq.Socket = self.__context.socket(zmq.PUB)
 
+        # Reply sockets used to pass replies from worker threads to server
+        # thread, since zmq socket is not thread safe.
+        reply_address = "inproc://rpc_server_reply"
+
+        self.__socket_reply_pull: zmq.Socket = self.__context.socket(zmq.PULL)
+        self.__socket_reply_pull.bind(reply_address)
+
+        self.__socket_reply_push: zmq.Socket = self.__context.socket(zmq.PUSH)
+        self.__socket_reply_push.connect(reply_address)
+
+        self.__reply_lock: threading.Lock = threading.Lock()
+
         # Worker thread related
         self.__active: bool = False                     # RpcServer status
         self.__thread: threading.Thread = None          # RpcServer thread
         self.__lock: threading.Lock = threading.Lock()
 
+        # Worker pool for executing requested functions concurrently
+        self.__worker_count: int = worker_count
+        self.__pool: ThreadPoolExecutor = None
+
         # Authenticator used to ensure data security
         self.__authenticator: ThreadAuthenticator = None
 
         self._register(KEEP_ALIVE_TOPIC, lambda n: n)
+        self._register(NEGOTIATE_CODEC_FUNCTION, self.negotiate_codec)
 
     def is_active(self) -> bool:
         """"""
@@ -100,14 +145,17 @@ class RpcServer:
             self.__socket_pub.curve_publickey = publickey
             self.__socket_pub.curve_server = True
 
-            self.__socket_rep.curve_secretkey = secretkey
-            self.__socket_rep.curve_publickey = publickey
-            self.__socket_rep.curve_server = True
+            self.__socket_router.curve_secretkey = secretkey
+            self.__socket_router.curve_publickey = publickey
+            self.__socket_router.curve_server = True
 
         # Bind socket address
-        self.__socket_rep.bind(rep_address)
+        self.__socket_router.bind(rep_address)
         self.__socket_pub.bind(pub_address)
 
+        # Start worker pool
+        self.__pool = ThreadPoolExecutor(self.__worker_count)
+
         # Start RpcServer status
         self.__active = True
 
@@ -137,6 +185,10 @@ class RpcServer:
         """
         start = datetime.utcnow()
 
+        poller = zmq.Poller()
+        poller.register(self.__socket_router, zmq.POLLIN)
+        poller.register(self.__socket_reply_pull, zmq.POLLIN)
+
         while self.__active:
             # Use poll to wait event arrival, waiting time is 1 second (1000 milliseconds)
             cur = datetime.utcnow()
@@ -145,36 +197,102 @@ class RpcServer:
             if delta >= KEEP_ALIVE_INTERVAL:
                 self.publish(KEEP_ALIVE_TOPIC, cur)
 
-            if not self.__socket_rep.poll(1000):
-                continue
+            sockets = dict(poller.poll(1000))
 
-            # Receive request data from Reply socket
-            req = self.__socket_rep.recv_pyobj()
+            # Send reply of request finished by worker thread
+            if self.__socket_reply_pull in sockets:
+                frames = self.__socket_reply_pull.recv_multipart()
+                self.__socket_router.send_multipart(frames)
 
-            # Get function name and parameters
-            name, args, kwargs = req
+            # Receive request data from Router socket
+            if self.__socket_router in sockets:
+                frames = self.__socket_router.recv_multipart()
+                self.process_request(frames)
 
-            # Try to get and execute callable function object; capture exception information if it fails
-            try:
-                func = self.__functions[name]
-                r = func(*args, **kwargs)
-                rep = [True, r]
-            except Exception as e:  # noqa
-                rep = [False, traceback.format_exc()]
-
-            # send callable response by Reply socket
-            self.__socket_rep.send_pyobj(rep)
+        # Wait for requests being executed
+        self.__pool.shutdown()
 
         # Unbind socket address
         self.__socket_pub.unbind(self.__socket_pub.LAST_ENDPOINT)
-        self.__socket_rep.unbind(self.__socket_rep.LAST_ENDPOINT)
+        self.__socket_router.unbind(self.__socket_router.LAST_ENDPOINT)
+
+    def process_request(self, frames: List[bytes]) -> None:
+        """
+        Request frames are [identity, empty, codec name, request id, data].
+        Request of client without codec negotiation only has pickled data,
+        and request of REQ client has no request id.
+        """
+        header = frames[:-1]
+
+        if len(frames) == 3:
+            codec = get_codec(PickleCodec.name)
+        else:
+            codec = get_codec(frames[2].decode())
+
+        if not codec:
+            rep = [False, f"Unsupported codec: {frames[2].decode()}"]
+
+            codec = get_codec(PickleCodec.name)
+            header[2] = PickleCodec.name.encode()
+
+            self.__socket_router.send_multipart(header + [codec.encode(rep)])
+            return
+
+        self.__pool.submit(self.execute_request, header, codec, frames[-1])
+
+    def execute_request(self, header: List[bytes], codec: Codec, data: bytes) -> None:
+        """
+        Execute request in worker thread, and reply with same codec.
+        """
+        # Try to get and execute callable function object; capture exception information if it fails
+        try:
+            name, args, kwargs = codec.decode(data)
+
+            func = self.__functions[name]
+            r = func(*args, **kwargs)
+            rep = [True, r]
+        except Exception:  # noqa
+            rep = [False, traceback.format_exc()]
+
+        try:
+            data = codec.encode(rep)
+        except Exception:  # noqa
+            data = codec.encode([False, traceback.format_exc()])
+
+        # Pass reply to server thread
+        with self.__reply_lock:
+            self.__socket_reply_push.send_multipart(header + [data])
 
     def publish(self, topic: str, data: Any) -> None:
         """
         Publish data
         """
+        if self.__legacy_publish:
+            frames = [pickle.dumps([topic, data], pickle.DEFAULT_PROTOCOL)]
+        else:
+            codec_name, codec = self.__pub_codec
+            frames = [topic.encode(), codec_name, codec.encode(data)]
+
         with self.__lock:
-            self.__socket_pub.send_pyobj([topic, data])
+            self.__socket_pub.send_multipart(frames)
+
+    def negotiate_codec(self, names: List[str]) -> str:
+        """
+        Choose the codec most preferred by client which is also available.
+        """
+        # Fall back to pickle for publishing if client cannot decode
+        # published data
+        if self.__pub_codec[0].decode() not in names:
+            self.__pub_codec = (
+                PickleCodec.name.encode(),
+                get_codec(PickleCodec.name)
+            )
+
+        for name in names:
+            if get_codec(name):
+                return name
+
+        return PickleCodec.name
 
     def register(self, func: Callable) -> None:
         """
@@ -197,12 +315,32 @@ class RpcClient:
         # zmq port related
         self.__context: zmq.Context = zmq.Context()
 
-        # Request socket (Request–reply pattern)
-        self.__socket_req: zmq.Socket = self.__context.socket(zmq.REQ)
+        # Dealer socket (Request–reply pattern), allows many requests
+        # in flight which are matched with replies by request id
+        self.__socket_dealer: zmq.Socket = self.__context.socket(zmq.DEALER)
 
         # Subscribe socket (Publish–subscribe pattern)
         self.__socket_sub: zmq.Socket = self.__context.socket(zmq.SUB)
 
+        # Command sockets used to pass requests and topic subscriptions to
+        # client thread, since zmq socket is not thread safe.
+        command_address = "inproc://rpc_client_command"
+
+        self.__socket_command_pull: zmq.Socket = self.__context.socket(zmq.PULL)
+        self.__socket_command_pull.bind(command_address)
+
+        self.__socket_command_push: zmq.Socket = self.__context.socket(zmq.PUSH)
+        self.__socket_command_push.connect(command_address)
+
+        self.__command_lock: threading.Lock = threading.Lock()
+
+        # Futures of requests waiting for reply: key is request id
+        self.__futures: Dict[bytes, Future] = {}
+        self.__request_count = count()
+
+        # Default timeout (in seconds) of remote call, None to wait forever
+        self.timeout: float = None
+
         # Worker thread relate, used to process data pushed from server
         self.__active: bool = False                 # RpcClient status
         self.__thread: threading.Thread = None      # RpcClient thread
@@ -211,6 +349,20 @@ class RpcClient:
         # Authenticator used to ensure data security
         self.__authenticator: ThreadAuthenticator = None
 
+        # Codec for requests, negotiated with server before first request.
+        # Requests are sent one by one without request id if server does
+        # not support negotiation.
+        self.__codec: Codec = None
+        self.__codec_name: bytes = b""
+        self.__pipelined: bool = False
+
+        # Names of unsupported codecs of published data already warned
+        self.__unsupported_codecs: Set[bytes] = set()
+
+        # Topics subscribed, used for filtering data published in legacy
+        # format
+        self.__topics: Set[str] = set()
+
         self._last_received_ping: datetime = datetime.utcnow()
 
     @lru_cache(100)
@@ -221,21 +373,116 @@ class RpcClient:
 
         # Perform remote call task
         def dorpc(*args, **kwargs):
-            # Generate request
-            req = [name, args, kwargs]
+            return self.call(name, args, kwargs, self.timeout)
+
+        return dorpc
 
-            # Send request and wait for response
+    def call(
+        self,
+        name: str,
+        args: tuple = (),
+        kwargs: dict = None,
+        timeout: float = None
+    ) -> Any:
+        """
+        Call remote function and wait for result until timeout (in seconds).
+        """
+        future = self.call_async(name, args, kwargs)
+
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            # Reply received after timeout is dropped
+            for request_id, request_future in list(self.__futures.items()):
+                if request_future is future:
+                    self.__futures.pop(request_id, None)
+            raise
+
+    def call_async(self, name: str, args: tuple = (), kwargs: dict = None) -> Future:
+        """
+        Send request of remote function call without waiting, return future
+        of call result. RemoteException is set on future if call failed.
+        """
+        # Generate request
+        if kwargs is None:
+            kwargs = {}
+        req = [name, args, kwargs]
+
+        if not self.__codec:
             with self.__lock:
-                self.__socket_req.send_pyobj(req)
-                rep = self.__socket_req.recv_pyobj()
+                if not self.__codec:
+                    self.negotiate_codec()
 
-            # Return response if successed; Trigger exception if failed
-            if rep[0]:
-                return rep[1]
-            else:
-                raise RemoteException(rep[1])
+        if self.__pipelined:
+            request_id = str(next(self.__request_count)).encode()
+            data = self.__codec.encode(req)
+            return self.send_request(request_id, [self.__codec_name, request_id, data])
 
-        return dorpc
+        # Wait for reply before sending next request, without timeout
+        # since reply can only be matched by order
+        with self.__lock:
+            future = self.send_request(b"", [self.__codec.encode(req)])
+            future.exception()
+            return future
+
+    def send_request(self, request_id: bytes, frames: List[bytes]) -> Future:
+        """
+        Pass request frames to client thread for sending.
+        """
+        future = Future()
+        self.__futures[request_id] = future
+
+        with self.__command_lock:
+            self.__socket_command_push.send_multipart([b"request", b""] + frames)
+
+        return future
+
+    def process_reply(self, frames: List[bytes]) -> None:
+        """
+        Reply frames are [empty, codec name, request id, data], or
+        [empty, data] pickled for request without request id.
+        """
+        if len(frames) == 4:
+            codec = get_codec(frames[1].decode())
+            request_id = frames[2]
+        else:
+            codec = get_codec(PickleCodec.name)
+            request_id = b""
+
+        future = self.__futures.pop(request_id, None)
+        if not future:
+            return
+
+        try:
+            rep = codec.decode(frames[-1])
+        except Exception as e:
+            future.set_exception(e)
+            return
+
+        # Set result if successed; Set exception if failed
+        if rep[0]:
+            future.set_result(rep[1])
+        else:
+            future.set_exception(RemoteException(rep[1]))
+
+    def negotiate_codec(self) -> None:
+        """
+        Choose codec for requests with server. Pickle without codec frame
+        and request id is used if server does not support negotiation.
+        """
+        req = [NEGOTIATE_CODEC_FUNCTION, (get_codec_names(),), {}]
+        future = self.send_request(b"", [pickle.dumps(req)])
+
+        try:
+            name = future.result(self.timeout)
+
+            self.__codec = get_codec(name)
+            self.__codec_name = name.encode()
+            self.__pipelined = True
+        except RemoteException:
+            self.__codec = get_codec(PickleCodec.name)
+            self.__codec_name = b""
+            self.__pipelined = False
 
     def start(
         self, 
@@ -266,14 +513,23 @@ class RpcClient:
             self.__socket_sub.curve_publickey = publickey
             self.__socket_sub.curve_serverkey = serverkey
 
-            self.__socket_req.curve_secretkey = secretkey
-            self.__socket_req.curve_publickey = publickey
-            self.__socket_req.curve_serverkey = serverkey
+            self.__socket_dealer.curve_secretkey = secretkey
+            self.__socket_dealer.curve_publickey = publickey
+            self.__socket_dealer.curve_serverkey = serverkey
 
         # Connect zmq port
-        self.__socket_req.connect(req_address)
+        self.__socket_dealer.connect(req_address)
         self.__socket_sub.connect(sub_address)
 
+        # Keep alive data is always needed for checking connection
+        self.subscribe_topic(KEEP_ALIVE_TOPIC)
+
+        # Data published in legacy format is received and then filtered
+        with self.__command_lock:
+            self.__socket_command_push.send_multipart(
+                [b"topic", LEGACY_PUBLISH_PREFIX]
+            )
+
         # Start RpcClient status
         self.__active = True
 
@@ -305,13 +561,53 @@ class RpcClient:
         """
         pull_tolerance = int(KEEP_ALIVE_TOLERANCE.total_seconds() * 1000)
 
+        poller = zmq.Poller()
+        poller.register(self.__socket_sub, zmq.POLLIN)
+        poller.register(self.__socket_dealer, zmq.POLLIN)
+        poller.register(self.__socket_command_pull, zmq.POLLIN)
+
         while self.__active:
-            if not self.__socket_sub.poll(pull_tolerance):
+            sockets = dict(poller.poll(pull_tolerance))
+
+            if not sockets:
                 self._on_unexpected_disconnected()
                 continue
 
-            # Receive data from subscribe socket
-            topic, data = self.__socket_sub.recv_pyobj(flags=NOBLOCK)
+            # Send request or subscribe new topic in client thread
+            if self.__socket_command_pull in sockets:
+                frames = self.__socket_command_pull.recv_multipart(flags=zmq.NOBLOCK)
+
+                if frames[0] == b"request":
+                    self.__socket_dealer.send_multipart(frames[1:])
+                else:
+                    self.__socket_sub.setsockopt(zmq.SUBSCRIBE, frames[1])
+
+            # Receive reply data from dealer socket
+            if self.__socket_dealer in sockets:
+                frames = self.__socket_dealer.recv_multipart(flags=zmq.NOBLOCK)
+                self.process_reply(frames)
+
+            if self.__socket_sub not in sockets:
+                continue
+
+            # Receive data from subscribe socket. Data published by server
+            # without codec support (or in legacy format) is a single
+            # pickled frame, and topic is not filtered by zmq.
+            frames = self.__socket_sub.recv_multipart(flags=zmq.NOBLOCK)
+
+            if len(frames) == 1:
+                topic, data = pickle.loads(frames[0])
+
+                if not self.match_topic(topic):
+                    continue
+            else:
+                codec = get_codec(frames[1].decode())
+                if not codec:
+                    self.on_unsupported_codec(frames[1])
+                    continue
+
+                topic = frames[0].decode()
+                data = codec.decode(frames[2])
 
             if topic == KEEP_ALIVE_TOPIC:
                 self._last_received_ping = data
@@ -319,9 +615,41 @@ class RpcClient:
                 # Process data by callable function
                 self.callback(topic, data)
 
+        # Cancel requests waiting for reply
+        for future in list(self.__futures.values()):
+            future.cancel()
+        self.__futures.clear()
+
         # Close socket
-        self.__socket_req.close()
+        self.__socket_dealer.close()
         self.__socket_sub.close()
+        self.__socket_command_pull.close()
+
+        with self.__command_lock:
+            self.__socket_command_push.close()
+
+    def on_unsupported_codec(self, codec_name: bytes) -> None:
+        """
+        Warn once for each unsupported codec of published data, and send
+        codec negotiation request so that server falls back to pickle.
+        Data received before that is dropped.
+        """
+        if codec_name in self.__unsupported_codecs:
+            return
+        self.__unsupported_codecs.add(codec_name)
+
+        print(
+            f"Unsupported codec of published data: {codec_name.decode()}, "
+            "request server to publish with pickle"
+        )
+
+        # Reply is not waited for, since this is called in client thread
+        request_id = str(next(self.__request_count)).encode()
+        req = [NEGOTIATE_CODEC_FUNCTION, (get_codec_names(),), {}]
+        self.send_request(
+            request_id,
+            [PickleCodec.name.encode(), request_id, pickle.dumps(req)]
+        )
 
     @staticmethod
     def _on_unexpected_disconnected():
@@ -336,9 +664,22 @@ class RpcClient:
 
     def subscribe_topic(self, topic: str) -> None:
         """
-        Subscribe data
+        Subscribe data with topic prefix, which can be called from any
+        thread before or after client started.
+        """
+        self.__topics.add(topic)
+
+        with self.__command_lock:
+            self.__socket_command_push.send_multipart([b"topic", topic.encode()])
+
+    def match_topic(self, topic: str) -> bool:
+        """
+        Check whether topic starts with any subscribed topic prefix.
         """
-        self.__socket_sub.setsockopt_string(zmq.SUBSCRIBE, topic)
+        for prefix in list(self.__topics):
+            if topic.startswith(prefix):
+                return True
+        return False
 
 
 def generate_certificates(name: str) -> None:
@@ -0,0 +1,317 @@
+"""
+Serialization codecs used by RpcServer and RpcClient.
+
+Pickle codec is always available and used as fallback. Msgpack codec is
+available if msgpack is installed, and encodes data classes registered
+with schema (e.g. TickData) as compact arrays of field values.
+"""
+
+import pickle
+import struct
+from threading import local
+from dataclasses import fields, is_dataclass
+from datetime import datetime, tzinfo
+from enum import Enum
+from typing import Any, Dict, List, Sequence
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+import pytz
+
+from vnpy.event import Event
+from vnpy.trader.object import TickData, OrderData, TradeData, PositionData
+
+
+class Codec:
+    """
+    Base class of serialization codec.
+    """
+
+    name: str = ""
+
+    def encode(self, obj: Any) -> bytes:
+        """"""
+        raise NotImplementedError
+
+    def decode(self, data: bytes) -> Any:
+        """"""
+        raise NotImplementedError
+
+
+class PickleCodec(Codec):
+    """"""
+
+    name: str = "pickle"
+
+    def encode(self, obj: Any) -> bytes:
+        """"""
+        return pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, data: bytes) -> Any:
+        """"""
+        return pickle.loads(data)
+
+
+class DataSchema:
+    """
+    Field layout of a class encoded as array of field values.
+    """
+
+    def __init__(self, index: int, cls: type, names: Sequence[str] = None):
+        """
+        Field names and enum types are read from data class definition if
+        names is not given. Object is recreated with cls(*values), so
+        fields not accepted by constructor are not encoded.
+        """
+        self.index: int = index
+        self.cls: type = cls
+        self.enums: Dict[int, type] = {}
+
+        if names:
+            self.names: List[str] = list(names)
+        else:
+            self.names = []
+
+            for field in fields(cls):
+                if not field.init:
+                    continue
+
+                if isinstance(field.type, type) and issubclass(field.type, Enum):
+                    self.enums[len(self.names)] = field.type
+
+                self.names.append(field.name)
+
+    def pack(self, obj: Any) -> list:
+        """"""
+        values = [self.index]
+        values.extend([getattr(obj, name) for name in self.names])
+
+        # Enum members are encoded with value, offset by schema index
+        for i in self.enums.keys():
+            member = values[i + 1]
+            if member is not None:
+                values[i + 1] = member.value
+
+        return values
+
+    def unpack(self, values: list) -> Any:
+        """"""
+        values = values[1:]
+
+        for i, enum_type in self.enums.items():
+            value = values[i]
+            if value is not None:
+                values[i] = enum_type(value)
+
+        return self.cls(*values)
+
+
+class MsgpackCodec(Codec):
+    """
+    Msgpack codec with extension types for registered classes, datetime
+    and tuple. Other objects not supported by msgpack are pickled.
+    """
+
+    name: str = "msgpack"
+
+    EXT_SCHEMA: int = 1
+    EXT_DATETIME: int = 2
+    EXT_TUPLE: int = 3
+    EXT_PICKLE: int = 4
+
+    DATETIME_STRUCT: struct.Struct = struct.Struct("<HBBBBBI")
+
+    def __init__(self):
+        """"""
+        self.schemas: List[DataSchema] = []
+        self.schema_map: Dict[type, DataSchema] = {}
+        self.timezones: Dict[str, tzinfo] = {}
+
+        # Packers of each thread are reused, one for each nesting level
+        # of extension types.
+        self.local: local = local()
+
+    def register_schema(self, cls: type, names: Sequence[str] = None) -> None:
+        """
+        Register class to be encoded with schema. Schemas must be
+        registered in the same order on both sides.
+        """
+        if cls in self.schema_map:
+            return
+
+        if not names and not is_dataclass(cls):
+            raise ValueError(f"Field names are required for class {cls.__name__}")
+
+        schema = DataSchema(len(self.schemas), cls, names)
+        self.schemas.append(schema)
+        self.schema_map[cls] = schema
+
+    def encode(self, obj: Any) -> bytes:
+        """"""
+        packers = getattr(self.local, "packers", None)
+        if packers is None:
+            packers = self.local.packers = []
+            self.local.depth = 0
+
+        depth = self.local.depth
+        if depth == len(packers):
+            packer = msgpack.Packer(default=self.default, strict_types=True)
+            packers.append(packer)
+
+        self.local.depth = depth + 1
+        try:
+            return packers[depth].pack(obj)
+        finally:
+            self.local.depth = depth
+
+    def decode(self, data: bytes) -> Any:
+        """"""
+        return msgpack.unpackb(
+            data,
+            ext_hook=self.ext_hook,
+            strict_map_key=False
+        )
+
+    def default(self, obj: Any) -> Any:
+        """
+        Encode object not supported by msgpack natively.
+        """
+        schema = self.schema_map.get(type(obj), None)
+        if schema:
+            data = self.encode(schema.pack(obj))
+            return msgpack.ExtType(self.EXT_SCHEMA, data)
+
+        if type(obj) is datetime:
+            data = self.pack_datetime(obj)
+            if data:
+                return msgpack.ExtType(self.EXT_DATETIME, data)
+        elif type(obj) is tuple:
+            return msgpack.ExtType(self.EXT_TUPLE, self.encode(list(obj)))
+        # Subclasses of native types (e.g. numpy.float64) are passed here
+        # by strict_types
+        elif not isinstance(obj, Enum):
+            for base in (int, float, str):
+                if isinstance(obj, base):
+                    return base(obj)
+
+        data = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+        return msgpack.ExtType(self.EXT_PICKLE, data)
+
+    def ext_hook(self, code: int, data: bytes) -> Any:
+        """
+        Decode extension types.
+        """
+        if code == self.EXT_SCHEMA:
+            values = self.decode(data)
+            schema = self.schemas[values[0]]
+            return schema.unpack(values)
+        elif code == self.EXT_DATETIME:
+            return self.unpack_datetime(data)
+        elif code == self.EXT_TUPLE:
+            return tuple(self.decode(data))
+        elif code == self.EXT_PICKLE:
+            return pickle.loads(data)
+
+        return msgpack.ExtType(code, data)
+
+    def pack_datetime(self, dt: datetime) -> bytes:
+        """
+        Pack naive datetime, or datetime with timezone created by pytz.
+        Return empty bytes for other timezones.
+        """
+        data = self.DATETIME_STRUCT.pack(
+            dt.year, dt.month, dt.day,
+            dt.hour, dt.minute, dt.second, dt.microsecond
+        )
+
+        tz = dt.tzinfo
+        if not tz:
+            return data
+
+        zone = getattr(tz, "zone", None)
+        if not zone:
+            return b""
+
+        base_tz = self.get_timezone(zone)
+
+        # Timezone set by replace(tzinfo=tz)
+        if tz is base_tz:
+            return data + b"\x00" + zone.encode()
+
+        # Timezone set by tz.localize(dt)
+        try:
+            if base_tz.localize(dt.replace(tzinfo=None)).tzinfo is tz:
+                return data + b"\x01" + zone.encode()
+        except (pytz.AmbiguousTimeError, pytz.NonExistentTimeError):
+            pass
+
+        return b""
+
+    def unpack_datetime(self, data: bytes) -> datetime:
+        """"""
+        size = self.DATETIME_STRUCT.size
+        dt = datetime(*self.DATETIME_STRUCT.unpack(data[:size]))
+
+        if len(data) == size:
+            return dt
+
+        tz = self.get_timezone(data[size + 1:].decode())
+
+        if data[size]:
+            return tz.localize(dt)
+        else:
+            return dt.replace(tzinfo=tz)
+
+    def get_timezone(self, zone: str) -> tzinfo:
+        """"""
+        tz = self.timezones.get(zone, None)
+
+        if not tz:
+            tz = pytz.timezone(zone)
+            self.timezones[zone] = tz
+
+        return tz
+
+
+CODECS: Dict[str, Codec] = {}
+
+
+def register_codec(codec: Codec) -> None:
+    """
+    Register codec, which is preferred over codecs registered before.
+    """
+    CODECS[codec.name] = codec
+
+
+def get_codec(name: str) -> Codec:
+    """"""
+    return CODECS.get(name, None)
+
+
+def get_codec_names() -> List[str]:
+    """
+    Get names of all available codecs, by preference.
+    """
+    return list(reversed(list(CODECS.keys())))
+
+
+def init_codecs() -> None:
+    """"""
+    register_codec(PickleCodec())
+
+    if not msgpack:
+        return
+
+    codec = MsgpackCodec()
+    codec.register_schema(Event, ["type", "data"])
+    codec.register_schema(TickData)
+    codec.register_schema(OrderData)
+    codec.register_schema(TradeData)
+    codec.register_schema(PositionData)
+    register_codec(codec)
+
+
+init_codecs()
@@ -1,7 +1,10 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Sequence, List, Dict, TYPE_CHECKING
+from time import perf_counter
+from typing import Iterable, Optional, Sequence, List, Dict, TYPE_CHECKING
+
+import numpy as np
 from pytz import timezone
 
 from vnpy.trader.setting import SETTINGS
@@ -19,6 +22,71 @@ class Driver(Enum):
     MYSQL = "mysql"
     POSTGRESQL = "postgresql"
     MONGODB = "mongodb"
+    NUMPY = "numpy"
+
+
+# Columnar layout of bar/tick data, datetime is naive in DB_TZ.
+BAR_DTYPE = np.dtype([
+    ("datetime", "datetime64[us]"),
+    ("volume", "f8"),
+    ("open_interest", "f8"),
+    ("open_price", "f8"),
+    ("high_price", "f8"),
+    ("low_price", "f8"),
+    ("close_price", "f8"),
+])
+
+TICK_DTYPE = np.dtype(
+    [
+        ("datetime", "datetime64[us]"),
+        ("name", "U32"),
+        ("volume", "f8"),
+        ("open_interest", "f8"),
+        ("last_price", "f8"),
+        ("last_volume", "f8"),
+        ("limit_up", "f8"),
+        ("limit_down", "f8"),
+        ("open_price", "f8"),
+        ("high_price", "f8"),
+        ("low_price", "f8"),
+        ("pre_close", "f8"),
+    ]
+    + [(f"bid_price_{i}", "f8") for i in range(1, 6)]
+    + [(f"ask_price_{i}", "f8") for i in range(1, 6)]
+    + [(f"bid_volume_{i}", "f8") for i in range(1, 6)]
+    + [(f"ask_volume_{i}", "f8") for i in range(1, 6)]
+)
+
+
+def rows_to_array(rows: Iterable[tuple], dtype: np.dtype) -> np.ndarray:
+    """
+    Convert rows of values ordered as dtype fields into structured array.
+
+    Datetime can be either datetime object or ISO string, and missing
+    float value (None) is filled with 0.
+    """
+    rows = list(rows)
+    array = np.empty(len(rows), dtype=dtype)
+    if not rows:
+        return array
+
+    for name, column in zip(dtype.names, zip(*rows)):
+        if array.dtype[name] == np.float64:
+            array[name] = np.nan_to_num(np.array(column, dtype=float))
+        else:
+            array[name] = column
+
+    return array
+
+
+def calculate_throughput(count: int, start: float) -> float:
+    """
+    Calculate rows per second since start time of perf_counter.
+    """
+    cost = perf_counter() - start
+    if not cost:
+        return 0
+    return count / cost
 
 
 class BaseDatabaseManager(ABC):
@@ -44,6 +112,59 @@ class BaseDatabaseManager(ABC):
     ) -> Sequence["TickData"]:
         pass
 
+    def load_bar_arrays(
+        self,
+        symbol: str,
+        exchange: "Exchange",
+        interval: "Interval",
+        start: datetime,
+        end: datetime
+    ) -> np.ndarray:
+        """
+        Load bar data as structured array of BAR_DTYPE, without creating
+        BarData objects.
+
+        Database driver should override this with a faster implementation.
+        """
+        bars = self.load_bar_data(symbol, exchange, interval, start, end)
+
+        # Datetime of loaded bar is already in DB_TZ
+        rows = [
+            (
+                bar.datetime.replace(tzinfo=None),
+                bar.volume,
+                bar.open_interest,
+                bar.open_price,
+                bar.high_price,
+                bar.low_price,
+                bar.close_price
+            )
+            for bar in bars
+        ]
+        return rows_to_array(rows, BAR_DTYPE)
+
+    def load_tick_arrays(
+        self,
+        symbol: str,
+        exchange: "Exchange",
+        start: datetime,
+        end: datetime
+    ) -> np.ndarray:
+        """
+        Load tick data as structured array of TICK_DTYPE, without creating
+        TickData objects.
+
+        Database driver should override this with a faster implementation.
+        """
+        ticks = self.load_tick_data(symbol, exchange, start, end)
+
+        rows = [
+            (tick.datetime.replace(tzinfo=None),)
+            + tuple(getattr(tick, name) for name in TICK_DTYPE.names[1:])
+            for tick in ticks
+        ]
+        return rows_to_array(rows, TICK_DTYPE)
+
     @abstractmethod
     def save_bar_data(
         self,
@@ -58,6 +179,35 @@ class BaseDatabaseManager(ABC):
     ):
         pass
 
+    def bulk_save_bar_data(
+        self,
+        datas: Sequence["BarData"],
+        chunk_size: int = 0,
+        defer_index: bool = False
+    ) -> float:
+        """
+        Save large amount of bar data and return throughput in rows/sec.
+
+        chunk_size and defer_index are only used by drivers supporting
+        tunable batch writing.
+        """
+        start = perf_counter()
+        self.save_bar_data(datas)
+        return calculate_throughput(len(datas), start)
+
+    def bulk_save_tick_data(
+        self,
+        datas: Sequence["TickData"],
+        chunk_size: int = 0,
+        defer_index: bool = False
+    ) -> float:
+        """
+        Save large amount of tick data and return throughput in rows/sec.
+        """
+        start = perf_counter()
+        self.save_tick_data(datas)
+        return calculate_throughput(len(datas), start)
+
     @abstractmethod
     def get_newest_bar_data(
         self,
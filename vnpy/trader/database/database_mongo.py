@@ -1,13 +1,27 @@
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Sequence, List
+from itertools import islice
+from typing import Dict, Optional, Sequence, List, Type
 
+import numpy as np
 from mongoengine import DateTimeField, Document, FloatField, StringField, connect
+from pymongo import UpdateOne
 
 from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData, TickData
 
-from .database import BaseDatabaseManager, Driver, DB_TZ
+from .database import (
+    BaseDatabaseManager,
+    Driver,
+    DB_TZ,
+    BAR_DTYPE,
+    TICK_DTYPE,
+    rows_to_array
+)
+
+
+FETCH_SIZE = 100_000
+BATCH_SIZE = 1000
 
 
 def init(_: Driver, settings: dict):
@@ -267,8 +281,35 @@ class DbTickData(Document):
         return tick
 
 
+def fetch_array(queryset, dtype: np.dtype) -> np.ndarray:
+    """
+    Fetch raw documents into structured array in chunks, without
+    creating document objects.
+    """
+    names = dtype.names
+    cursor = iter(queryset.only(*names).as_pymongo())
+
+    arrays = []
+    while True:
+        rows = [
+            tuple(d.get(name) for name in names)
+            for d in islice(cursor, FETCH_SIZE)
+        ]
+        if not rows:
+            break
+        arrays.append(rows_to_array(rows, dtype))
+
+    if not arrays:
+        return np.empty(0, dtype=dtype)
+    return np.concatenate(arrays)
+
+
 class MongoManager(BaseDatabaseManager):
 
+    def __init__(self, batch_size: int = BATCH_SIZE):
+        """"""
+        self.batch_size = batch_size
+
     def load_bar_data(
         self,
         symbol: str,
@@ -299,34 +340,100 @@ class MongoManager(BaseDatabaseManager):
         data = [db_tick.to_tick() for db_tick in s]
         return data
 
+    def load_bar_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+    ) -> np.ndarray:
+        s = DbBarData.objects(
+            symbol=symbol,
+            exchange=exchange.value,
+            interval=interval.value,
+            datetime__gte=start,
+            datetime__lte=end,
+        ).order_by("+datetime")
+        return fetch_array(s, BAR_DTYPE)
+
+    def load_tick_arrays(
+        self, symbol: str, exchange: Exchange, start: datetime, end: datetime
+    ) -> np.ndarray:
+        s = DbTickData.objects(
+            symbol=symbol,
+            exchange=exchange.value,
+            datetime__gte=start,
+            datetime__lte=end,
+        ).order_by("+datetime")
+        return fetch_array(s, TICK_DTYPE)
+
     @staticmethod
-    def to_update_param(d):
-        return {
-            "set__" + k: v.value if isinstance(v, Enum) else v
+    def to_document(d) -> dict:
+        document = {
+            k: v.value if isinstance(v, Enum) else v
             for k, v in d.__dict__.items()
         }
+        document.pop("gateway_name")
+        document.pop("vt_symbol")
+        return document
 
-    def save_bar_data(self, datas: Sequence[BarData]):
+    def bulk_upsert(
+        self,
+        document_class: Type[Document],
+        requests: List[UpdateOne]
+    ) -> Dict[str, int]:
+        """
+        Send upsert requests with unordered bulk_write in batches,
+        return count of inserted/modified/matched documents.
+        """
+        collection = document_class._get_collection()
+        counts = {"inserted": 0, "modified": 0, "matched": 0}
+
+        for i in range(0, len(requests), self.batch_size):
+            batch = requests[i: i + self.batch_size]
+            result = collection.bulk_write(batch, ordered=False)
+
+            counts["inserted"] += result.upserted_count
+            counts["modified"] += result.modified_count
+            counts["matched"] += result.matched_count
+
+        return counts
+
+    def save_bar_data(self, datas: Sequence[BarData]) -> Dict[str, int]:
+        requests = []
         for d in datas:
-            updates = self.to_update_param(d)
-            updates.pop("set__gateway_name")
-            updates.pop("set__vt_symbol")
-            (
-                DbBarData.objects(
-                    symbol=d.symbol, interval=d.interval.value, datetime=d.datetime
-                ).update_one(upsert=True, **updates)
+            document = self.to_document(d)
+            request = UpdateOne(
+                {
+                    "symbol": d.symbol,
+                    "exchange": document["exchange"],
+                    "interval": document["interval"],
+                    "datetime": d.datetime
+                },
+                {"$set": document},
+                upsert=True
             )
+            requests.append(request)
 
-    def save_tick_data(self, datas: Sequence[TickData]):
+        return self.bulk_upsert(DbBarData, requests)
+
+    def save_tick_data(self, datas: Sequence[TickData]) -> Dict[str, int]:
+        requests = []
         for d in datas:
-            updates = self.to_update_param(d)
-            updates.pop("set__gateway_name")
-            updates.pop("set__vt_symbol")
-            (
-                DbTickData.objects(
-                    symbol=d.symbol, exchange=d.exchange.value, datetime=d.datetime
-                ).update_one(upsert=True, **updates)
+            document = self.to_document(d)
+            request = UpdateOne(
+                {
+                    "symbol": d.symbol,
+                    "exchange": document["exchange"],
+                    "datetime": d.datetime
+                },
+                {"$set": document},
+                upsert=True
             )
+            requests.append(request)
+
+        return self.bulk_upsert(DbTickData, requests)
 
     def get_newest_bar_data(
         self, symbol: str, exchange: "Exchange", interval: "Interval"
@@ -0,0 +1,403 @@
+"""
+Columnar database stored with raw numpy files.
+
+Data of each symbol is partitioned into one file per day:
+    bar/{symbol}/{exchange}/{interval}/{YYYYMMDD}.dat
+    tick/{symbol}/{exchange}/{YYYYMMDD}.dat
+
+Each file is a plain array of BAR_DTYPE/TICK_DTYPE records sorted by
+datetime, so it can be memory-mapped for reading and appended directly
+when new data comes after existing ones.
+"""
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Optional, Sequence
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData, TickData
+from vnpy.trader.utility import get_folder_path
+
+from .database import BaseDatabaseManager, Driver, DB_TZ, BAR_DTYPE, TICK_DTYPE
+
+
+BAR_FIELDS = BAR_DTYPE.names[1:]
+TICK_FIELDS = TICK_DTYPE.names[1:]
+FILE_SUFFIX = ".dat"
+
+
+def init(_: Driver, settings: dict):
+    path = get_folder_path(settings["database"])
+    return NumpyManager(path)
+
+
+def to_db_datetime(dt: datetime) -> datetime:
+    """
+    Change datetime to database timezone and remove tzinfo.
+    """
+    if dt.tzinfo:
+        dt = dt.astimezone(DB_TZ)
+        dt = dt.replace(tzinfo=None)
+    return dt
+
+
+def get_data_files(folder: Path, start: datetime = None, end: datetime = None) -> List[Path]:
+    """
+    Get sorted day files in folder within date range.
+    """
+    if not folder.exists():
+        return []
+
+    files = sorted(folder.glob(f"*{FILE_SUFFIX}"))
+
+    if start:
+        start_stem = start.strftime("%Y%m%d")
+        files = [f for f in files if f.stem >= start_stem]
+
+    if end:
+        end_stem = end.strftime("%Y%m%d")
+        files = [f for f in files if f.stem <= end_stem]
+
+    return files
+
+
+def read_file(path: Path, dtype: np.dtype) -> np.ndarray:
+    """
+    Memory-map a day file for reading.
+    """
+    if not path.stat().st_size:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
+
+
+def read_record(path: Path, dtype: np.dtype, last: bool) -> Optional[np.void]:
+    """
+    Read first or last record of a day file.
+    """
+    size = path.stat().st_size
+    if not size:
+        return None
+
+    offset = size - dtype.itemsize if last else 0
+    array = np.fromfile(path, dtype=dtype, count=1, offset=offset)
+    return array[0]
+
+
+def load_array(
+    folder: Path,
+    dtype: np.dtype,
+    start: datetime,
+    end: datetime
+) -> np.ndarray:
+    """
+    Load records within [start, end] from day files in folder.
+    """
+    start = to_db_datetime(start)
+    end = to_db_datetime(end)
+
+    start_dt = np.datetime64(start, "us")
+    end_dt = np.datetime64(end, "us")
+
+    arrays = []
+    for path in get_data_files(folder, start, end):
+        array = read_file(path, dtype)
+        dts = array["datetime"]
+
+        # Only first and last day may contain data out of range
+        if dts.size and (dts[0] < start_dt or dts[-1] > end_dt):
+            left = np.searchsorted(dts, start_dt, side="left")
+            right = np.searchsorted(dts, end_dt, side="right")
+            array = array[left:right]
+
+        arrays.append(array)
+
+    if not arrays:
+        return np.empty(0, dtype=dtype)
+    return np.concatenate(arrays)
+
+
+def drop_duplicates(array: np.ndarray) -> np.ndarray:
+    """
+    Sort records by datetime and keep the last one of same datetime.
+    """
+    array = array[np.argsort(array["datetime"], kind="stable")]
+    dts = array["datetime"]
+    mask = np.append(dts[1:] != dts[:-1], True)
+    return array[mask]
+
+
+def write_file(path: Path, array: np.ndarray):
+    """
+    Write records into a new file and replace the old one.
+    """
+    temp_path = path.with_suffix(".tmp")
+    array.tofile(temp_path)
+    os.replace(temp_path, path)
+
+
+def save_array(folder: Path, array: np.ndarray):
+    """
+    Save records into day files of folder, update if exists.
+    """
+    if not array.size:
+        return
+
+    if not folder.exists():
+        folder.mkdir(parents=True)
+
+    array = drop_duplicates(array)
+    dates = array["datetime"].astype("datetime64[D]")
+    ixs = np.flatnonzero(dates[1:] != dates[:-1]) + 1
+
+    for day_array in np.split(array, ixs):
+        date = day_array["datetime"][0].astype(datetime)
+        path = folder.joinpath(date.strftime("%Y%m%d") + FILE_SUFFIX)
+
+        last = None
+        if path.exists():
+            last = read_record(path, array.dtype, True)
+
+        # Append new data directly, otherwise merge with old data
+        if last is None or day_array["datetime"][0] > last["datetime"]:
+            with open(path, "ab") as f:
+                day_array.tofile(f)
+        else:
+            old_array = np.fromfile(path, dtype=array.dtype)
+            new_array = drop_duplicates(np.concatenate([old_array, day_array]))
+            write_file(path, new_array)
+
+
+def to_bar_array(bars: Sequence[BarData]) -> np.ndarray:
+    """"""
+    return np.array(
+        [
+            (
+                to_db_datetime(bar.datetime),
+                bar.volume,
+                bar.open_interest,
+                bar.open_price,
+                bar.high_price,
+                bar.low_price,
+                bar.close_price
+            )
+            for bar in bars
+        ],
+        dtype=BAR_DTYPE
+    )
+
+
+def to_tick_array(ticks: Sequence[TickData]) -> np.ndarray:
+    """"""
+    return np.array(
+        [
+            (to_db_datetime(tick.datetime),)
+            + tuple(getattr(tick, name) for name in TICK_FIELDS)
+            for tick in ticks
+        ],
+        dtype=TICK_DTYPE
+    )
+
+
+def to_bars(
+    array: np.ndarray,
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval
+) -> List[BarData]:
+    """"""
+    dts = array["datetime"].astype(datetime)
+    columns = [array[name].tolist() for name in BAR_FIELDS]
+
+    bars = [
+        BarData(
+            symbol=symbol,
+            exchange=exchange,
+            datetime=dt.replace(tzinfo=DB_TZ),
+            interval=interval,
+            volume=volume,
+            open_interest=open_interest,
+            open_price=open_price,
+            high_price=high_price,
+            low_price=low_price,
+            close_price=close_price,
+            gateway_name="DB"
+        )
+        for dt, volume, open_interest, open_price, high_price, low_price, close_price
+        in zip(dts, *columns)
+    ]
+    return bars
+
+
+def to_ticks(array: np.ndarray, symbol: str, exchange: Exchange) -> List[TickData]:
+    """"""
+    dts = array["datetime"].astype(datetime)
+    columns = [array[name].tolist() for name in TICK_FIELDS]
+
+    ticks = [
+        TickData(
+            symbol=symbol,
+            exchange=exchange,
+            datetime=dt.replace(tzinfo=DB_TZ),
+            gateway_name="DB",
+            **dict(zip(TICK_FIELDS, values))
+        )
+        for dt, *values in zip(dts, *columns)
+    ]
+    return ticks
+
+
+class NumpyManager(BaseDatabaseManager):
+
+    def __init__(self, path: Path):
+        """"""
+        self.bar_path = path.joinpath("bar")
+        self.tick_path = path.joinpath("tick")
+
+    def get_bar_folder(
+        self, symbol: str, exchange: Exchange, interval: Interval
+    ) -> Path:
+        """"""
+        return self.bar_path.joinpath(symbol, exchange.value, interval.value)
+
+    def get_tick_folder(self, symbol: str, exchange: Exchange) -> Path:
+        """"""
+        return self.tick_path.joinpath(symbol, exchange.value)
+
+    def load_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+    ) -> Sequence[BarData]:
+        folder = self.get_bar_folder(symbol, exchange, interval)
+        array = load_array(folder, BAR_DTYPE, start, end)
+        return to_bars(array, symbol, exchange, interval)
+
+    def load_tick_data(
+        self, symbol: str, exchange: Exchange, start: datetime, end: datetime
+    ) -> Sequence[TickData]:
+        folder = self.get_tick_folder(symbol, exchange)
+        array = load_array(folder, TICK_DTYPE, start, end)
+        return to_ticks(array, symbol, exchange)
+
+    def load_bar_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+    ) -> np.ndarray:
+        folder = self.get_bar_folder(symbol, exchange, interval)
+        return load_array(folder, BAR_DTYPE, start, end)
+
+    def load_tick_arrays(
+        self, symbol: str, exchange: Exchange, start: datetime, end: datetime
+    ) -> np.ndarray:
+        folder = self.get_tick_folder(symbol, exchange)
+        return load_array(folder, TICK_DTYPE, start, end)
+
+    def save_bar_data(self, datas: Sequence[BarData]):
+        groups = {}
+        for bar in datas:
+            key = (bar.symbol, bar.exchange, bar.interval)
+            groups.setdefault(key, []).append(bar)
+
+        for key, bars in groups.items():
+            folder = self.get_bar_folder(*key)
+            save_array(folder, to_bar_array(bars))
+
+    def save_tick_data(self, datas: Sequence[TickData]):
+        groups = {}
+        for tick in datas:
+            key = (tick.symbol, tick.exchange)
+            groups.setdefault(key, []).append(tick)
+
+        for key, ticks in groups.items():
+            folder = self.get_tick_folder(*key)
+            save_array(folder, to_tick_array(ticks))
+
+    def get_newest_bar_data(
+        self, symbol: str, exchange: "Exchange", interval: "Interval"
+    ) -> Optional["BarData"]:
+        folder = self.get_bar_folder(symbol, exchange, interval)
+        for path in reversed(get_data_files(folder)):
+            record = read_record(path, BAR_DTYPE, True)
+            if record is not None:
+                return to_bars(record.reshape(1), symbol, exchange, interval)[0]
+        return None
+
+    def get_oldest_bar_data(
+        self, symbol: str, exchange: "Exchange", interval: "Interval"
+    ) -> Optional["BarData"]:
+        folder = self.get_bar_folder(symbol, exchange, interval)
+        for path in get_data_files(folder):
+            record = read_record(path, BAR_DTYPE, False)
+            if record is not None:
+                return to_bars(record.reshape(1), symbol, exchange, interval)[0]
+        return None
+
+    def get_newest_tick_data(
+        self, symbol: str, exchange: "Exchange"
+    ) -> Optional["TickData"]:
+        folder = self.get_tick_folder(symbol, exchange)
+        for path in reversed(get_data_files(folder)):
+            record = read_record(path, TICK_DTYPE, True)
+            if record is not None:
+                return to_ticks(record.reshape(1), symbol, exchange)[0]
+        return None
+
+    def get_bar_data_statistics(self) -> List[Dict]:
+        """"""
+        result = []
+
+        if not self.bar_path.exists():
+            return result
+
+        for folder in sorted(self.bar_path.glob("*/*/*")):
+            count = sum(
+                path.stat().st_size // BAR_DTYPE.itemsize
+                for path in get_data_files(folder)
+            )
+            if not count:
+                continue
+
+            result.append({
+                "symbol": folder.parent.parent.name,
+                "exchange": folder.parent.name,
+                "interval": folder.name,
+                "count": count
+            })
+
+        return result
+
+    def delete_bar_data(
+        self,
+        symbol: str,
+        exchange: "Exchange",
+        interval: "Interval"
+    ) -> int:
+        """
+        Delete all bar data with given symbol + exchange + interval.
+        """
+        folder = self.get_bar_folder(symbol, exchange, interval)
+        if not folder.exists():
+            return 0
+
+        count = sum(
+            path.stat().st_size // BAR_DTYPE.itemsize
+            for path in get_data_files(folder)
+        )
+        shutil.rmtree(folder)
+        return count
+
+    def clean(self, symbol: str):
+        for path in [self.bar_path, self.tick_path]:
+            folder = path.joinpath(symbol)
+            if folder.exists():
+                shutil.rmtree(folder)
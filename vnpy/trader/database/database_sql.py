@@ -1,7 +1,11 @@
 """"""
+import csv
 from datetime import datetime
-from typing import List, Dict, Optional, Sequence, Type
+from io import StringIO
+from time import perf_counter
+from typing import List, Dict, Optional, Sequence, Tuple, Type
 
+import numpy as np
 from peewee import (
     AutoField,
     CharField,
@@ -9,6 +13,7 @@ from peewee import (
     DateTimeField,
     FloatField,
     Model,
+    ModelSelect,
     MySQLDatabase,
     PostgresqlDatabase,
     SqliteDatabase,
@@ -20,7 +25,33 @@ from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData, TickData
 from vnpy.trader.utility import get_file_path
 
-from .database import BaseDatabaseManager, Driver, DB_TZ
+from .database import (
+    BaseDatabaseManager,
+    Driver,
+    DB_TZ,
+    BAR_DTYPE,
+    TICK_DTYPE,
+    rows_to_array,
+    calculate_throughput
+)
+
+
+FETCH_SIZE = 100_000
+CHUNK_SIZE = 10_000
+
+BAR_COLUMNS = (
+    "symbol",
+    "exchange",
+    "datetime",
+    "interval",
+    "volume",
+    "open_interest",
+    "open_price",
+    "high_price",
+    "low_price",
+    "close_price",
+)
+TICK_COLUMNS = ("symbol", "exchange") + TICK_DTYPE.names
 
 
 def init(driver: Driver, settings: dict):
@@ -33,7 +64,7 @@ def init(driver: Driver, settings: dict):
 
     db = init_funcs[driver](settings)
     bar, tick = init_models(db, driver)
-    return SqlManager(bar, tick)
+    return SqlManager(bar, tick, driver)
 
 
 def init_sqlite(settings: dict):
@@ -336,11 +367,221 @@ def init_models(db: Database, driver: Driver):
     return DbBarData, DbTickData
 
 
+def fetch_array(query: ModelSelect, dtype: np.dtype) -> np.ndarray:
+    """
+    Fetch query result into structured array with raw database cursor,
+    rows are fetched in chunks without creating model objects.
+    """
+    db = query.model._meta.database
+    cursor = db.execute(query)
+
+    arrays = []
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        arrays.append(rows_to_array(rows, dtype))
+
+    if not arrays:
+        return np.empty(0, dtype=dtype)
+    return np.concatenate(arrays)
+
+
+def to_db_datetime(dt: datetime) -> datetime:
+    """
+    Change datetime to database timezone, then
+    remove tzinfo since not supported by SQLite.
+    """
+    dt = dt.astimezone(DB_TZ)
+    return dt.replace(tzinfo=None)
+
+
+def bar_to_row(bar: BarData) -> tuple:
+    """
+    Convert bar into row values ordered as BAR_COLUMNS.
+    """
+    return (
+        bar.symbol,
+        bar.exchange.value,
+        to_db_datetime(bar.datetime),
+        bar.interval.value,
+        float(bar.volume),
+        float(bar.open_interest),
+        float(bar.open_price),
+        float(bar.high_price),
+        float(bar.low_price),
+        float(bar.close_price),
+    )
+
+
+def tick_to_row(tick: TickData) -> tuple:
+    """
+    Convert tick into row values ordered as TICK_COLUMNS.
+    """
+    return (
+        tick.symbol,
+        tick.exchange.value,
+        to_db_datetime(tick.datetime),
+        tick.name,
+    ) + tuple(float(getattr(tick, name)) for name in TICK_COLUMNS[4:])
+
+
+class BulkWriter:
+    """
+    Write rows into table of a model with raw cursor.
+
+    Rows are upserted with executemany (or multi-row VALUES on PostgreSQL)
+    in chunks. When index is deferred, the unique index is dropped during
+    loading, rows are inserted directly (COPY on PostgreSQL), then duplicate
+    rows are removed before index is created again.
+    """
+
+    def __init__(self, model: Type[Model], driver: Driver, columns: Tuple[str]):
+        """"""
+        self.model = model
+        self.driver = driver
+        self.columns = columns
+        self.db: Database = model._meta.database
+
+        self.table = self.quote(model._meta.table_name)
+        self.keys = model._meta.indexes[0][0]
+
+    def quote(self, name: str) -> str:
+        """"""
+        return f"{self.db.quote[0]}{name}{self.db.quote[1]}"
+
+    def get_insert_sql(self, upsert: bool) -> str:
+        """"""
+        columns = ", ".join(self.quote(c) for c in self.columns)
+
+        if self.driver is Driver.POSTGRESQL:
+            sql = f"INSERT INTO {self.table} ({columns}) VALUES %s"
+            if upsert:
+                keys = ", ".join(self.quote(k) for k in self.keys)
+                updates = ", ".join(
+                    f"{self.quote(c)} = EXCLUDED.{self.quote(c)}"
+                    for c in self.columns if c not in self.keys
+                )
+                sql += f" ON CONFLICT ({keys}) DO UPDATE SET {updates}"
+            return sql
+
+        params = ", ".join([self.db.param] * len(self.columns))
+        if not upsert:
+            command = "INSERT INTO"
+        elif self.driver is Driver.SQLITE:
+            command = "INSERT OR REPLACE INTO"
+        else:
+            command = "REPLACE INTO"
+        return f"{command} {self.table} ({columns}) VALUES ({params})"
+
+    def write(self, rows: List[tuple], chunk_size: int, defer_index: bool):
+        """
+        Write rows in one transaction. DDL commits implicitly on MySQL, so
+        with defer_index the index is dropped and created outside the
+        transaction there, and the write is not atomic as a whole.
+        """
+        # Upsert of PostgreSQL fails if same keys appear twice in one statement
+        if self.driver is Driver.POSTGRESQL and not defer_index:
+            rows = self.deduplicate(rows)
+
+        separate_ddl = defer_index and self.driver is Driver.MYSQL
+        if separate_ddl:
+            self.drop_indexes()
+
+        try:
+            with self.db.atomic():
+                if defer_index and not separate_ddl:
+                    self.drop_indexes()
+
+                cursor = self.db.cursor()
+
+                if defer_index and self.driver is Driver.POSTGRESQL:
+                    self.copy_rows(cursor, rows)
+                else:
+                    self.insert_rows(cursor, rows, chunk_size, not defer_index)
+
+                if defer_index:
+                    self.delete_duplicates(cursor)
+
+                    if not separate_ddl:
+                        self.model._schema.create_indexes(safe=True)
+        finally:
+            # Index is always restored even if loading failed
+            if separate_ddl:
+                self.model._schema.create_indexes(safe=True)
+
+    def deduplicate(self, rows: List[tuple]) -> List[tuple]:
+        """
+        Keep only the last row of same index keys.
+        """
+        positions = [self.columns.index(k) for k in self.keys]
+
+        unique_rows = {}
+        for row in rows:
+            unique_rows[tuple(row[i] for i in positions)] = row
+
+        if len(unique_rows) == len(rows):
+            return rows
+        return list(unique_rows.values())
+
+    def insert_rows(self, cursor, rows: List[tuple], chunk_size: int, upsert: bool):
+        """"""
+        sql = self.get_insert_sql(upsert)
+
+        if self.driver is Driver.POSTGRESQL:
+            from psycopg2.extras import execute_values
+            execute_values(cursor, sql, rows, page_size=chunk_size)
+        else:
+            for c in chunked(rows, chunk_size):
+                cursor.executemany(sql, c)
+
+    def copy_rows(self, cursor, rows: List[tuple]):
+        """"""
+        buf = StringIO()
+        csv.writer(buf).writerows(rows)
+        buf.seek(0)
+
+        columns = ", ".join(self.quote(c) for c in self.columns)
+        cursor.copy_expert(
+            f"COPY {self.table} ({columns}) FROM STDIN WITH CSV", buf
+        )
+
+    def drop_indexes(self):
+        """"""
+        for index in self.model._meta.fields_to_index():
+            name = self.quote(index._name)
+            if self.driver is Driver.MYSQL:
+                self.db.execute_sql(f"DROP INDEX {name} ON {self.table}")
+            else:
+                self.db.execute_sql(f"DROP INDEX IF EXISTS {name}")
+
+    def delete_duplicates(self, cursor):
+        """
+        Keep only the newest inserted row of same index keys.
+        """
+        keys = ", ".join(self.quote(k) for k in self.keys)
+        cursor.execute(
+            f"DELETE FROM {self.table} WHERE id NOT IN ("
+            f"SELECT id FROM (SELECT MAX(id) AS id FROM {self.table} "
+            f"GROUP BY {keys}) AS newest)"
+        )
+
+
 class SqlManager(BaseDatabaseManager):
 
-    def __init__(self, class_bar: Type[Model], class_tick: Type[Model]):
+    def __init__(
+        self,
+        class_bar: Type[Model],
+        class_tick: Type[Model],
+        driver: Driver = Driver.SQLITE,
+        chunk_size: int = CHUNK_SIZE
+    ):
         self.class_bar = class_bar
         self.class_tick = class_tick
+        self.chunk_size = chunk_size
+
+        self.bar_writer = BulkWriter(class_bar, driver, BAR_COLUMNS)
+        self.tick_writer = BulkWriter(class_tick, driver, TICK_COLUMNS)
 
     def load_bar_data(
         self,
@@ -381,13 +622,75 @@ class SqlManager(BaseDatabaseManager):
         data = [db_tick.to_tick() for db_tick in s]
         return data
 
+    def load_bar_arrays(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+    ) -> np.ndarray:
+        fields = [getattr(self.class_bar, name) for name in BAR_DTYPE.names]
+        s = (
+            self.class_bar.select(*fields)
+                .where(
+                (self.class_bar.symbol == symbol)
+                & (self.class_bar.exchange == exchange.value)
+                & (self.class_bar.interval == interval.value)
+                & (self.class_bar.datetime >= start)
+                & (self.class_bar.datetime <= end)
+            )
+            .order_by(self.class_bar.datetime)
+        )
+        return fetch_array(s, BAR_DTYPE)
+
+    def load_tick_arrays(
+        self, symbol: str, exchange: Exchange, start: datetime, end: datetime
+    ) -> np.ndarray:
+        fields = [getattr(self.class_tick, name) for name in TICK_DTYPE.names]
+        s = (
+            self.class_tick.select(*fields)
+                .where(
+                (self.class_tick.symbol == symbol)
+                & (self.class_tick.exchange == exchange.value)
+                & (self.class_tick.datetime >= start)
+                & (self.class_tick.datetime <= end)
+            )
+            .order_by(self.class_tick.datetime)
+        )
+        return fetch_array(s, TICK_DTYPE)
+
     def save_bar_data(self, datas: Sequence[BarData]):
-        ds = [self.class_bar.from_bar(i) for i in datas]
-        self.class_bar.save_all(ds)
+        rows = [bar_to_row(bar) for bar in datas]
+        self.bar_writer.write(rows, self.chunk_size, False)
 
     def save_tick_data(self, datas: Sequence[TickData]):
-        ds = [self.class_tick.from_tick(i) for i in datas]
-        self.class_tick.save_all(ds)
+        rows = [tick_to_row(tick) for tick in datas]
+        self.tick_writer.write(rows, self.chunk_size, False)
+
+    def bulk_save_bar_data(
+        self,
+        datas: Sequence[BarData],
+        chunk_size: int = 0,
+        defer_index: bool = False
+    ) -> float:
+        """"""
+        start = perf_counter()
+        rows = [bar_to_row(bar) for bar in datas]
+        self.bar_writer.write(rows, chunk_size or self.chunk_size, defer_index)
+        return calculate_throughput(len(rows), start)
+
+    def bulk_save_tick_data(
+        self,
+        datas: Sequence[TickData],
+        chunk_size: int = 0,
+        defer_index: bool = False
+    ) -> float:
+        """"""
+        start = perf_counter()
+        rows = [tick_to_row(tick) for tick in datas]
+        self.tick_writer.write(rows, chunk_size or self.chunk_size, defer_index)
+        return calculate_throughput(len(rows), start)
 
     def get_newest_bar_data(
         self, symbol: str, exchange: "Exchange", interval: "Interval"
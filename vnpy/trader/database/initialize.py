@@ -6,6 +6,8 @@ def init(settings: dict) -> BaseDatabaseManager:
     driver = Driver(settings["driver"])
     if driver is Driver.MONGODB:
         return init_nosql(driver=driver, settings=settings)
+    elif driver is Driver.NUMPY:
+        return init_numpy(driver=driver, settings=settings)
     else:
         return init_sql(driver=driver, settings=settings)
 
@@ -22,3 +24,9 @@ def init_nosql(driver: Driver, settings: dict):
     from .database_mongo import init
     _database_manager = init(driver, settings=settings)
     return _database_manager
+
+
+def init_numpy(driver: Driver, settings: dict):
+    from .database_numpy import init
+    _database_manager = init(driver, settings=settings)
+    return _database_manager
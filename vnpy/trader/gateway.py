@@ -255,6 +255,13 @@ class BaseGateway(ABC):
         """
         pass
 
+    def get_latency_stats(self) -> Dict[str, Any]:
+        """
+        Return latency statistics of requests sent to server.
+        Reimplement this function if statistics recorded by gateway.
+        """
+        return {}
+
     def get_default_setting(self) -> Dict[str, Any]:
         """
         Return default setting dict.
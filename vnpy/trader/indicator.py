@@ -0,0 +1,299 @@
+"""
+Incremental technical indicators updated bar by bar with O(1) running state.
+
+Calculation follows TA-Lib, so values are the same as TA-Lib functions
+calculated on the same bar series (within floating point error) after
+warm-up period.
+"""
+
+from collections import deque
+from math import sqrt
+from typing import Deque, Tuple
+
+import numpy as np
+
+
+class Indicator:
+    """
+    Base class of incremental indicator.
+    """
+
+    def __init__(self):
+        """"""
+        self.count: int = 0
+        self.value: float = np.nan
+
+    def update(self, high: float, low: float, close: float) -> None:
+        """
+        Update indicator state with new bar.
+        """
+        pass
+
+
+class SmaIndicator(Indicator):
+    """
+    Simple moving average of close price.
+    """
+
+    def __init__(self, n: int):
+        """"""
+        super().__init__()
+
+        self.n: int = n
+        self.values: Deque[float] = deque()
+        self.total: float = 0
+
+    def update(self, high: float, low: float, close: float) -> None:
+        """"""
+        self.count += 1
+
+        self.values.append(close)
+        self.total += close
+
+        if len(self.values) > self.n:
+            self.total -= self.values.popleft()
+
+        # Recalculate sum once every n bars to avoid accumulated error
+        if not self.count % self.n:
+            self.total = sum(self.values)
+
+        if self.count >= self.n:
+            self.value = self.total / self.n
+
+
+class EmaIndicator(Indicator):
+    """
+    Exponential moving average of close price, seeded with SMA of first
+    n values.
+    """
+
+    def __init__(self, n: int):
+        """"""
+        super().__init__()
+
+        self.n: int = n
+        self.k: float = 2 / (n + 1)
+        self.total: float = 0
+
+    def update(self, high: float, low: float, close: float) -> None:
+        """"""
+        self.count += 1
+
+        if self.count < self.n:
+            self.total += close
+        elif self.count == self.n:
+            self.total += close
+            self.value = self.total / self.n
+        else:
+            self.value = (close - self.value) * self.k + self.value
+
+
+class StdIndicator(Indicator):
+    """
+    Population standard deviation of close price.
+    """
+
+    def __init__(self, n: int):
+        """"""
+        super().__init__()
+
+        self.n: int = n
+        self.values: Deque[float] = deque()
+        self.total: float = 0
+        self.total_square: float = 0
+
+    def update(self, high: float, low: float, close: float) -> None:
+        """"""
+        self.count += 1
+
+        self.values.append(close)
+        self.total += close
+        self.total_square += close * close
+
+        if len(self.values) > self.n:
+            old = self.values.popleft()
+            self.total -= old
+            self.total_square -= old * old
+
+        # Recalculate sums once every n bars to avoid accumulated error
+        if not self.count % self.n:
+            self.total = sum(self.values)
+            self.total_square = sum(v * v for v in self.values)
+
+        if self.count >= self.n:
+            mean = self.total / self.n
+            variance = self.total_square / self.n - mean * mean
+
+            if variance > 1e-8:
+                self.value = sqrt(variance)
+            else:
+                self.value = 0
+
+
+class AtrIndicator(Indicator):
+    """
+    Average true range with Wilder smoothing.
+    """
+
+    def __init__(self, n: int):
+        """"""
+        super().__init__()
+
+        self.n: int = n
+        self.pre_close: float = 0
+        self.total: float = 0
+
+    def update(self, high: float, low: float, close: float) -> None:
+        """"""
+        self.count += 1
+
+        if self.count > 1:
+            tr = max(high, self.pre_close) - min(low, self.pre_close)
+
+            # True range needs previous close, so first ATR is on bar n + 1
+            if self.count <= self.n:
+                self.total += tr
+            elif self.count == self.n + 1:
+                self.total += tr
+                self.value = self.total / self.n
+            else:
+                self.value = (self.value * (self.n - 1) + tr) / self.n
+
+        self.pre_close = close
+
+
+class RsiIndicator(Indicator):
+    """
+    Relative strength index with Wilder smoothing.
+    """
+
+    def __init__(self, n: int):
+        """"""
+        super().__init__()
+
+        self.n: int = n
+        self.pre_close: float = 0
+        self.gain: float = 0
+        self.loss: float = 0
+
+    def update(self, high: float, low: float, close: float) -> None:
+        """"""
+        self.count += 1
+
+        if self.count > 1:
+            diff = close - self.pre_close
+
+            if self.count <= self.n + 1:
+                if diff < 0:
+                    self.loss -= diff
+                else:
+                    self.gain += diff
+
+                if self.count == self.n + 1:
+                    self.gain /= self.n
+                    self.loss /= self.n
+                    self.calculate_value()
+            else:
+                self.gain *= (self.n - 1)
+                self.loss *= (self.n - 1)
+
+                if diff < 0:
+                    self.loss -= diff
+                else:
+                    self.gain += diff
+
+                self.gain /= self.n
+                self.loss /= self.n
+                self.calculate_value()
+
+        self.pre_close = close
+
+    def calculate_value(self) -> None:
+        """"""
+        total = self.gain + self.loss
+
+        if -1e-8 < total < 1e-8:
+            self.value = 0
+        else:
+            self.value = 100 * self.gain / total
+
+
+class DonchianIndicator(Indicator):
+    """
+    Highest high and lowest low of last n bars, using monotonic queues.
+    """
+
+    def __init__(self, n: int):
+        """"""
+        super().__init__()
+
+        self.n: int = n
+        self.highs: Deque[Tuple[int, float]] = deque()
+        self.lows: Deque[Tuple[int, float]] = deque()
+
+        self.value: Tuple[float, float] = (np.nan, np.nan)
+
+    def update(self, high: float, low: float, close: float) -> None:
+        """"""
+        self.count += 1
+
+        while self.highs and self.highs[-1][1] <= high:
+            self.highs.pop()
+        self.highs.append((self.count, high))
+
+        while self.lows and self.lows[-1][1] >= low:
+            self.lows.pop()
+        self.lows.append((self.count, low))
+
+        start = self.count - self.n
+        if self.highs[0][0] <= start:
+            self.highs.popleft()
+        if self.lows[0][0] <= start:
+            self.lows.popleft()
+
+        if self.count >= self.n:
+            self.value = (self.highs[0][1], self.lows[0][1])
+
+
+class MacdIndicator(Indicator):
+    """
+    MACD line, signal line and histogram.
+
+    Same as TA-Lib, fast EMA is seeded with SMA of the fast period window
+    ending at the same bar as the window of slow EMA seed.
+    """
+
+    def __init__(self, fast_period: int, slow_period: int, signal_period: int):
+        """"""
+        super().__init__()
+
+        # Periods are swapped if slow period is less than fast period
+        if slow_period < fast_period:
+            fast_period, slow_period = slow_period, fast_period
+
+        self.fast_ema: EmaIndicator = EmaIndicator(fast_period)
+        self.slow_ema: EmaIndicator = EmaIndicator(slow_period)
+        self.signal_ema: EmaIndicator = EmaIndicator(signal_period)
+
+        # Number of bars skipped before updating fast EMA
+        self.fast_offset: int = slow_period - fast_period
+
+        self.value: Tuple[float, float, float] = (np.nan, np.nan, np.nan)
+
+    def update(self, high: float, low: float, close: float) -> None:
+        """"""
+        self.count += 1
+
+        if self.count > self.fast_offset:
+            self.fast_ema.update(high, low, close)
+        self.slow_ema.update(high, low, close)
+
+        if self.slow_ema.count < self.slow_ema.n:
+            return
+
+        macd = self.fast_ema.value - self.slow_ema.value
+        self.signal_ema.update(macd, macd, macd)
+
+        if self.signal_ema.count >= self.signal_ema.n:
+            signal = self.signal_ema.value
+            self.value = (macd, signal, macd - signal)
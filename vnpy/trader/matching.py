@@ -0,0 +1,247 @@
+"""
+Order book aware matching model for tick mode backtesting.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from .constant import Direction
+from .object import TickData
+
+
+class MatchingOrder:
+    """
+    Matching state of one limit order.
+    """
+
+    def __init__(
+        self,
+        orderid: str,
+        direction: Direction,
+        price: float,
+        volume: float,
+        active_time: datetime
+    ):
+        """"""
+        self.orderid: str = orderid
+        self.direction: Direction = direction
+        self.price: float = price
+        self.volume: float = volume
+        self.traded: float = 0
+
+        # Order can only be matched after arriving at exchange
+        self.active_time: datetime = active_time
+        self.arrived: bool = False
+
+        # Estimated volume queued before the order at same price,
+        # None if price level of the order is not displayed yet.
+        self.queue_ahead: float = None
+
+    @property
+    def remaining(self) -> float:
+        """"""
+        return self.volume - self.traded
+
+
+class TickMatchingModel:
+    """
+    Match limit orders with 5 level depth of tick data:
+    1. order arrives at exchange after latency (in milliseconds)
+    2. when arriving, order takes volume of opposite price levels which
+       can be crossed, and may be partially filled
+    3. rest volume of order waits in queue (FIFO) behind volume displayed
+       at same price level, queue moves forward with traded volume at that
+       price and shrinks with cancelled volume
+    4. resting order is filled completely when market trades through
+       its price
+    """
+
+    def __init__(self, latency: int = 0, queue_position: bool = True):
+        """"""
+        self.latency: timedelta = timedelta(milliseconds=latency)
+        self.queue_position: bool = queue_position
+
+        self.orders: Dict[str, MatchingOrder] = {}
+        self.last_volume: float = 0
+
+    def __repr__(self) -> str:
+        """"""
+        latency = int(self.latency.total_seconds() * 1000)
+        return f"{self.__class__.__name__}(latency={latency}, queue_position={self.queue_position})"
+
+    def clear(self) -> None:
+        """
+        Clear all data of last backtesting.
+        """
+        self.orders.clear()
+        self.last_volume = 0
+
+    def add_order(
+        self,
+        orderid: str,
+        direction: Direction,
+        price: float,
+        volume: float,
+        dt: datetime
+    ) -> None:
+        """
+        Add new limit order sent at dt.
+        """
+        order = MatchingOrder(orderid, direction, price, volume, dt + self.latency)
+        self.orders[orderid] = order
+
+    def cancel_order(self, orderid: str) -> None:
+        """"""
+        self.orders.pop(orderid, None)
+
+    def match(self, tick: TickData) -> List[Tuple[str, float, float]]:
+        """
+        Match all orders with new tick, return list of (orderid, price,
+        volume) of each fill.
+        """
+        fills = []
+
+        traded_volume = max(tick.volume - self.last_volume, 0)
+        self.last_volume = tick.volume
+
+        # Volume taken by orders on each price level in this tick
+        taken = {}
+
+        for order in list(self.orders.values()):
+            if tick.datetime < order.active_time:
+                continue
+
+            if not order.arrived:
+                order.arrived = True
+                order_fills = self.match_arrived_order(order, tick, taken)
+            else:
+                order_fills = self.match_resting_order(order, tick, traded_volume)
+
+            for price, volume in order_fills:
+                order.traded += volume
+                fills.append((order.orderid, price, volume))
+
+            if order.remaining <= 0:
+                self.orders.pop(order.orderid)
+            elif self.queue_position:
+                self.update_queue(order, tick)
+
+        return fills
+
+    def match_arrived_order(
+        self,
+        order: MatchingOrder,
+        tick: TickData,
+        taken: Dict[Tuple[Direction, float], float]
+    ) -> List[Tuple[float, float]]:
+        """
+        Take volume of crossed price levels on the opposite side.
+        """
+        fills = []
+        remaining = order.remaining
+
+        if order.direction == Direction.LONG:
+            prefix = "ask"
+        else:
+            prefix = "bid"
+
+        for i in range(1, 6):
+            price = getattr(tick, f"{prefix}_price_{i}")
+            volume = getattr(tick, f"{prefix}_volume_{i}")
+
+            if not price:
+                break
+
+            if order.direction == Direction.LONG and price > order.price:
+                break
+            if order.direction == Direction.SHORT and price < order.price:
+                break
+
+            key = (order.direction, price)
+            available = volume - taken.get(key, 0)
+            if available <= 0:
+                continue
+
+            fill_volume = min(remaining, available)
+            fills.append((price, fill_volume))
+
+            taken[key] = taken.get(key, 0) + fill_volume
+            remaining -= fill_volume
+
+            if not remaining:
+                break
+
+        return fills
+
+    def match_resting_order(
+        self,
+        order: MatchingOrder,
+        tick: TickData,
+        traded_volume: float
+    ) -> List[Tuple[float, float]]:
+        """
+        Fill resting order with market crossing or trading at its price.
+        """
+        if order.direction == Direction.LONG:
+            cross_price = tick.ask_price_1
+            crossed = 0 < cross_price <= order.price
+            traded_through = traded_volume and tick.last_price < order.price
+        else:
+            cross_price = tick.bid_price_1
+            crossed = cross_price >= order.price
+            traded_through = traded_volume and tick.last_price > order.price
+
+        # Market has moved through order price, so all queue before
+        # the order must have been filled.
+        if crossed or traded_through:
+            return [(order.price, order.remaining)]
+
+        if not traded_volume or tick.last_price != order.price:
+            return []
+
+        if not self.queue_position:
+            return [(order.price, min(order.remaining, traded_volume))]
+
+        # Traded volume at order price consumes queue ahead first.
+        queue_ahead = order.queue_ahead or 0
+
+        if traded_volume <= queue_ahead:
+            order.queue_ahead = queue_ahead - traded_volume
+            return []
+
+        order.queue_ahead = 0
+        fill_volume = min(order.remaining, traded_volume - queue_ahead)
+        return [(order.price, fill_volume)]
+
+    def update_queue(self, order: MatchingOrder, tick: TickData) -> None:
+        """
+        Update queue position of resting order with displayed volume.
+        """
+        if order.direction == Direction.LONG:
+            prefix = "bid"
+            best_price = tick.bid_price_1
+            better = order.price > best_price
+        else:
+            prefix = "ask"
+            best_price = tick.ask_price_1
+            better = not best_price or order.price < best_price
+
+        # Order creates new best price level, so no queue before it
+        if better:
+            if order.queue_ahead is None:
+                order.queue_ahead = 0
+            return
+
+        for i in range(1, 6):
+            price = getattr(tick, f"{prefix}_price_{i}")
+
+            if price == order.price:
+                volume = getattr(tick, f"{prefix}_volume_{i}")
+
+                # Volume cancelled is assumed to be behind the order,
+                # so queue ahead only shrinks when displayed volume is less.
+                if order.queue_ahead is None:
+                    order.queue_ahead = volume
+                else:
+                    order.queue_ahead = min(order.queue_ahead, volume)
+                return
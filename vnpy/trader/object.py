@@ -2,14 +2,31 @@
 Basic data structure used for general trading function in VN Trader.
 """
 
-from dataclasses import dataclass
+import sys
+from dataclasses import MISSING, dataclass, fields
 from datetime import datetime
 from logging import INFO
+from typing import Dict, Tuple
 
 from .constant import Direction, Exchange, Interval, Offset, Status, Product, OptionType, OrderType
 
 ACTIVE_STATUSES = set([Status.SUBMITTING, Status.NOTTRADED, Status.PARTTRADED])
 
+VT_SYMBOLS: Dict[Tuple[str, Exchange], str] = {}
+
+
+def get_vt_symbol(symbol: str, exchange: Exchange) -> str:
+    """
+    Get interned vt_symbol string, which is cached for each symbol.
+    """
+    vt_symbol = VT_SYMBOLS.get((symbol, exchange), None)
+
+    if not vt_symbol:
+        vt_symbol = sys.intern(f"{symbol}.{exchange.value}")
+        VT_SYMBOLS[(symbol, exchange)] = vt_symbol
+
+    return vt_symbol
+
 
 @dataclass
 class BaseData:
@@ -73,7 +90,7 @@ class TickData(BaseData):
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
 
 
 @dataclass
@@ -96,7 +113,7 @@ class BarData(BaseData):
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
 
 
 @dataclass
@@ -121,7 +138,7 @@ class OrderData(BaseData):
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = get_vt_symbol(self.symbol, self.exchange)
         self.vt_orderid = f"{self.gateway_name}.{self.orderid}"
 
     def is_active(self) -> bool:
@@ -333,3 +350,61 @@ class HistoryRequest:
     def __post_init__(self):
         """"""
         self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+
+
+def copy_slots(self):
+    """
+    Shallow copy of object with __slots__, faster than default copy.
+    """
+    cls = self.__class__
+    obj = cls.__new__(cls)
+
+    for name in cls.__slots__:
+        setattr(obj, name, getattr(self, name))
+
+    return obj
+
+
+def create_slots_class(cls: type, extra_names: Tuple[str]) -> type:
+    """
+    Create a compact variant of data class, which uses __slots__ instead
+    of per-instance __dict__. Attribute names, default values and methods
+    are the same as the original class.
+
+    extra_names are attributes assigned in __post_init__.
+    """
+    names = [f.name for f in fields(cls)]
+
+    namespace = {
+        "__annotations__": {f.name: f.type for f in fields(cls)},
+        "__module__": cls.__module__,
+        "__doc__": cls.__doc__,
+    }
+
+    for f in fields(cls):
+        if f.default is not MISSING:
+            namespace[f.name] = f.default
+
+    for klass in reversed(cls.__mro__[:-1]):
+        for key, value in klass.__dict__.items():
+            if callable(value) and not key.startswith("__"):
+                namespace[key] = value
+
+    namespace["__post_init__"] = cls.__post_init__
+
+    name = "Compact" + cls.__name__
+    data_class = dataclass(type(name, (), namespace))
+
+    # Class attributes of default values must be removed before adding slots
+    namespace = dict(data_class.__dict__)
+    for key in names + ["__dict__", "__weakref__"]:
+        namespace.pop(key, None)
+    namespace["__slots__"] = tuple(names) + extra_names
+    namespace["__copy__"] = copy_slots
+
+    return type(name, (), namespace)
+
+
+CompactTickData = create_slots_class(TickData, ("vt_symbol",))
+CompactBarData = create_slots_class(BarData, ("vt_symbol",))
+CompactOrderData = create_slots_class(OrderData, ("vt_symbol", "vt_orderid"))
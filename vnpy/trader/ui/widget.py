@@ -193,6 +193,7 @@ class BaseMonitor(QtWidgets.QTableWidget):
     data_key: str = ""
     sorting: bool = False
     headers: Dict[str, dict] = {}
+    conflate_interval: int = 0      # milliseconds, 0 for receiving every event
 
     signal: QtCore.pyqtSignal = QtCore.pyqtSignal(Event)
 
@@ -246,7 +247,13 @@ class BaseMonitor(QtWidgets.QTableWidget):
         """
         if self.event_type:
             self.signal.connect(self.process_event)
-            self.event_engine.register(self.event_type, self.signal.emit)
+
+            if self.conflate_interval:
+                self.event_engine.register_conflated(
+                    self.event_type, self.signal.emit, self.conflate_interval
+                )
+            else:
+                self.event_engine.register(self.event_type, self.signal.emit)
 
     def process_event(self, event: Event) -> None:
         """
@@ -351,6 +358,7 @@ class TickMonitor(BaseMonitor):
     event_type = EVENT_TICK
     data_key = "vt_symbol"
     sorting = True
+    conflate_interval = 200
 
     headers = {
         "symbol": {"display": "代码", "cell": BaseCell, "update": False},
@@ -739,7 +747,9 @@ class TradingWidget(QtWidgets.QWidget):
     def register_event(self) -> None:
         """"""
         self.signal_tick.connect(self.process_tick_event)
-        self.event_engine.register(EVENT_TICK, self.signal_tick.emit)
+        self.event_engine.register_conflated(
+            EVENT_TICK, self.signal_tick.emit, 200
+        )
 
     def process_tick_event(self, event: Event) -> None:
         """"""
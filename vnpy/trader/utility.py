@@ -5,8 +5,11 @@ General utility functions.
 import json
 import logging
 import sys
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Callable, Dict, Tuple, Union
+from queue import Queue
+from threading import Thread
+from typing import Callable, Dict, Iterator, Tuple, Union
 from decimal import Decimal
 from math import floor, ceil
 
@@ -15,6 +18,16 @@ import talib
 
 from .object import BarData, TickData
 from .constant import Exchange, Interval
+from .indicator import (
+    Indicator,
+    SmaIndicator,
+    EmaIndicator,
+    StdIndicator,
+    AtrIndicator,
+    RsiIndicator,
+    DonchianIndicator,
+    MacdIndicator
+)
 
 
 log_formatter = logging.Formatter('[%(asctime)s] %(message)s')
@@ -316,25 +329,170 @@ class BarGenerator:
         return bar
 
 
+def generate_bar_array(ticks) -> Dict[str, np.ndarray]:
+    """
+    Generate 1 minute bar data from tick data in batch, with same rules of
+    BarGenerator.update_tick. Last bar is also included, like calling
+    BarGenerator.generate after all ticks updated.
+
+    Ticks can be any data indexed by field name (structured array of
+    TICK_DTYPE, DataFrame or dict of arrays) with datetime (naive),
+    last_price, volume and open_interest. Result is a dict of field arrays.
+    """
+    dt = np.asarray(ticks["datetime"], dtype="datetime64[us]")
+    price = np.asarray(ticks["last_price"], dtype=float)
+    volume = np.asarray(ticks["volume"], dtype=float)
+    open_interest = np.asarray(ticks["open_interest"], dtype=float)
+
+    # Filter tick data with 0 last price
+    mask = price != 0
+    dt, price, volume, open_interest = (
+        dt[mask], price[mask], volume[mask], open_interest[mask]
+    )
+
+    # Filter tick data with older timestamp than last accepted tick
+    mask = dt >= np.maximum.accumulate(dt)
+    dt, price, volume, open_interest = (
+        dt[mask], price[mask], volume[mask], open_interest[mask]
+    )
+
+    count = len(dt)
+    if not count:
+        return generate_empty_bar_array()
+
+    # Volume change of each tick since last tick, counted into its own bar
+    volume_change = np.zeros(count)
+    volume_change[1:] = np.maximum(np.diff(volume), 0)
+
+    # New bar starts when minute of tick changed
+    minutes = dt.astype("datetime64[m]").astype("int64") % 60
+    starts = np.flatnonzero(np.diff(minutes, prepend=minutes[0] - 1))
+    ends = np.append(starts[1:], count) - 1
+
+    arrays = {
+        "datetime": dt[ends].astype("datetime64[m]").astype("datetime64[us]"),
+        "open_price": price[starts],
+        "high_price": np.maximum.reduceat(price, starts),
+        "low_price": np.minimum.reduceat(price, starts),
+        "close_price": price[ends],
+        "volume": np.add.reduceat(volume_change, starts),
+        "open_interest": open_interest[ends],
+    }
+    return arrays
+
+
+def generate_window_bar_array(
+    bars,
+    window: int,
+    interval: Interval = Interval.MINUTE
+) -> Dict[str, np.ndarray]:
+    """
+    Generate x minute/x hour bar data from 1 minute bar data in batch, with
+    same rules of BarGenerator.update_bar. Bars after the last finished
+    window are not included, since the window bar is not completed yet.
+
+    Bars can be any data indexed by field name (structured array of
+    BAR_DTYPE, DataFrame or dict of arrays) with naive datetime. Result is
+    a dict of field arrays.
+    """
+    dt = np.asarray(bars["datetime"], dtype="datetime64[us]")
+    count = len(dt)
+    if not count:
+        return generate_empty_bar_array()
+
+    if interval == Interval.MINUTE:
+        # x-minute bar finished when (minute + 1) can be divided by window
+        minutes = dt.astype("datetime64[m]").astype("int64") % 60
+        finished = (minutes + 1) % window == 0
+        bar_dt = dt.astype("datetime64[m]")
+    else:
+        # x-hour bar finished when hour changed for window times,
+        # bar of new hour is still included in the finished window bar
+        hours = dt.astype("datetime64[h]").astype("int64") % 24
+        changed = np.zeros(count, dtype=bool)
+        changed[1:] = hours[1:] != hours[:-1]
+
+        finished = changed & (np.cumsum(changed) % window == 0)
+        bar_dt = dt.astype("datetime64[h]")
+
+    ends = np.flatnonzero(finished)
+    if not len(ends):
+        return generate_empty_bar_array()
+
+    starts = np.append(0, ends[:-1] + 1)
+    last = ends[-1] + 1
+
+    high = np.asarray(bars["high_price"], dtype=float)[:last]
+    low = np.asarray(bars["low_price"], dtype=float)[:last]
+    volume = np.trunc(np.asarray(bars["volume"], dtype=float)[:last])
+
+    arrays = {
+        "datetime": bar_dt[starts].astype("datetime64[us]"),
+        "open_price": np.asarray(bars["open_price"], dtype=float)[starts],
+        "high_price": np.maximum.reduceat(high, starts),
+        "low_price": np.minimum.reduceat(low, starts),
+        "close_price": np.asarray(bars["close_price"], dtype=float)[ends],
+        "volume": np.add.reduceat(volume, starts),
+        "open_interest": np.asarray(bars["open_interest"], dtype=float)[ends],
+    }
+    return arrays
+
+
+def generate_empty_bar_array() -> Dict[str, np.ndarray]:
+    """"""
+    arrays = {
+        "datetime": np.array([], dtype="datetime64[us]"),
+        "open_price": np.array([], dtype=float),
+        "high_price": np.array([], dtype=float),
+        "low_price": np.array([], dtype=float),
+        "close_price": np.array([], dtype=float),
+        "volume": np.array([], dtype=float),
+        "open_interest": np.array([], dtype=float),
+    }
+    return arrays
+
+
 class ArrayManager(object):
     """
     For:
     1. time series container of bar data
     2. calculating technical indicator value
+
+    Bar data is saved in a ring buffer with double length of size. New bar
+    is written after the current window, and data is only moved back to the
+    head of buffer once every size bars, so update_bar is amortized O(1)
+    while the time series arrays are still contiguous views in time order.
+
+    With incremental enabled, latest value of sma/ema/std/atr/rsi/macd/
+    boll/keltner/donchian is calculated by indicator objects updated on
+    every bar with O(1) cost, instead of TA-Lib on whole arrays. Smoothed
+    indicators (ema/atr/rsi/macd) then continue over all bars instead of
+    restarting at the window, so values differ slightly from default mode
+    and backtesting results may change. It is disabled by default.
     """
 
-    def __init__(self, size: int = 100):
+    def __init__(self, size: int = 100, incremental: bool = False):
         """Constructor"""
         self.count: int = 0
         self.size: int = size
         self.inited: bool = False
 
-        self.open_array: np.ndarray = np.zeros(size)
-        self.high_array: np.ndarray = np.zeros(size)
-        self.low_array: np.ndarray = np.zeros(size)
-        self.close_array: np.ndarray = np.zeros(size)
-        self.volume_array: np.ndarray = np.zeros(size)
-        self.open_interest_array: np.ndarray = np.zeros(size)
+        self.incremental: bool = incremental
+        self.indicators: Dict[tuple, Indicator] = {}
+
+        # Rows: open, high, low, close, volume, open_interest
+        self.buffer_size: int = size * 2
+        self.buffer: np.ndarray = np.zeros((6, self.buffer_size))
+        self.index: int = size
+
+        self.open_array: np.ndarray = None
+        self.high_array: np.ndarray = None
+        self.low_array: np.ndarray = None
+        self.close_array: np.ndarray = None
+        self.volume_array: np.ndarray = None
+        self.open_interest_array: np.ndarray = None
+
+        self.update_views()
 
     def update_bar(self, bar: BarData) -> None:
         """
@@ -344,19 +502,57 @@ class ArrayManager(object):
         if not self.inited and self.count >= self.size:
             self.inited = True
 
-        self.open_array[:-1] = self.open_array[1:]
-        self.high_array[:-1] = self.high_array[1:]
-        self.low_array[:-1] = self.low_array[1:]
-        self.close_array[:-1] = self.close_array[1:]
-        self.volume_array[:-1] = self.volume_array[1:]
-        self.open_interest_array[:-1] = self.open_interest_array[1:]
+        # Move latest size - 1 bars to buffer head when buffer is full
+        if self.index == self.buffer_size:
+            self.buffer[:, :self.size - 1] = self.buffer[:, self.index - self.size + 1:]
+            self.index = self.size - 1
+
+        self.buffer[:, self.index] = (
+            bar.open_price,
+            bar.high_price,
+            bar.low_price,
+            bar.close_price,
+            bar.volume,
+            bar.open_interest
+        )
+        self.index += 1
+
+        self.update_views()
 
-        self.open_array[-1] = bar.open_price
-        self.high_array[-1] = bar.high_price
-        self.low_array[-1] = bar.low_price
-        self.close_array[-1] = bar.close_price
-        self.volume_array[-1] = bar.volume
-        self.open_interest_array[-1] = bar.open_interest
+        for indicator in self.indicators.values():
+            indicator.update(bar.high_price, bar.low_price, bar.close_price)
+
+    def update_views(self) -> None:
+        """
+        Update time series arrays to views of current window in buffer.
+        """
+        window = self.buffer[:, self.index - self.size:self.index]
+
+        self.open_array = window[0]
+        self.high_array = window[1]
+        self.low_array = window[2]
+        self.close_array = window[3]
+        self.volume_array = window[4]
+        self.open_interest_array = window[5]
+
+    def get_indicator(self, indicator_class: type, *args) -> Indicator:
+        """
+        Get incremental indicator, which is created and then replayed with
+        bars in current window when first used.
+        """
+        key = (indicator_class, args)
+        indicator = self.indicators.get(key, None)
+
+        if not indicator:
+            indicator = indicator_class(*args)
+
+            data = zip(self.high.tolist(), self.low.tolist(), self.close.tolist())
+            for high, low, close in data:
+                indicator.update(high, low, close)
+
+            self.indicators[key] = indicator
+
+        return indicator
 
     @property
     def open(self) -> np.ndarray:
@@ -404,6 +600,9 @@ class ArrayManager(object):
         """
         Simple moving average.
         """
+        if self.incremental and not array:
+            return self.get_indicator(SmaIndicator, n).value
+
         result = talib.SMA(self.close, n)
         if array:
             return result
@@ -413,6 +612,9 @@ class ArrayManager(object):
         """
         Exponential moving average.
         """
+        if self.incremental and not array:
+            return self.get_indicator(EmaIndicator, n).value
+
         result = talib.EMA(self.close, n)
         if array:
             return result
@@ -521,6 +723,9 @@ class ArrayManager(object):
         """
         Standard deviation.
         """
+        if self.incremental and not array:
+            return self.get_indicator(StdIndicator, n).value
+
         result = talib.STDDEV(self.close, n)
         if array:
             return result
@@ -548,6 +753,9 @@ class ArrayManager(object):
         """
         Average True Range (ATR).
         """
+        if self.incremental and not array:
+            return self.get_indicator(AtrIndicator, n).value
+
         result = talib.ATR(self.high, self.low, self.close, n)
         if array:
             return result
@@ -566,6 +774,9 @@ class ArrayManager(object):
         """
         Relative Strenght Index (RSI).
         """
+        if self.incremental and not array:
+            return self.get_indicator(RsiIndicator, n).value
+
         result = talib.RSI(self.close, n)
         if array:
             return result
@@ -584,6 +795,12 @@ class ArrayManager(object):
         """
         MACD.
         """
+        if self.incremental and not array:
+            indicator = self.get_indicator(
+                MacdIndicator, fast_period, slow_period, signal_period
+            )
+            return indicator.value
+
         macd, signal, hist = talib.MACD(
             self.close, fast_period, slow_period, signal_period
         )
@@ -712,6 +929,9 @@ class ArrayManager(object):
         """
         Donchian Channel.
         """
+        if self.incremental and not array:
+            return self.get_indicator(DonchianIndicator, n).value
+
         up = talib.MAX(self.high, n)
         down = talib.MIN(self.low, n)
 
@@ -804,6 +1024,99 @@ class ArrayManager(object):
         return result[-1]
 
 
+class ChunkedDataStream:
+    """
+    Iterate history data loaded chunk by chunk from start to end.
+
+    Next chunks are loaded by a prefetch thread while current chunk is being
+    consumed, so that database I/O is overlapped with backtesting, and at
+    most (prefetch + 2) chunks are kept in memory whatever the date range:
+    the one being consumed, prefetch ones queued and the one being loaded.
+    """
+
+    def __init__(
+        self,
+        load_func: Callable,
+        start: datetime,
+        end: datetime,
+        chunk_delta: timedelta,
+        interval_delta: timedelta,
+        prefetch: int = 2
+    ):
+        """
+        load_func is called with (start, end) of each chunk and returns a
+        list of data in time order.
+        """
+        self.load_func: Callable = load_func
+        self.start: datetime = start
+        self.end: datetime = end
+        self.chunk_delta: timedelta = chunk_delta
+        self.interval_delta: timedelta = interval_delta
+
+        self.queue: Queue = Queue(maxsize=prefetch)
+        self.thread: Thread = None
+        self.active: bool = False
+
+        self.count: int = 0
+
+    def __iter__(self) -> Iterator:
+        """"""
+        self.active = True
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+        try:
+            while True:
+                chunk = self.queue.get()
+
+                if chunk is None:
+                    break
+                elif isinstance(chunk, Exception):
+                    raise chunk
+
+                self.count += len(chunk)
+                yield from chunk
+        finally:
+            self.close()
+
+    def run(self) -> None:
+        """
+        Load chunks in the same way as load_data of backtesting engine.
+        """
+        start = self.start
+        end = self.start + self.chunk_delta
+
+        try:
+            while self.active and start < self.end:
+                end = min(end, self.end)
+
+                chunk = self.load_func(start, end)
+                if chunk:
+                    self.queue.put(chunk)
+
+                start = end + self.interval_delta
+                end += (self.chunk_delta + self.interval_delta)
+        except Exception as e:
+            self.queue.put(e)
+            return
+
+        self.queue.put(None)
+
+    def close(self) -> None:
+        """
+        Stop prefetch thread, called when iteration finished or stopped.
+        """
+        if not self.active:
+            return
+        self.active = False
+
+        # Unblock prefetch thread waiting for queue space
+        while self.thread.is_alive():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.thread.join(0.1)
+
+
 def virtual(func: Callable) -> Callable:
     """
     mark a function as "virtual", which means that this function can be override.